@@ -7,29 +7,766 @@
 
 import sqlite3
 import json
+import csv
+import io
+import re
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g, Response, stream_with_context, has_request_context
+from werkzeug.datastructures import MultiDict
+import click
 import os
 from pathlib import Path
+from urllib.parse import quote
+
+import ingest_data
+import instrumentation
+import ranking
+import similarity
+import singleflight
+import snapshots
 
 app = Flask(__name__)
+app.json = instrumentation.InstrumentedJSONProvider(app)
 
-# 数据库配置
-DATABASE = 'hypothesis_data.db'
+# 数据库配置（HYPOTHESIS_DATABASE 可指向其他数据库文件，如基准测试生成的合成库）
+# DATABASE 为主模型的分片，其他模型的分片位于同一目录（见 ingest_data.shard_path），请求用 model= 选择
+# 导入后各分片是指向当前快照的指针（见 snapshots），worker 发现新快照后预热并切换，不需要重启
+DATABASE = os.environ.get('HYPOTHESIS_DATABASE', 'hypothesis_data.db')
+_active_snapshots = {}
+_warming_snapshots = {}
+_snapshot_lock = threading.Lock()
+SNAPSHOT_SWAPS = instrumentation.registry.counter(
+    'hypothesis_snapshot_swaps_total', '切换到新数据库快照的次数', ('database',))
+# 跨模型查询时并行读取各分片的线程数
+SHARD_QUERY_WORKERS = int(os.environ.get('SHARD_QUERY_WORKERS', 8))
+_shard_executor = None
+_shard_executor_pid = None
+_shard_executor_lock = threading.Lock()
 
-def get_db_connection():
-    """获取数据库连接"""
-    conn = sqlite3.connect(DATABASE)
+# 连接池与只读优化配置（每个 gunicorn worker 进程各自维护一个连接池）
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+DB_STATEMENT_CACHE = int(os.environ.get('DB_STATEMENT_CACHE', 256))
+# immutable=1 时 SQLite 不再检查文件变化，只适用于运行期间不会被改写的数据库文件（快照总是以该方式打开）
+DB_IMMUTABLE = os.environ.get('DB_IMMUTABLE', '0') == '1'
+DB_PRAGMAS = {
+    'mmap_size': int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('DB_CACHE_SIZE', -64 * 1024)),
+    'temp_store': 'MEMORY',
+    'query_only': 1
+}
+_db_pools = {}
+_db_pool_owner = None
+_db_pool_lock = threading.Lock()
+
+# 允许排序的字段（白名单，避免将请求参数直接拼接进SQL）
+SORTABLE_COLUMNS = (
+    'overall_winner_score',
+    'novelty_score',
+    'significance_score',
+    'soundness_score',
+    'feasibility_score',
+    'created_at',
+    'avg_pmi_score',
+    'id'
+)
+
+# /api/hypotheses 单页最多返回的假设数
+HYPOTHESIS_MAX_PER_PAGE = 500
+
+# 全文检索：bm25相关度与 overall_winner_score 的组合权重
+SEARCH_SCORE_WEIGHT = 0.5
+SEARCH_COLUMNS = {
+    'content': 'hypothesis_content',
+    'feedback': 'feedback_results'
+}
+
+# /api/hypotheses 可选字段（fields= 投影）：字段名 -> 查询列；评分列与综合排名共用同一白名单
+HYPOTHESIS_SCORE_COLUMNS = ranking.SCORE_COLUMNS
+HYPOTHESIS_LIST_FIELDS = {
+    'id': ('id',),
+    'topic': ('topic',),
+    'sub_topic': ('sub_topic',),
+    'strategy': ('strategy',),
+    'hypothesis_id': ('hypothesis_id',),
+    'hypothesis_content': ('hypothesis_content',),
+    'feedback_results': ('feedback_results',),
+    'scores': tuple(HYPOTHESIS_SCORE_COLUMNS.values()),
+    'created_at': ('created_at',),
+    'title': ('title',),
+    'summary': ('summary',),
+    'novelty_verdict': ('novelty_verdict',),
+    'critique_count': ('critique_count',),
+    'cooccurrence_count': ('cooccurrence_count',),
+    'min_pmi_score': ('min_pmi_score',),
+    'avg_pmi_score': ('avg_pmi_score',)
+}
+# 摘要即问题陈述：标题、问题陈述等均为导入时建立的生成列，列表页无需传输整段JSON
+HYPOTHESIS_DERIVED_COLUMNS = {
+    'summary': 'h.problem_statement'
+}
+# 评审意见 / 关键词筛选：参数名 -> (侧表, 筛选列, 固定条件)
+HYPOTHESIS_REVIEW_FILTERS = {
+    'critique': ('hypothesis_critique', 'feedback_code', ''),
+    'dimension': ('hypothesis_critique', 'dimension', ''),
+    'keyword': ('hypothesis_keyword', 'value', "kind = 'query' AND "),
+    'concept': ('hypothesis_keyword', 'value', "kind = 'concept' AND ")
+}
+HYPOTHESIS_DEFAULT_FIELDS = (
+    'id', 'topic', 'sub_topic', 'strategy', 'hypothesis_id',
+    'hypothesis_content', 'feedback_results', 'scores', 'created_at'
+)
+# preview=true：列表视图只需要标题、截断的摘要与评分，完整内容通过 /api/hypothesis/<id> 获取
+HYPOTHESIS_PREVIEW_FIELDS = ('id', 'topic', 'sub_topic', 'strategy', 'hypothesis_id', 'title', 'summary', 'scores')
+PREVIEW_SUMMARY_LENGTH = 200
+
+# facets=：随列表结果返回的分面计数；每个分面计数时不应用其自身的筛选（多选筛选的常见做法）
+HYPOTHESIS_FACETS = ('strategy', 'topic', 'subtopic', 'score')
+# 这些筛选在评分矩阵上以掩码求值，其余筛选（搜索、评审字段等）在SQL中求出候选 id
+FACET_MATRIX_ARGS = ('topic', 'subtopic', 'strategy', 'min_score', 'max_score')
+FACET_BUCKET_SIZE = 50
+
+# 导出：格式 -> (MIME类型, 文件扩展名)；按批次从游标读取并逐块写出，不在内存中保留完整结果集
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 500))
+
+# 大列表响应分块输出：非预览的结果达到该行数时以 chunked 传输逐批序列化，不在内存中拼接完整响应体
+JSON_STREAM_MIN_ROWS = int(os.environ.get('JSON_STREAM_MIN_ROWS', 50))
+JSON_STREAM_CHUNK_ROWS = 25
+EXPORT_DEFAULT_FIELDS = (
+    'id', 'topic', 'sub_topic', 'strategy', 'hypothesis_id', 'title', 'scores',
+    'created_at', 'hypothesis_content', 'feedback_results'
+)
+# 前端 POST 请求体中的参数名 -> /api/hypotheses 的查询参数名
+EXPORT_ARG_ALIASES = {
+    'strategies': 'strategy',
+    'minScore': 'min_score',
+    'maxScore': 'max_score',
+    'scoreType': 'score_type',
+    'sortBy': 'sort_by',
+    'sortOrder': 'sort_order'
+}
+
+# 概念共现网络：中心性指标 -> concept_node 列；k 跳子图的跳数与节点数上限
+NETWORK_CENTRALITY_COLUMNS = {
+    'degree': 'degree_centrality',
+    'betweenness': 'betweenness_centrality',
+    'frequency': 'frequency'
+}
+NETWORK_MAX_HOPS = 3
+NETWORK_MAX_NODES = 200
+
+# 相似假设 / 近似重复簇：返回的假设字段，与单页最多返回的簇数
+SIMILAR_HYPOTHESIS_COLUMNS = 'h.id, h.topic, h.sub_topic, h.strategy, h.hypothesis_id, h.title, h.overall_winner_score'
+DUPLICATE_MAX_CLUSTERS = 100
+
+# 瑞士轮结果：每个想法改进前(before)/后(after)两个参赛版本，按此顺序组成评分轨迹
+TOURNAMENT_STAGES = ('before', 'after')
+TOURNAMENT_COLUMNS = ', '.join(
+    [f't.{column}' for column in HYPOTHESIS_SCORE_COLUMNS.values()]
+    + ['t.overall_rank', 't.cooccurrence_count', 't.min_pmi_score', 't.avg_pmi_score', 't.novelty_verdict']
+)
+
+# /api/tree 子主题可选字段；默认只返回侧边栏骨架，不含描述与检索词等大字段
+TREE_SUBTOPIC_FIELDS = (
+    'index',
+    'title',
+    'category',
+    'hypothesis_count',
+    'categories',
+    'description',
+    'search_queries',
+    'model_source'
+)
+TREE_DEFAULT_FIELDS = ('index', 'title', 'category', 'hypothesis_count', 'categories')
+
+# 总数缓存：按 (数据库版本, 筛选条件) 记忆 COUNT(*) 结果
+COUNT_CACHE_SIZE = 256
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+# 接口响应缓存：GET /api/* 按 (路径, 规范化参数, 数据库版本) 缓存响应体，LRU淘汰
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 512))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', 4 * 1024 * 1024))
+_response_cache = OrderedDict()
+_response_cache_bytes = 0
+_response_cache_lock = threading.Lock()
+
+# 请求合并：相同的未命中请求同时只计算一次，其余请求等待结果（最多 SINGLE_FLIGHT_TIMEOUT 秒后自行计算）
+# RESPONSE_CACHE_SHARED_DIR 指向本机目录（如 /dev/shm 下）时，各 worker 进程之间也共享计算结果
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 30))
+RESPONSE_CACHE_SHARED_DIR = os.environ.get('RESPONSE_CACHE_SHARED_DIR')
+_single_flight = singleflight.SingleFlight()
+_shared_responses = singleflight.SharedStore(RESPONSE_CACHE_SHARED_DIR) if RESPONSE_CACHE_SHARED_DIR else None
+COALESCED_REQUESTS = instrumentation.registry.counter(
+    'hypothesis_coalesced_requests_total', '复用其他请求计算结果的请求数（worker: 同进程，shared: 共享存储）',
+    ('route', 'source'))
+
+def get_model_shards():
+    """已导入的模型分片 {模型: 数据库路径}，主模型在前"""
+    return ingest_data.model_shards(DATABASE)
+
+def current_database():
+    """当前请求使用的分片：model= 参数选择的模型，未指定时为主模型"""
+    if has_request_context():
+        return g.get('database') or DATABASE
+    return DATABASE
+
+def current_snapshot(database=None):
+    """
+    分片（默认为当前请求的分片）正在使用的快照文件；同一请求内固定为同一快照，
+    连接、缓存键与相似度索引始终来自同一代数据
+    """
+    database = database or current_database()
+    if not has_request_context():
+        return activate_snapshot(database)
+    pinned = g.setdefault('snapshots', {})
+    if database not in pinned:
+        pinned[database] = activate_snapshot(database)
+    return pinned[database]
+
+def activate_snapshot(database):
+    """
+    检查分片指针：指向新快照时由发现变化的线程预热新快照后原子切换，再释放旧快照；
+    预热期间（或预热失败时）其他请求继续读取旧快照
+    """
+    target = snapshots.resolve(database)
+    with _snapshot_lock:
+        active = _active_snapshots.get(database)
+        if active == target or database in _warming_snapshots:
+            return active or target
+        _warming_snapshots[database] = target
+    try:
+        if active is not None:
+            warm_snapshot(target)
+    except Exception:
+        app.logger.exception('预热快照 %s 失败，继续使用 %s', target, active)
+        return active
+    finally:
+        with _snapshot_lock:
+            _warming_snapshots.pop(database, None)
+    with _snapshot_lock:
+        _active_snapshots[database] = target
+    if active is not None:
+        SNAPSHOT_SWAPS.inc(os.path.basename(database))
+        app.logger.info('%s 已切换到快照 %s', database, target)
+        drain_snapshot(active)
+    return target
+
+def snapshot_in_use(path):
+    with _snapshot_lock:
+        return path in _active_snapshots.values() or path in _warming_snapshots.values()
+
+def warm_snapshot(path):
+    """切换前预热新快照：建立连接放入连接池，读取汇总表与主表索引页，加载相似度索引"""
+    conn = open_db_connection(path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM hypothesis_summary').fetchall()
+        cursor.execute('SELECT COUNT(*) FROM hypothesis').fetchone()
+    except Exception:
+        conn.close()
+        raise
+    with _db_pool_lock:
+        _db_pools.setdefault(path, []).append(conn)
+    similarity.load_index(similarity.index_directory(path))
+
+def drain_snapshot(path):
+    """释放旧快照：关闭空闲连接（使用中的连接在归还时关闭），卸载相似度索引，清除以旧快照为键的缓存"""
+    global _response_cache_bytes
+    with _db_pool_lock:
+        idle = _db_pools.pop(path, [])
+    for conn in idle:
+        conn.close()
+    similarity.unload_index(similarity.index_directory(path))
+    with _count_cache_lock:
+        for key in [key for key in _count_cache if key[0] and key[0][0] == path]:
+            del _count_cache[key]
+    with _response_cache_lock:
+        for key in [key for key in _response_cache if key[2] and key[2][0] == path]:
+            _response_cache_bytes -= len(_response_cache.pop(key)[0])
+    if _shared_responses is not None:
+        _shared_responses.drop(shared_namespace(path))
+
+def open_db_connection(database):
+    """打开一个只读连接，并应用读优化的PRAGMA配置"""
+    uri = f'file:{quote(os.path.abspath(database))}?mode=ro'
+    if DB_IMMUTABLE or snapshots.is_snapshot(database):
+        uri += '&immutable=1'
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                           cached_statements=DB_STATEMENT_CACHE,
+                           factory=instrumentation.InstrumentedConnection)
     conn.row_factory = sqlite3.Row
+    conn.database = database
+    for name, value in DB_PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
     return conn
 
+def acquire_db_connection(snapshot=None):
+    """从快照（默认为当前请求分片的快照）的连接池取出连接，池为空时新建"""
+    global _db_pool_owner
+    snapshot = snapshot or current_snapshot()
+    with _db_pool_lock:
+        if _db_pool_owner != os.getpid():
+            # fork 出的 worker：不复用父进程的连接
+            _db_pools.clear()
+            _db_pool_owner = os.getpid()
+        pool = _db_pools.get(snapshot)
+        if pool:
+            return pool.pop()
+    return open_db_connection(snapshot)
+
+def release_db_connection(conn):
+    """归还连接到所属快照的连接池；池已满、快照已被替换或连接不属于当前进程时直接关闭"""
+    if conn.in_transaction:
+        conn.rollback()
+    if snapshot_in_use(conn.database):
+        with _db_pool_lock:
+            pool = _db_pools.setdefault(conn.database, [])
+            if _db_pool_owner == os.getpid() and len(pool) < DB_POOL_SIZE:
+                pool.append(conn)
+                return
+    conn.close()
+
+def get_shard_executor():
+    """跨分片查询的线程池（每个进程各自创建，fork 后不复用）"""
+    global _shard_executor, _shard_executor_pid
+    with _shard_executor_lock:
+        if _shard_executor_pid != os.getpid():
+            _shard_executor = ThreadPoolExecutor(max_workers=SHARD_QUERY_WORKERS, thread_name_prefix='shard')
+            _shard_executor_pid = os.getpid()
+        return _shard_executor
+
+def query_model_shards(query, models=None):
+    """
+    在各模型分片上并行执行 query(cursor)，返回 {模型: 结果}（主模型在前）
+    每个分片使用其当前快照连接池中的连接；query 需在返回前读完结果
+    """
+    shards = get_model_shards()
+    if models:
+        shards = {model: path for model, path in shards.items() if model in models}
+    # 在请求线程中确定各分片的快照，与该请求的其他查询读取同一代数据
+    shards = {model: current_snapshot(path) for model, path in shards.items()}
+    
+    def run(snapshot):
+        conn = acquire_db_connection(snapshot)
+        try:
+            return query(conn.cursor())
+        finally:
+            release_db_connection(conn)
+    
+    executor = get_shard_executor()
+    futures = {model: executor.submit(run, path) for model, path in shards.items()}
+    return {model: future.result() for model, future in futures.items()}
+
+def get_db_connection():
+    """获取当前请求使用的数据库连接（请求结束时由 teardown 自动归还连接池）"""
+    if 'db_conn' not in g:
+        g.db_conn = acquire_db_connection()
+    return g.db_conn
+
+@app.teardown_appcontext
+def return_db_connection(exception):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        release_db_connection(conn)
+
+def get_db_generation(database=None):
+    """
+    数据库版本标识（默认为当前请求的分片）：当前快照路径 + 文件（及WAL文件）的mtime/大小，
+    切换快照（或旧版数据库文件被原地改写）后随之变化；各缓存以此为键，不同分片、不同快照互不混用
+    """
+    database = current_snapshot(database)
+    generation = []
+    for path in (database, f'{database}-wal'):
+        try:
+            stat = os.stat(path)
+            generation.extend([stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            generation.extend([None, None])
+    return (database, *generation) if generation[0] is not None else None
+
+def cached_hypothesis_count(cursor, filter_sql, params):
+    """按筛选条件缓存假设总数，数据库版本变化后自动失效"""
+    key = (get_db_generation(), filter_sql, tuple(params))
+    with _count_cache_lock:
+        if key in _count_cache:
+            _count_cache.move_to_end(key)
+            return _count_cache[key]
+    
+    cursor.execute(f'SELECT COUNT(*) FROM hypothesis h{filter_sql}', params)
+    total = cursor.fetchone()[0]
+    
+    with _count_cache_lock:
+        _count_cache[key] = total
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+def response_cache_key():
+    """缓存键：路径 + 排序后的查询参数 + 数据库版本"""
+    args = tuple(sorted(request.args.items(multi=True)))
+    return (request.path, args, get_db_generation())
+
+def response_cache_get(key):
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is not None:
+            _response_cache.move_to_end(key)
+        return entry
+
+def response_cache_enabled():
+    """RESPONSE_CACHE_MAX_ENTRIES 等设为 0 时关闭响应缓存（基准测试默认如此）"""
+    return RESPONSE_CACHE_MAX_ENTRIES > 0 and RESPONSE_CACHE_MAX_BYTES > 0 and RESPONSE_CACHE_MAX_ENTRY_BYTES > 0
+
+def response_cache_put(key, body, mimetype, etag):
+    """
+    写入缓存，返回是否已保存；超过单条上限的响应不缓存，总大小或条数超限时淘汰最久未使用的条目
+    （缓存关闭时写入后立即被淘汰）
+    """
+    global _response_cache_bytes
+    if len(body) > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+        return False
+    with _response_cache_lock:
+        old = _response_cache.pop(key, None)
+        if old is not None:
+            _response_cache_bytes -= len(old[0])
+        _response_cache[key] = (body, mimetype, etag)
+        _response_cache_bytes += len(body)
+        while _response_cache and (len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES
+                                   or _response_cache_bytes > RESPONSE_CACHE_MAX_BYTES):
+            _, (evicted, _, _) = _response_cache.popitem(last=False)
+            _response_cache_bytes -= len(evicted)
+        return key in _response_cache
+
+def shared_namespace(snapshot):
+    """共享存储的命名空间：每个快照一个目录，切换快照后整体删除"""
+    return hashlib.sha256(snapshot.encode('utf-8')).hexdigest()[:16]
+
+def share_cached_response(key, body, mimetype, etag):
+    """
+    写入本进程的响应缓存；配置共享目录时同时写入共享存储，供其他 worker 读取。
+    返回是否已写入本进程缓存（未写入时同进程的等待者读不到结果）
+    """
+    stored = response_cache_put(key, body, mimetype, etag)
+    generation = key[2]
+    if _shared_responses is not None and generation and len(body) <= RESPONSE_CACHE_MAX_ENTRY_BYTES:
+        _shared_responses.put(shared_namespace(generation[0]), key, body, mimetype, etag)
+    return stored
+
+def coalesce_request(key):
+    """
+    缓存未命中时的请求合并：同进程内已有相同请求在计算时等待它完成后读取缓存；
+    否则成为计算者，配置共享存储时再用文件锁与其他 worker 合并（获得锁后先检查其他进程是否已写入结果）。
+    返回可直接使用的缓存条目，返回 None 表示由当前请求计算
+    """
+    flight, leader = _single_flight.join(key)
+    if not leader:
+        if flight.wait(SINGLE_FLIGHT_TIMEOUT):
+            entry = response_cache_get(key)
+            if entry is not None:
+                COALESCED_REQUESTS.inc(request_route(), 'worker')
+                return entry
+        # 等待超时，或计算结果不可缓存（出错、超过单条上限）：自行计算
+        return None
+    
+    g.single_flight = flight
+    generation = key[2]
+    if _shared_responses is None or not generation:
+        return None
+    namespace = shared_namespace(generation[0])
+    entry = _shared_responses.get(namespace, key)
+    if entry is None:
+        flight.lock = _shared_responses.lock(namespace, key, SINGLE_FLIGHT_TIMEOUT)
+        entry = _shared_responses.get(namespace, key)
+    if entry is None:
+        return None
+    COALESCED_REQUESTS.inc(request_route(), 'shared')
+    response_cache_put(key, *entry)
+    g.pop('single_flight').finish()
+    return entry
+
+def release_single_flight():
+    """结果不会写入缓存时立即唤醒等待者，由它们各自计算（不必等到当前响应完整输出）"""
+    flight = g.pop('single_flight', None)
+    if flight is not None:
+        flight.finish()
+
+@app.teardown_request
+def finish_single_flight(exception):
+    """请求结束（包括出错与结果不可缓存的情况）时唤醒等待同一结果的请求"""
+    release_single_flight()
+
+def is_cacheable_request():
+    return request.method == 'GET' and request.path.startswith('/api/')
+
+def request_route():
+    """指标使用的路由标签：URL 规则而不是实际路径，避免标签数量随参数增长"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_stats():
+    """开始统计（先于响应缓存注册，缓存命中的请求同样计入）；请求头 X-Profile 匹配时开始采样"""
+    g.request_stats = instrumentation.RequestStats()
+    if instrumentation.profiling_requested(request.headers):
+        g.profiler = instrumentation.StackSampler(threading.get_ident())
+        g.profiler.start()
+
+@app.before_request
+def select_model_shard():
+    """按 model= 参数选择分片（在响应缓存之前执行，缓存键使用所选分片的版本）；未知模型返回 400"""
+    model = request.args.get('model')
+    if not model:
+        return None
+    shards = get_model_shards()
+    if model not in shards:
+        return jsonify({'error': f'未知的模型: {model}', 'models': list(shards)}), 400
+    g.database = shards[model]
+    return None
+
+@app.after_request
+def record_request_metrics(response):
+    """写入请求指标（最先注册，因此在其他 after_request 之后执行，记录的是最终响应）"""
+    stats = g.pop('request_stats', None)
+    if stats is None:
+        return response
+    route = request_route()
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        stacks = profiler.stop()
+        response.headers['X-Profile-Samples'] = str(sum(stacks.values()))
+        response.headers['X-Profile-File'] = os.path.basename(profiler.write(route))
+    response_bytes = None if response.is_streamed else response.calculate_content_length()
+    instrumentation.finish_request(stats, route, request.method, response.status_code, response_bytes)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 文本格式的指标（每个 worker 进程各自统计）"""
+    return Response(instrumentation.registry.render(), mimetype='text/plain; version=0.0.4')
+
+instrumentation.registry.gauge(
+    'hypothesis_db_pool_idle_connections', '连接池中空闲的SQLite连接数',
+    lambda: sum(len(pool) for pool in _db_pools.values()))
+instrumentation.registry.gauge(
+    'hypothesis_response_cache_entries', '响应缓存条目数', lambda: len(_response_cache))
+instrumentation.registry.gauge(
+    'hypothesis_response_cache_bytes', '响应缓存占用字节数', lambda: _response_cache_bytes)
+instrumentation.registry.gauge(
+    'hypothesis_single_flight_in_progress', '正在计算、可被相同请求等待的请求数', lambda: len(_single_flight))
+
+@app.before_request
+def serve_cached_response():
+    """
+    命中缓存（或等到相同请求的计算结果）时直接返回；客户端 If-None-Match 与 ETag 一致时返回 304
+    """
+    if not is_cacheable_request():
+        return None
+    
+    g.response_cache_key = response_cache_key()
+    entry = response_cache_get(g.response_cache_key)
+    if entry is None and response_cache_enabled():
+        # 缓存关闭时等待者读不到计算结果，合并只会让相同请求依次执行，因此不合并
+        entry = coalesce_request(g.response_cache_key)
+    if entry is None:
+        return None
+    
+    body, mimetype, etag = entry
+    g.response_cache_hit = True
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['X-Cache'] = 'HIT'
+    return response.make_conditional(request)
+
+@app.after_request
+def store_cached_response(response):
+    """缓存成功的 GET /api/* 响应，并附加基于内容的强 ETag"""
+    key = g.pop('response_cache_key', None)
+    if key is None:
+        return response
+    
+    # 允许浏览器保存副本，但每次使用前需用 ETag 重新验证
+    response.headers['Cache-Control'] = 'no-cache'
+    if g.pop('response_cache_hit', False):
+        return response
+    if response.status_code != 200:
+        release_single_flight()
+        return response
+    if response.is_streamed:
+        # 分块输出的JSON列表边输出边缓存，下次命中时整体返回并带 ETag
+        if g.pop('cache_streamed_response', False):
+            response.headers['X-Cache'] = 'MISS'
+            response.response = cache_streamed_body(
+                response.response, key, response.mimetype, g.pop('single_flight', None))
+        else:
+            # 不缓存的流式响应（如导出）：流输出结束前请求上下文不会拆除，
+            # 等待者若等到输出结束再自行计算，相同的导出就会依次执行而不是并行
+            release_single_flight()
+        return response
+    
+    body = response.get_data()
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    response.set_etag(etag)
+    response.headers['X-Cache'] = 'MISS'
+    if not share_cached_response(key, body, response.mimetype, etag):
+        # 未写入缓存（超过单条上限等）：立即唤醒等待者各自计算
+        release_single_flight()
+    return response.make_conditional(request)
+
+def cache_streamed_body(chunks, key, mimetype, flight=None):
+    """
+    透传分块响应；完整输出且未超过单条上限时写入响应缓存（客户端中途断开则不缓存）。
+    请求上下文在输出结束前已释放，等待同一结果的请求在写入缓存后由此唤醒
+    """
+    try:
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                size += len(data)
+                if size > RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                    parts = None
+                    # 超过单条上限，结果不会写入缓存：不必让等待者等到输出结束
+                    if flight is not None:
+                        flight.finish()
+                else:
+                    parts.append(data)
+            yield chunk
+        if parts is not None:
+            body = b''.join(parts)
+            share_cached_response(key, body, mimetype, hashlib.sha256(body).hexdigest()[:32])
+    finally:
+        if flight is not None:
+            flight.finish()
+
+def wants_streamed_response(items, preview):
+    """stream=true/false 显式指定；未指定时非预览的大页面自动分块输出"""
+    stream = request.args.get('stream')
+    if stream is not None:
+        return stream.lower() == 'true'
+    return not preview and len(items) >= JSON_STREAM_MIN_ROWS
+
+def json_list_response(result, key, stream=False):
+    """
+    返回 JSON 响应；stream 为真时分块输出：先输出 key 以外的字段，
+    再按 JSON_STREAM_CHUNK_ROWS 条一批序列化 result[key] 列表，结果与 jsonify 解析后一致
+    """
+    if not stream:
+        return jsonify(result)
+    items = result[key]
+    head = {name: value for name, value in result.items() if name != key}
+    
+    def chunks():
+        prefix = app.json.dumps(head)[:-1]
+        yield f'{prefix}{"," if head else ""}{app.json.dumps(key)}:['
+        for start in range(0, len(items), JSON_STREAM_CHUNK_ROWS):
+            batch = ','.join(app.json.dumps(item) for item in items[start:start + JSON_STREAM_CHUNK_ROWS])
+            yield f'{"," if start else ""}{batch}'
+        yield ']}\n'
+    
+    g.cache_streamed_response = True
+    return Response(stream_with_context(chunks()), mimetype='application/json')
+
+def encode_cursor(sort_by, sort_order, value, row_id):
+    """将分页位置编码为不透明的游标字符串"""
+    payload = json.dumps([sort_by, sort_order, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """解析游标，格式错误时抛出ValueError"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_by, sort_order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError('invalid cursor')
+    if not isinstance(row_id, int):
+        raise ValueError('invalid cursor')
+    return sort_by, sort_order, value, row_id
+
+def has_fts_index(cursor):
+    """数据库是否已建立全文索引（由 ingest_data.py 创建）"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hypothesis_fts'")
+    return cursor.fetchone() is not None
+
+def build_fts_query(text, column=None, phrase=False):
+    """
+    将用户输入转换为安全的FTS5查询表达式：
+    每个词加引号避免语法注入，最后一个词做前缀匹配（支持边输入边搜索）
+    phrase=True 时按整个短语匹配（词语相邻且顺序一致）
+    """
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    if phrase:
+        expression = '"' + ' '.join(terms) + '"'
+    else:
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        expression = ' '.join(quoted)
+    if column:
+        expression = f'{{{column}}} : ({expression})'
+    return expression
+
+def fts_join_clause():
+    """全文检索子查询：返回匹配行的rowid与bm25得分（越小越相关）"""
+    return '''
+            JOIN (
+                SELECT rowid AS fts_id, bm25(hypothesis_fts, 1.0, 0.5) AS fts_rank
+                FROM hypothesis_fts
+                WHERE hypothesis_fts MATCH ?
+            ) f ON f.fts_id = h.id
+        '''
+
+def relevance_expression(cursor):
+    """bm25相关度按 overall_winner_score 加权后的排序表达式（越大越靠前）"""
+    cursor.execute('SELECT MAX(overall_winner_score) FROM hypothesis')
+    max_score = cursor.fetchone()[0] or 1.0
+    return (f'(-f.fts_rank * (1.0 + {float(SEARCH_SCORE_WEIGHT)!r} * '
+            f'IFNULL(h.overall_winner_score, 0) / {float(max_score)!r}))')
+
+def fetch_search_snippets(cursor, fts_query, ids):
+    """为当前页的结果生成高亮摘要"""
+    if not ids:
+        return {}
+    placeholders = ','.join('?' for _ in ids)
+    cursor.execute(f'''
+        SELECT rowid,
+               snippet(hypothesis_fts, 0, '<mark>', '</mark>', '…', 24) AS content_snippet,
+               snippet(hypothesis_fts, 1, '<mark>', '</mark>', '…', 24) AS feedback_snippet
+        FROM hypothesis_fts
+        WHERE hypothesis_fts MATCH ? AND rowid IN ({placeholders})
+    ''', [fts_query, *ids])
+    return {
+        row[0]: {'content': row[1], 'feedback': row[2]}
+        for row in cursor.fetchall()
+    }
+
 def init_database():
     """初始化数据库连接"""
     if not os.path.exists(DATABASE):
-        print(f"❌ 数据库文件 {DATABASE} 不存在，请先运行数据库创建脚本")
+        print(f"❌ 数据库文件 {DATABASE} 不存在，请先运行 python3 ingest_data.py 导入数据")
         return False
     return True
 
+@app.cli.command('ingest')
+@click.option('--data-dir', default=ingest_data.DATA_DIR, help='数据根目录')
+@click.option('--force', is_flag=True, help='忽略文件清单，重新导入全部主题')
+@click.option('--model', 'models', multiple=True, help='只导入指定模型的分片（可重复）')
+def ingest_command(data_dir, force, models):
+    """从 data/ 目录增量构建数据库（每个模型一个分片）"""
+    summary = ingest_data.ingest(DATABASE, data_dir, force=force, models=models or None)
+    print(f"✅ 导入完成：更新 {len(summary['ingested'])} 个主题，"
+          f"跳过 {len(summary['skipped'])} 个，移除 {len(summary['removed'])} 个")
+
 @app.route('/')
 def index():
     """主页面"""
@@ -40,59 +777,144 @@ def sorting():
     """排序筛选页面"""
     return render_template('sorting.html')
 
+def summary_scope(args):
+    """根据 topic / subtopic 参数确定汇总层级"""
+    topic = args.get('topic', type=int)
+    subtopic = args.get('subtopic', type=int)
+    if topic is None:
+        return 'all', None, None
+    if subtopic is None:
+        return 'topic', topic, None
+    return 'subtopic', topic, subtopic
+
+def fetch_summary_rows(cursor, scope, topic, sub_topic):
+    """读取某一层级的汇总行：strategy 为 NULL 的是合计，其余为各策略"""
+    cursor.execute('''
+        SELECT * FROM hypothesis_summary
+        WHERE scope = ? AND topic IS ? AND sub_topic IS ?
+        ORDER BY strategy
+    ''', (scope, topic, sub_topic))
+    rows = cursor.fetchall()
+    totals = next((row for row in rows if row['strategy'] is None), None)
+    return totals, [row for row in rows if row['strategy'] is not None]
+
+def summary_scores(row):
+    """汇总行中的各维度平均分（保留两位小数）"""
+    return {
+        'novelty': round(row['avg_novelty'], 2) if row['avg_novelty'] else 0,
+        'significance': round(row['avg_significance'], 2) if row['avg_significance'] else 0,
+        'soundness': round(row['avg_soundness'], 2) if row['avg_soundness'] else 0,
+        'feasibility': round(row['avg_feasibility'], 2) if row['avg_feasibility'] else 0,
+        'overall': round(row['avg_overall'], 2) if row['avg_overall'] else 0
+    }
+
 @app.route('/api/statistics')
 def get_statistics():
-    """获取统计信息"""
+    """
+    获取统计信息（读取导入时生成的汇总表）
+    可选 topic / subtopic 参数下钻到主题、子主题；breakdown=true 时附带下一层级的明细
+    """
     try:
+        scope, topic, sub_topic = summary_scope(request.args)
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 基础统计
-        cursor.execute('SELECT COUNT(DISTINCT topic) as total_topics FROM hypothesis')
-        total_topics = cursor.fetchone()['total_topics']
-        
-        cursor.execute('SELECT COUNT(DISTINCT sub_topic) as total_subtopics FROM hypothesis')
-        total_subtopics = cursor.fetchone()['total_subtopics']
+        totals, strategy_rows = fetch_summary_rows(cursor, scope, topic, sub_topic)
+        if totals is None:
+            return jsonify({'error': '没有找到对应的统计数据'}), 404
         
-        cursor.execute('SELECT COUNT(*) as total_hypotheses FROM hypothesis')
-        total_hypotheses = cursor.fetchone()['total_hypotheses']
+        result = {
+            'total_topics': totals['topic_count'],
+            'total_subtopics': totals['subtopic_count'],
+            'total_hypotheses': totals['hypothesis_count'],
+            'strategy_distribution': {row['strategy']: row['hypothesis_count'] for row in strategy_rows},
+            'score_statistics': summary_scores(totals)
+        }
+        if scope != 'all':
+            result['topic'] = topic
+        if scope == 'subtopic':
+            result['sub_topic'] = sub_topic
+        
+        # 下钻明细：全局 -> 各主题，主题 -> 各子主题
+        if request.args.get('breakdown', '').lower() in ('1', 'true') and scope != 'subtopic':
+            child_scope = 'topic' if scope == 'all' else 'subtopic'
+            cursor.execute('''
+                SELECT * FROM hypothesis_summary
+                WHERE scope = ? AND (? IS NULL OR topic = ?) AND strategy IS NULL
+                ORDER BY topic, sub_topic
+            ''', (child_scope, topic, topic))
+            result['breakdown'] = [{
+                'topic': row['topic'],
+                'sub_topic': row['sub_topic'],
+                'total_hypotheses': row['hypothesis_count'],
+                'total_subtopics': row['subtopic_count'],
+                'score_statistics': summary_scores(row)
+            } for row in cursor.fetchall()]
         
-        # 策略分布
-        cursor.execute('''
-            SELECT strategy, COUNT(*) as count 
-            FROM hypothesis 
-            GROUP BY strategy
-        ''')
-        strategy_distribution = {row['strategy']: row['count'] for row in cursor.fetchall()}
+        return jsonify(result)
         
-        # 评分统计
-        cursor.execute('''
-            SELECT 
-                AVG(novelty_score) as avg_novelty,
-                AVG(significance_score) as avg_significance,
-                AVG(soundness_score) as avg_soundness,
-                AVG(feasibility_score) as avg_feasibility,
-                AVG(overall_winner_score) as avg_overall
-            FROM hypothesis 
-            WHERE overall_winner_score IS NOT NULL
-        ''')
-        score_stats = cursor.fetchone()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/models')
+def get_models():
+    """已导入的模型分片及各分片的假设总数（primary 为不带 model= 参数时使用的分片）"""
+    try:
+        totals = query_model_shards(lambda cursor: fetch_summary_rows(cursor, 'all', None, None)[0])
+        
+        models = []
+        for model, row in totals.items():
+            models.append({
+                'model': model,
+                'primary': model == ingest_data.PRIMARY_MODEL,
+                'total_topics': row['topic_count'] if row else 0,
+                'total_hypotheses': row['hypothesis_count'] if row else 0,
+                'score_statistics': summary_scores(row) if row else None
+            })
         
-        conn.close()
+        return jsonify(models)
         
-        return jsonify({
-            'total_topics': total_topics,
-            'total_subtopics': total_subtopics,
-            'total_hypotheses': total_hypotheses,
-            'strategy_distribution': strategy_distribution,
-            'score_statistics': {
-                'novelty': round(score_stats['avg_novelty'], 2) if score_stats['avg_novelty'] else 0,
-                'significance': round(score_stats['avg_significance'], 2) if score_stats['avg_significance'] else 0,
-                'soundness': round(score_stats['avg_soundness'], 2) if score_stats['avg_soundness'] else 0,
-                'feasibility': round(score_stats['avg_feasibility'], 2) if score_stats['avg_feasibility'] else 0,
-                'overall': round(score_stats['avg_overall'], 2) if score_stats['avg_overall'] else 0
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/model_comparison')
+def get_model_comparison():
+    """
+    跨模型对比：各模型分片在同一层级（全局 / topic / subtopic）下的假设数与平均分，按策略细分
+    models=a,b 限定参与对比的模型；各分片并行读取导入时生成的汇总表
+    """
+    try:
+        scope, topic, sub_topic = summary_scope(request.args)
+        shards = get_model_shards()
+        models = [model.strip() for model in request.args.get('models', '').split(',') if model.strip()]
+        unknown = [model for model in models if model not in shards]
+        if unknown:
+            return jsonify({'error': f"未知的模型: {', '.join(unknown)}", 'models': list(shards)}), 400
+        
+        rows = query_model_shards(lambda cursor: fetch_summary_rows(cursor, scope, topic, sub_topic), models)
+        
+        result = {'models': {}, 'strategies': {}}
+        for model, (totals, strategy_rows) in rows.items():
+            if totals is None:
+                continue
+            result['models'][model] = {
+                'total_hypotheses': totals['hypothesis_count'],
+                'score_statistics': summary_scores(totals)
             }
-        })
+            for row in strategy_rows:
+                result['strategies'].setdefault(row['strategy'], {})[model] = {
+                    'total_hypotheses': row['hypothesis_count'],
+                    'score_statistics': summary_scores(row)
+                }
+        if not result['models']:
+            return jsonify({'error': '没有找到对应的统计数据'}), 404
+        if scope != 'all':
+            result['topic'] = topic
+        if scope == 'subtopic':
+            result['sub_topic'] = sub_topic
+        
+        return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -119,7 +941,6 @@ def get_topics():
                 'category': row['topic_category']
             })
         
-        conn.close()
         return jsonify(topics)
         
     except Exception as e:
@@ -147,7 +968,6 @@ def get_subtopics(topic_id):
                 'search_queries': row['search_queries']
             })
         
-        conn.close()
         return jsonify(subtopics)
         
     except Exception as e:
@@ -160,29 +980,23 @@ def get_categories(topic_id, subtopic_index):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 获取子主题的文本描述
+        # 按子主题序号确认子主题存在
         cursor.execute('''
-            SELECT sub_topic FROM literature_agent 
-            WHERE topic_id = ? 
-            ORDER BY sub_topic
-            LIMIT 1 OFFSET ?
+            SELECT 1 FROM literature_agent
+            WHERE topic_id = ? AND subtopic_index = ?
         ''', (topic_id, subtopic_index))
         
         result = cursor.fetchone()
         if not result:
-            conn.close()
             return jsonify([])
         
-        # 使用数字索引查询analyzer_agent表
-        numeric_subtopic = f"sub_topic_{subtopic_index}"
-        
         cursor.execute('''
-            SELECT DISTINCT literature_category, COUNT(*) as hypothesis_count
+            SELECT literature_category, COUNT(*) as hypothesis_count
             FROM analyzer_agent 
-            WHERE topic = ? AND sub_topic = ?
+            WHERE topic = ? AND subtopic_index = ?
             GROUP BY literature_category
             ORDER BY literature_category
-        ''', (topic_id, numeric_subtopic))
+        ''', (topic_id, subtopic_index))
         
         categories = []
         for row in cursor.fetchall():
@@ -191,165 +1005,674 @@ def get_categories(topic_id, subtopic_index):
                 'hypothesis_count': row['hypothesis_count']
             })
         
-        conn.close()
         return jsonify(categories)
-        
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tree')
+def get_tree():
+    """
+    一次返回完整主题树：主题、子主题、类别计数与文献元数据，替代逐个主题/子主题的请求
+    fields 为逗号分隔的子主题字段（稀疏字段集），topic 可只取单个主题
+    子主题 index 与 literature_agent / analyzer_analysis 接口使用的下标一致
+    """
+    try:
+        fields = request.args.get('fields', '').strip()
+        fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else list(TREE_DEFAULT_FIELDS)
+        invalid = [f for f in fields if f not in TREE_SUBTOPIC_FIELDS]
+        if invalid:
+            return jsonify({'error': f"Invalid fields: {', '.join(invalid)}"}), 400
+        topic = request.args.get('topic', type=int)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        topic_filter = 'WHERE topic_id = ?' if topic is not None else ''
+        params = (topic,) if topic is not None else ()
+        blob_columns = ''.join(
+            f', {column}' for column in ('description', 'search_queries', 'model_source') if column in fields
+        )
+        cursor.execute(f'''
+            SELECT topic_id, topic_title, topic_category, sub_topic, subtopic_index{blob_columns}
+            FROM literature_agent
+            {topic_filter}
+            ORDER BY topic_id, subtopic_index
+        ''', params)
+        rows = cursor.fetchall()
+
+        # 各子主题的假设数量：读取导入时生成的汇总表
+        hypothesis_counts = {}
+        if 'hypothesis_count' in fields:
+            cursor.execute(f'''
+                SELECT topic, sub_topic, hypothesis_count
+                FROM hypothesis_summary
+                WHERE scope = 'subtopic' AND strategy IS NULL {'AND topic = ?' if topic is not None else ''}
+            ''', params)
+            hypothesis_counts = {(row['topic'], row['sub_topic']): row['hypothesis_count'] for row in cursor.fetchall()}
+
+        # 各子主题的类别计数：一次分组查询
+        categories = {}
+        if 'categories' in fields:
+            cursor.execute(f'''
+                SELECT topic, subtopic_index, literature_category, COUNT(*) as hypothesis_count
+                FROM analyzer_agent
+                {'WHERE topic = ?' if topic is not None else ''}
+                GROUP BY topic, subtopic_index, literature_category
+                ORDER BY topic, subtopic_index, literature_category
+            ''', params)
+            for row in cursor.fetchall():
+                categories.setdefault((row['topic'], row['subtopic_index']), []).append({
+                    'name': row['literature_category'],
+                    'hypothesis_count': row['hypothesis_count']
+                })
+
+        topics = []
+        for row in rows:
+            if not topics or topics[-1]['id'] != row['topic_id']:
+                topics.append({
+                    'id': row['topic_id'],
+                    'title': row['topic_title'],
+                    'category': row['topic_category'],
+                    'subtopics': []
+                })
+            index = row['subtopic_index']
+            values = {
+                'index': index,
+                'title': row['sub_topic'],
+                'category': row['topic_category'],
+                'hypothesis_count': hypothesis_counts.get((row['topic_id'], index), 0),
+                'categories': categories.get((row['topic_id'], index), [])
+            }
+            topics[-1]['subtopics'].append({
+                field: values[field] if field in values else row[field] for field in fields
+            })
+
+        return jsonify(topics)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def build_hypothesis_filters(args, fts=False, include_search=True, sort_by=None):
+    """
+    根据请求参数构建假设查询的WHERE条件与参数
+    fts=True 时搜索走全文索引；include_search=False 时由调用方自行处理搜索条件
+    传入 sort_by 且评分筛选列与排序列不同时，评分条件不走索引（一元+号），
+    让查询沿排序索引按序扫描，避免临时排序
+    """
+    topic = args.get('topic', type=int)
+    subtopic = args.get('subtopic', type=int)
+    strategies = args.getlist('strategy')  # 获取多个策略参数
+    search = args.get('search', '').strip()
+    
+    # 评分筛选
+    min_score = args.get('min_score', type=float)
+    max_score = args.get('max_score', type=float)
+    score_type = args.get('score_type', 'overall_winner_score')
+    if score_type not in HYPOTHESIS_SCORE_COLUMNS.values():
+        raise ValueError(f'不支持的评分类型: {score_type}')
+    
+    where_conditions = []
+    params = []
+    
+    # 添加筛选条件
+    if topic and topic != 'undefined':
+        where_conditions.append('h.topic = ?')
+        params.append(topic)
+    
+    if subtopic is not None and subtopic != 'undefined':
+        where_conditions.append('h.sub_topic = ?')
+        params.append(subtopic)
+    
+    # 处理多策略筛选
+    if strategies and len(strategies) > 0:
+        # 过滤掉无效的策略值
+        valid_strategies = [s for s in strategies if s and s != 'undefined' and s != '']
+        if valid_strategies:
+            placeholders = ','.join(['?' for _ in valid_strategies])
+            where_conditions.append(f'h.strategy IN ({placeholders})')
+            params.extend(valid_strategies)
+    
+    novelty_verdict = args.get('novelty_verdict', '').strip()
+    if novelty_verdict:
+        where_conditions.append('h.novelty_verdict = ?')
+        params.append(novelty_verdict)
+    
+    # 评审意见代码 / 维度 / 关键词：在侧表索引中查找，多个值之间为“或”；
+    # 有排序列时同样用一元+号，沿排序索引扫描并逐行探测侧表，避免临时排序
+    row_id = '+h.id' if sort_by else 'h.id'
+    for name, (table, column, fixed) in HYPOTHESIS_REVIEW_FILTERS.items():
+        values = [v.strip() for v in args.getlist(name) if v.strip()]
+        if values:
+            placeholders = ','.join(['?' for _ in values])
+            where_conditions.append(
+                f'{row_id} IN (SELECT hypothesis_row_id FROM {table} WHERE {fixed}{column} IN ({placeholders}))')
+            params.extend(values)
+    
+    if search and include_search:
+        fts_query = build_fts_query(search) if fts else None
+        if fts_query:
+            where_conditions.append('h.id IN (SELECT rowid FROM hypothesis_fts WHERE hypothesis_fts MATCH ?)')
+            params.append(fts_query)
+        else:
+            where_conditions.append('(h.hypothesis_content LIKE ? OR h.feedback_results LIKE ?)')
+            params.extend([f'%{search}%', f'%{search}%'])
+    
+    score_column = f'h.{score_type}'
+    if sort_by and sort_by != score_type:
+        score_column = f'+{score_column}'
+    
+    if min_score is not None:
+        where_conditions.append(f'{score_column} >= ?')
+        params.append(min_score)
+    
+    if max_score is not None:
+        where_conditions.append(f'{score_column} <= ?')
+        params.append(max_score)
+    
+    return where_conditions, params
+
+def parse_hypothesis_fields(args):
+    """解析 fields= / preview= 参数，返回字段列表；包含未知字段时抛出 ValueError"""
+    fields = args.get('fields', '').strip()
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    elif args.get('preview', 'false').lower() == 'true':
+        fields = list(HYPOTHESIS_PREVIEW_FIELDS)
+    else:
+        fields = list(HYPOTHESIS_DEFAULT_FIELDS)
+    invalid = [f for f in fields if f not in HYPOTHESIS_LIST_FIELDS]
+    if invalid:
+        raise ValueError(f"不支持的字段: {', '.join(invalid)}")
+    return fields
+
+def hypothesis_select_columns(fields, sort_by):
+    """SELECT 列：所选字段对应的列，加上游标分页需要的 id 与排序列"""
+    columns = ['id']
+    if sort_by in SORTABLE_COLUMNS and sort_by not in columns:
+        columns.append(sort_by)
+    for field in fields:
+        for column in HYPOTHESIS_LIST_FIELDS[field]:
+            if column not in columns:
+                columns.append(column)
+    return ', '.join(
+        f'{HYPOTHESIS_DERIVED_COLUMNS[column]} AS {column}' if column in HYPOTHESIS_DERIVED_COLUMNS
+        else f'h.{column}'
+        for column in columns
+    )
+
+def hypothesis_list_item(row, fields, preview=False):
+    """按字段投影组装列表项；preview 模式下截断摘要"""
+    item = {}
+    for field in fields:
+        if field == 'scores':
+            item['scores'] = {name: row[column] for name, column in HYPOTHESIS_SCORE_COLUMNS.items()}
+        elif field == 'summary' and preview and row['summary'] and len(row['summary']) > PREVIEW_SUMMARY_LENGTH:
+            item['summary'] = row['summary'][:PREVIEW_SUMMARY_LENGTH] + '...'
+        else:
+            item[field] = row[field]
+    return item
+
+def resolve_hypothesis_sort(args, fts_query, allow_composite=False):
+    """
+    校验排序参数，带全文检索时默认按相关度排序；参数无效时抛出 ValueError
+    allow_composite=True 时提供 weights 参数即默认按加权综合得分（composite）排序
+    """
+    composite = allow_composite and bool(args.get('weights', '').strip())
+    default = 'composite' if composite else 'relevance' if fts_query else 'overall_winner_score'
+    sort_by = args.get('sort_by', default)
+    sort_order = args.get('sort_order', 'desc').lower()
+    if sort_by == 'relevance' and not fts_query:
+        sort_by = 'overall_winner_score'
+    if sort_by == 'composite':
+        if not composite:
+            raise ValueError('按综合得分排序需要提供 weights 参数' if allow_composite
+                             else f'不支持的排序字段: {sort_by}')
+    elif sort_by not in SORTABLE_COLUMNS and sort_by != 'relevance':
+        raise ValueError(f'不支持的排序字段: {sort_by}')
+    if sort_order not in ('asc', 'desc'):
+        raise ValueError(f'不支持的排序方向: {sort_order}')
+    return sort_by, sort_order
+
+def build_hypothesis_source(args, cursor, fts, fts_query, sort_by):
+    """
+    构建假设查询的 FROM 子句、WHERE 条件与参数，以及排序表达式
+    全文检索时搜索条件改由JOIN提供，以便取得相关度（SELECT 中附加 relevance 列）
+    """
+    if fts_query:
+        sort_column = relevance_expression(cursor)
+        from_sql = f', {sort_column} AS relevance FROM hypothesis h' + fts_join_clause()
+        where_conditions, params = build_hypothesis_filters(args, include_search=False, sort_by=sort_by)
+        params.insert(0, fts_query)
+    else:
+        sort_column = f'h.{sort_by}'
+        from_sql = ' FROM hypothesis h'
+        where_conditions, params = build_hypothesis_filters(args, fts=fts, sort_by=sort_by)
+    return from_sql, where_conditions, params, sort_column
+
+def keyset_condition(column, sort_order, value, row_id):
+    """
+    游标分页的定位条件：从 (排序表达式, id) 之后继续
+    SQLite中NULL最小：降序时排在最后，升序时排在最前
+    """
+    if sort_order == 'desc':
+        if value is None:
+            return f'({column} IS NULL AND h.id < ?)', [row_id]
+        return f'({column} < ? OR ({column} = ? AND h.id < ?) OR {column} IS NULL)', [value, value, row_id]
+    if value is None:
+        return f'(({column} IS NULL AND h.id > ?) OR {column} IS NOT NULL)', [row_id]
+    return f'({column} > ? OR ({column} = ? AND h.id > ?))', [value, value, row_id]
+
+def get_ranking_matrix(cursor):
+    """当前数据库版本的评分矩阵（进程内缓存，重新导入后自动重新加载）"""
+    return ranking.get_score_matrix(cursor, get_db_generation())
+
+def fetch_hypotheses_by_id(cursor, select_columns, ids, join_sql=''):
+    """按 id 批量取回假设行，返回 {id: row}"""
+    if not ids:
+        return {}
+    placeholders = ','.join(['?' for _ in ids])
+    cursor.execute(f'SELECT {select_columns} FROM hypothesis h{join_sql} WHERE h.id IN ({placeholders})', ids)
+    return {row['id']: row for row in cursor.fetchall()}
+
+def parse_hypothesis_facets(args):
+    """解析 facets= 参数（逗号分隔，all/true 表示全部）；包含未知分面时抛出 ValueError"""
+    text = args.get('facets', '').strip()
+    if not text:
+        return []
+    if text.lower() in ('all', 'true'):
+        return list(HYPOTHESIS_FACETS)
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    invalid = [name for name in names if name not in HYPOTHESIS_FACETS]
+    if invalid:
+        raise ValueError(f"不支持的分面: {', '.join(invalid)}")
+    return names
+
+def compute_hypothesis_facets(cursor, args, fts, names):
+    """
+    一次求出筛选结果总数与各分面计数，返回 (总数, 分面)
+    主题/子主题/策略/评分范围在评分矩阵上求掩码，其余筛选只执行一条取 id 的SQL；
+    每个分面合并除自身以外的掩码后计数（子主题分面保留主题筛选）
+    """
+    bucket_size = args.get('facet_bucket_size', FACET_BUCKET_SIZE, type=float)
+    if not bucket_size or bucket_size <= 0:
+        raise ValueError('facet_bucket_size 必须为正数')
+    score_type = args.get('score_type', 'overall_winner_score')
+    
+    base_args = MultiDict(args)
+    for name in FACET_MATRIX_ARGS:
+        base_args.poplist(name)
+    conditions, params = build_hypothesis_filters(base_args, fts=fts)
+    ids = None
+    if conditions:
+        cursor.execute('SELECT h.id FROM hypothesis h WHERE ' + ' AND '.join(conditions), params)
+        ids = [row[0] for row in cursor.fetchall()]
+    matrix = get_ranking_matrix(cursor)
+    
+    # 与 build_hypothesis_filters 相同的参数解析
+    masks = {}
+    topic = args.get('topic', type=int)
+    subtopic = args.get('subtopic', type=int)
+    strategies = [s for s in args.getlist('strategy') if s and s != 'undefined']
+    min_score = args.get('min_score', type=float)
+    max_score = args.get('max_score', type=float)
+    if topic:
+        masks['topic'] = matrix.topics == topic
+    if subtopic is not None:
+        masks['subtopic'] = matrix.sub_topics == subtopic
+    if strategies:
+        masks['strategy'] = matrix.strategy_mask(strategies)
+    if min_score is not None or max_score is not None:
+        masks['score'] = matrix.range_mask(score_type, min_score, max_score)
+    
+    def combined(*excluded):
+        mask = matrix.mask(ids)
+        for name, value in masks.items():
+            if name not in excluded:
+                mask &= value
+        return mask
+    
+    facets = {}
+    if 'strategy' in names:
+        facets['strategy'] = matrix.count_by_strategy(combined('strategy'))
+    if 'topic' in names:
+        facets['topic'] = matrix.count_by_topic(combined('topic', 'subtopic'))
+    if 'subtopic' in names:
+        facets['subtopic'] = matrix.count_by_subtopic(combined('subtopic'))
+    if 'score' in names:
+        buckets, missing = matrix.histogram(score_type, combined('score'), bucket_size)
+        facets['score'] = {
+            'column': score_type,
+            'bucket_size': bucket_size,
+            'buckets': buckets,
+            'missing': missing
+        }
+    return int(combined().sum()), facets
+
+def composite_hypotheses_page(cursor, args, fts, sort_order, fields, preview, page, per_page):
+    """
+    按加权综合得分分页：筛选条件在SQL中求出候选 id，排名在缓存的评分矩阵上完成，
+    再按 id 取回当页的行；返回 (列表项, 是否还有下一页, 总数)
+    """
+    weights = ranking.parse_weights(args.get('weights'))
+    normalize = ranking.parse_normalize(args.get('normalize'))
+    conditions, params = build_hypothesis_filters(args, fts=fts)
+    ids = None
+    if conditions:
+        cursor.execute('SELECT h.id FROM hypothesis h WHERE ' + ' AND '.join(conditions), params)
+        ids = [row[0] for row in cursor.fetchall()]
+    matrix = get_ranking_matrix(cursor)
+    ranked = ranking.rank(matrix, weights, normalize, ids=ids, descending=sort_order == 'desc',
+                          offset=(page - 1) * per_page, limit=per_page + 1)
+    has_more = len(ranked) > per_page
+    ranked = ranked[:per_page]
+    rows = fetch_hypotheses_by_id(
+        cursor, hypothesis_select_columns(fields, None), [row_id for row_id, _ in ranked])
+    hypotheses = []
+    for row_id, score in ranked:
+        item = hypothesis_list_item(rows[row_id], fields, preview)
+        item['composite_score'] = score
+        hypotheses.append(item)
+    total = len(matrix) if ids is None else len(ids)
+    return hypotheses, has_more, total
+
 @app.route('/api/hypotheses')
 def get_hypotheses():
-    """高级假设查询API"""
+    """
+    高级假设查询API
+    支持两种分页方式：page/per_page（偏移分页），或 cursor（游标分页，
+    按 (排序列, id) 定位，深翻页时不需要扫描并跳过前面的行）
+    带 search 参数时走全文索引，默认按相关度（bm25 × 综合评分）排序
+    fields= 为逗号分隔的返回字段；preview=true 只返回标题、截断摘要与评分
+    novelty_verdict= / critique= / dimension= / keyword= / concept= 按导入时拆分的评审字段筛选
+    weights=novelty:0.4,feasibility:0.6 按加权综合得分排序（normalize= 指定 z-score 分组，仅支持 page 分页）
+    facets=strategy,topic,subtopic,score 同时返回当前筛选条件下的分面计数，总数也由此得出
+    非预览的大页面（不少于 JSON_STREAM_MIN_ROWS 行）分块输出，stream=true/false 可显式指定
+    """
     try:
-        # 获取查询参数
-        topic = request.args.get('topic', type=int)
-        subtopic = request.args.get('subtopic', type=int)
-        category = request.args.get('category')
-        strategies = request.args.getlist('strategy')  # 获取多个策略参数
         search = request.args.get('search', '').strip()
         
-        # 添加调试信息
-        print(f"🔍 接收到的策略参数: {strategies}")
-        print(f"🔍 策略参数类型: {type(strategies)}")
-        print(f"🔍 策略参数长度: {len(strategies) if strategies else 0}")
-        
-        # 排序参数
-        sort_by = request.args.get('sort_by', 'overall_winner_score')
-        sort_order = request.args.get('sort_order', 'desc')
-        
-        # 评分筛选
-        min_score = request.args.get('min_score', type=float)
-        max_score = request.args.get('max_score', type=float)
-        score_type = request.args.get('score_type', 'overall_winner_score')
-        
-        # 分页参数
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        fts = has_fts_index(cursor)
+        fts_query = build_fts_query(search) if search and fts else None
+        
+        # 排序参数与字段投影（fields= 指定返回字段，preview=true 只返回标题、摘要与评分）
+        try:
+            sort_by, sort_order = resolve_hypothesis_sort(request.args, fts_query, allow_composite=True)
+            fields = parse_hypothesis_fields(request.args)
+            facet_names = parse_hypothesis_facets(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        preview = request.args.get('preview', 'false').lower() == 'true'
+        
+        # 分页参数（page >= 1，1 <= per_page <= HYPOTHESIS_MAX_PER_PAGE）
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), HYPOTHESIS_MAX_PER_PAGE)
+        cursor_token = request.args.get('cursor')
+        
+        if sort_by == 'composite':
+            if cursor_token:
+                return jsonify({'error': '综合得分排序不支持游标分页，请使用 page 参数'}), 400
+            hypotheses, has_more, total_count = composite_hypotheses_page(
+                cursor, request.args, fts, sort_order, fields, preview, page, per_page)
+            result = {
+                'hypotheses': hypotheses,
+                'pagination': {
+                    'page': page,
+                    'per_page': per_page,
+                    'total': total_count,
+                    'pages': (total_count + per_page - 1) // per_page,
+                    'has_more': has_more,
+                    'next_cursor': None
+                }
+            }
+            if facet_names:
+                _, result['facets'] = compute_hypothesis_facets(cursor, request.args, fts, facet_names)
+            return json_list_response(result, 'hypotheses', wants_streamed_response(hypotheses, preview))
+        
         # 构建查询SQL
-        query = '''
-            SELECT 
-                h.id,
-                h.topic,
-                h.sub_topic,
-                h.strategy,
-                h.hypothesis_id,
-                h.hypothesis_content,
-                h.feedback_results,
-                h.novelty_score,
-                h.significance_score,
-                h.soundness_score,
-                h.feasibility_score,
-                h.overall_winner_score,
-                h.created_at
-            FROM hypothesis h
-        '''
+        query = f'SELECT {hypothesis_select_columns(fields, sort_by)}'
         
-        # 动态构建WHERE子句
-        where_conditions = []
-        
-        params = []
-        
-        # 添加筛选条件
-        if topic and topic != 'undefined':
-            where_conditions.append('h.topic = ?')
-            params.append(topic)
-        
-        if subtopic is not None and subtopic != 'undefined':
-            where_conditions.append('h.sub_topic = ?')
-            params.append(subtopic)
-        
-        # 处理多策略筛选
-        if strategies and len(strategies) > 0:
-            # 过滤掉无效的策略值
-            valid_strategies = [s for s in strategies if s and s != 'undefined' and s != '']
-            print(f"🔍 有效策略: {valid_strategies}")
-            if valid_strategies:
-                placeholders = ','.join(['?' for _ in valid_strategies])
-                where_conditions.append(f'h.strategy IN ({placeholders})')
-                params.extend(valid_strategies)
-                print(f"🔍 添加策略筛选: {where_conditions}")
-                print(f"🔍 策略参数: {params}")
-        
-        if search:
-            where_conditions.append('(h.hypothesis_content LIKE ? OR h.feedback_results LIKE ?)')
-            params.extend([f'%{search}%', f'%{search}%'])
+        # 总数查询使用完整的筛选条件
+        count_conditions, filter_params = build_hypothesis_filters(request.args, fts=fts)
+        filter_sql = ' WHERE ' + ' AND '.join(count_conditions) if count_conditions else ''
         
-        if min_score is not None:
-            where_conditions.append(f'h.{score_type} >= ?')
-            params.append(min_score)
+        # 动态构建FROM与WHERE子句
+        from_sql, where_conditions, params, sort_column = build_hypothesis_source(
+            request.args, cursor, fts, fts_query, sort_by)
+        query += from_sql
         
-        if max_score is not None:
-            where_conditions.append(f'h.{score_type} <= ?')
-            params.append(max_score)
+        if cursor_token:
+            try:
+                cursor_sort_by, cursor_order, last_value, last_id = decode_cursor(cursor_token)
+            except ValueError:
+                return jsonify({'error': '无效的分页游标'}), 400
+            if (cursor_sort_by, cursor_order) != (sort_by, sort_order):
+                return jsonify({'error': '分页游标与当前排序条件不一致'}), 400
+            condition, condition_params = keyset_condition(sort_column, sort_order, last_value, last_id)
+            where_conditions.append(condition)
+            params.extend(condition_params)
         
         # 添加WHERE子句（如果有条件的话）
         if where_conditions:
             query += ' WHERE ' + ' AND '.join(where_conditions)
         
-        # 添加排序
-        query += f' ORDER BY h.{sort_by} {sort_order.upper()}'
+        # 添加排序（以id作为稳定的次级排序，保证游标位置唯一）
+        query += f' ORDER BY {sort_column} {sort_order.upper()}, h.id {sort_order.upper()}'
         
-        # 添加分页
-        query += ' LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
-        
-        print(f"🔍 最终SQL查询: {query}")
-        print(f"🔍 最终参数: {params}")
+        # 添加分页：多取一行用于判断是否还有下一页
+        if cursor_token:
+            query += ' LIMIT ?'
+            params.append(per_page + 1)
+        else:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([per_page + 1, (page - 1) * per_page])
         
         # 执行查询
         cursor.execute(query, params)
-        hypotheses = []
+        rows = cursor.fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        hypotheses = [hypothesis_list_item(row, fields, preview) for row in rows]
+        
+        # 全文检索：附加相关度与高亮摘要
+        if fts_query:
+            snippets = fetch_search_snippets(cursor, fts_query, [row['id'] for row in rows])
+            for hypothesis, row in zip(hypotheses, rows):
+                hypothesis['relevance'] = row['relevance']
+                hypothesis['highlight'] = snippets.get(row['id'])
+        
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(sort_by, sort_order, last[sort_by], last['id'])
+        
+        # 获取总数（按筛选条件缓存，数据库更新后失效）；请求分面时总数与分面一起得出
+        facets = None
+        if facet_names:
+            total_count, facets = compute_hypothesis_facets(cursor, request.args, fts, facet_names)
+        else:
+            total_count = cached_hypothesis_count(cursor, filter_sql, filter_params)
+        
+        pagination = {
+            'per_page': per_page,
+            'total': total_count,
+            'pages': (total_count + per_page - 1) // per_page,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+        if not cursor_token:
+            pagination['page'] = page
         
-        for row in cursor.fetchall():
-            hypotheses.append({
-                'id': row['id'],
-                'topic': row['topic'],
-                'sub_topic': row['sub_topic'],
-                'strategy': row['strategy'],
-                'hypothesis_id': row['hypothesis_id'],
-                'hypothesis_content': row['hypothesis_content'],
-                'feedback_results': row['feedback_results'],
-                'scores': {
-                    'novelty': row['novelty_score'],
-                    'significance': row['significance_score'],
-                    'soundness': row['soundness_score'],
-                    'feasibility': row['feasibility_score'],
-                    'overall_winner': row['overall_winner_score']
-                },
-                'created_at': row['created_at']
-            })
+        result = {
+            'hypotheses': hypotheses,
+            'pagination': pagination
+        }
+        if facets is not None:
+            result['facets'] = facets
+        return json_list_response(result, 'hypotheses', wants_streamed_response(hypotheses, preview))
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.exception('假设查询失败')
+        return jsonify({'error': str(e)}), 500
+
+def export_request_args():
+    """合并查询参数与 POST 请求体（JSON 或表单），并兼容前端使用的驼峰参数名"""
+    args = MultiDict(request.args)
+    if request.method == 'POST':
+        body = request.get_json(silent=True) if request.is_json else request.form.to_dict(flat=False)
+        for key, value in (body or {}).items():
+            key = EXPORT_ARG_ALIASES.get(key, key)
+            values = value if isinstance(value, list) else [value]
+            values = [str(v) for v in values if v is not None and v != '']
+            if key == 'fields':
+                values = [','.join(values)] if values else []
+            args.setlist(key, values)
+    return args
+
+def export_columns(fields, with_relevance):
+    """导出的平铺列名：scores 展开为各评分列"""
+    columns = []
+    for field in fields:
+        columns.extend(HYPOTHESIS_SCORE_COLUMNS.values() if field == 'scores' else [field])
+    if with_relevance:
+        columns.append('relevance')
+    return columns
+
+def iter_export_batches(cursor):
+    while True:
+        rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+        if not rows:
+            break
+        yield rows
+
+def export_csv(cursor, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in iter_export_batches(cursor):
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows([row[column] for column in columns] for row in rows)
+        yield buffer.getvalue()
+
+def export_ndjson(cursor, fields, with_relevance):
+    for rows in iter_export_batches(cursor):
+        lines = []
+        for row in rows:
+            item = hypothesis_list_item(row, fields)
+            if with_relevance:
+                item['relevance'] = row['relevance']
+            lines.append(json.dumps(item, ensure_ascii=False) + '\n')
+        yield ''.join(lines)
+
+class ExportSink(io.RawIOBase):
+    """只追加的输出缓冲：记录累计写入位置，供 Parquet 写入器逐批取走已写出的字节"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def export_parquet(cursor, columns, pa, pq):
+    """每批写成一个 row group，写出后立即发送"""
+    integer_columns = {'id', 'topic', 'sub_topic', 'hypothesis_id'}
+    float_columns = set(HYPOTHESIS_SCORE_COLUMNS.values()) | {'relevance'}
+    schema = pa.schema([
+        (column, pa.int64() if column in integer_columns
+         else pa.float64() if column in float_columns else pa.string())
+        for column in columns
+    ])
+    sink = ExportSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for rows in iter_export_batches(cursor):
+            batch = [{column: row[column] for column in columns} for row in rows]
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+@app.route('/api/export/hypotheses', methods=['GET', 'POST'])
+def export_hypotheses():
+    """
+    流式导出筛选后的假设（CSV / NDJSON / Parquet）
+    筛选、搜索与排序参数与 /api/hypotheses 相同，可放在查询参数或 POST 请求体中；
+    format 指定格式（默认 csv），fields 指定导出字段
+    """
+    try:
+        args = export_request_args()
+        export_format = args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'不支持的导出格式: {export_format}'}), 400
+        if export_format == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                return jsonify({'error': 'Parquet 导出需要安装 pyarrow'}), 400
         
-        print(f"🔍 查询结果数量: {len(hypotheses)}")
+        conn = get_db_connection()
+        cursor = conn.cursor()
         
-        # 获取总数 - 修复SQL查询
-        count_query = query.replace('SELECT \n                h.id,\n                h.topic,\n                h.sub_topic,\n                h.strategy,\n                h.hypothesis_id,\n                h.hypothesis_content,\n                h.feedback_results,\n                h.novelty_score,\n                h.significance_score,\n                h.soundness_score,\n                h.feasibility_score,\n                h.overall_winner_score,\n                h.created_at', 'SELECT COUNT(*)')
+        fts = has_fts_index(cursor)
+        search = args.get('search', '').strip()
+        fts_query = build_fts_query(search) if search and fts else None
         
-        # 移除排序和分页部分
-        count_query = count_query.split(' ORDER BY ')[0]
+        try:
+            sort_by, sort_order = resolve_hypothesis_sort(args, fts_query)
+            fields = parse_hypothesis_fields(args) if args.get('fields') else list(EXPORT_DEFAULT_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # 移除分页参数（如果有的话）
-        count_params = params[:-2] if len(params) >= 2 and 'LIMIT' in query else params
-        cursor.execute(count_query, count_params)
-        total_count = cursor.fetchone()[0]
+        from_sql, where_conditions, params, sort_column = build_hypothesis_source(
+            args, cursor, fts, fts_query, sort_by)
+        query = f'SELECT {hypothesis_select_columns(fields, sort_by)}{from_sql}'
+        if where_conditions:
+            query += ' WHERE ' + ' AND '.join(where_conditions)
+        query += f' ORDER BY {sort_column} {sort_order.upper()}, h.id {sort_order.upper()}'
         
-        conn.close()
+        # 游标按批次读取，生成器在请求上下文内运行，结束后连接才归还连接池
+        cursor.execute(query, params)
+        with_relevance = fts_query is not None
+        if export_format == 'csv':
+            chunks = export_csv(cursor, export_columns(fields, with_relevance))
+        elif export_format == 'ndjson':
+            chunks = export_ndjson(cursor, fields, with_relevance)
+        else:
+            chunks = export_parquet(cursor, export_columns(fields, with_relevance), pa, pq)
         
-        return jsonify({
-            'hypotheses': hypotheses,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total_count,
-                'pages': (total_count + per_page - 1) // per_page
-            }
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f"hypotheses_export_{datetime.now().strftime('%Y-%m-%d')}.{extension}"
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"❌ 查询错误: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/advanced_search')
@@ -365,6 +1688,7 @@ def advanced_search():
         
         conn = get_db_connection()
         cursor = conn.cursor()
+        fts_query = None
         
         if search_type == 'scores':
             # 按评分搜索
@@ -383,8 +1707,20 @@ def advanced_search():
                 ''', (score_value, score_value, score_value, score_value, score_value))
             except ValueError:
                 return jsonify({'error': '评分搜索需要数字值'}), 400
+        elif has_fts_index(cursor) and build_fts_query(query):
+            # 全文索引检索，按 bm25 × 综合评分排序
+            fts_query = build_fts_query(query, SEARCH_COLUMNS.get(search_type))
+            cursor.execute(f'''
+                SELECT h.id, h.topic, h.sub_topic, h.strategy, h.hypothesis_id,
+                       h.hypothesis_content, h.feedback_results, h.overall_winner_score,
+                       {relevance_expression(cursor)} AS relevance
+                FROM hypothesis h
+                {fts_join_clause()}
+                ORDER BY relevance DESC, h.id DESC
+                LIMIT 50
+            ''', (fts_query,))
         else:
-            # 按内容搜索
+            # 未建立全文索引时回退为LIKE匹配
             if search_type == 'content':
                 sql = '''
                     SELECT id, topic, sub_topic, strategy, hypothesis_id,
@@ -418,8 +1754,13 @@ def advanced_search():
             else:
                 cursor.execute(sql, [f'%{query}%'])
         
+        rows = cursor.fetchall()
+        snippets = {}
+        if fts_query:
+            snippets = fetch_search_snippets(cursor, fts_query, [row['id'] for row in rows])
+        
         results = []
-        for row in cursor.fetchall():
+        for row in rows:
             result = {
                 'id': row['id'],
                 'topic': row['topic'],
@@ -441,10 +1782,12 @@ def advanced_search():
                     'feasibility': row['feasibility_score'],
                     'overall_winner': row['overall_winner_score']
                 }
+            if row['id'] in snippets:
+                result['relevance'] = row['relevance']
+                result['highlight'] = snippets[row['id']]
             
             results.append(result)
         
-        conn.close()
         return jsonify({'results': results, 'query': query, 'type': search_type})
         
     except Exception as e:
@@ -452,57 +1795,35 @@ def advanced_search():
 
 @app.route('/api/analytics/score_distribution')
 def get_score_distribution():
-    """获取评分分布分析"""
+    """获取评分分布分析（读取汇总表，可选 topic / subtopic 参数）"""
     try:
+        scope, topic, sub_topic = summary_scope(request.args)
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 评分分布
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN overall_winner_score >= 8 THEN '优秀 (8-10)'
-                    WHEN overall_winner_score >= 6 THEN '良好 (6-8)'
-                    WHEN overall_winner_score >= 4 THEN '一般 (4-6)'
-                    ELSE '较差 (0-4)'
-                END as score_range,
-                COUNT(*) as count
-            FROM hypothesis 
-            WHERE overall_winner_score IS NOT NULL
-            GROUP BY 
-                CASE 
-                    WHEN overall_winner_score >= 8 THEN '优秀 (8-10)'
-                    WHEN overall_winner_score >= 6 THEN '良好 (6-8)'
-                    WHEN overall_winner_score >= 4 THEN '一般 (4-6)'
-                    ELSE '较差 (0-4)'
-                END
-            ORDER BY 
-                CASE score_range
-                    WHEN '优秀 (8-10)' THEN 1
-                    WHEN '良好 (6-8)' THEN 2
-                    WHEN '一般 (4-6)' THEN 3
-                    ELSE 4
-                END
-        ''')
+        totals, strategy_rows = fetch_summary_rows(cursor, scope, topic, sub_topic)
         
-        distribution = [{'range': row['score_range'], 'count': row['count']} for row in cursor.fetchall()]
+        # 评分分布
+        score_ranges = [
+            ('优秀 (8-10)', 'bucket_excellent'),
+            ('良好 (6-8)', 'bucket_good'),
+            ('一般 (4-6)', 'bucket_fair'),
+            ('较差 (0-4)', 'bucket_poor')
+        ]
+        distribution = []
+        if totals is not None:
+            distribution = [
+                {'range': label, 'count': totals[key]}
+                for label, key in score_ranges
+                if totals[key]
+            ]
         
         # 策略对比
-        cursor.execute('''
-            SELECT 
-                strategy,
-                AVG(novelty_score) as avg_novelty,
-                AVG(significance_score) as avg_significance,
-                AVG(soundness_score) as avg_soundness,
-                AVG(feasibility_score) as avg_feasibility,
-                AVG(overall_winner_score) as avg_overall
-            FROM hypothesis 
-            WHERE overall_winner_score IS NOT NULL
-            GROUP BY strategy
-        ''')
-        
         strategy_comparison = []
-        for row in cursor.fetchall():
+        for row in strategy_rows:
+            if not row['scored_count']:
+                continue
             strategy_comparison.append({
                 'strategy': row['strategy'],
                 'scores': {
@@ -514,8 +1835,6 @@ def get_score_distribution():
                 }
             })
         
-        conn.close()
-        
         return jsonify({
             'distribution': distribution,
             'strategy_comparison': strategy_comparison
@@ -524,32 +1843,38 @@ def get_score_distribution():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-
-
 @app.route('/api/analytics/top_hypotheses')
 def get_top_hypotheses():
-    """获取TOP假设"""
+    """
+    获取TOP假设
+    score_type 为单一评分列；weights=novelty:0.4,feasibility:0.6 按加权综合得分排名，
+    normalize=global/strategy/topic 先在全体或各策略/主题内做 z-score 标准化
+    """
     try:
-        limit = request.args.get('limit', 20, type=int)
+        limit = max(request.args.get('limit', 20, type=int), 0)
         score_type = request.args.get('score_type', 'overall_winner_score')
+        try:
+            # score_type 同样经过评分维度白名单，视为权重为1的单列公式
+            weights = ranking.parse_weights(request.args.get('weights') or score_type)
+            normalize = ranking.parse_normalize(request.args.get('normalize'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute(f'''
-            SELECT 
+        ranked = ranking.rank(get_ranking_matrix(cursor), weights, normalize,
+                              limit=limit, include_missing=False)
+        rows = fetch_hypotheses_by_id(cursor, '''
                 h.id, h.topic, h.sub_topic, h.strategy, h.hypothesis_id,
                 h.hypothesis_content, h.overall_winner_score,
                 la.sub_topic as subtopic_title
-            FROM hypothesis h
-            LEFT JOIN literature_agent la ON h.topic = la.topic_id AND h.sub_topic = la.sub_topic
-            WHERE h.{score_type} IS NOT NULL
-            ORDER BY h.{score_type} DESC
-            LIMIT ?
-        ''', (limit,))
+            ''', [row_id for row_id, _ in ranked],
+            ' LEFT JOIN literature_agent la ON h.topic = la.topic_id AND h.sub_topic = la.subtopic_index')
         
         top_hypotheses = []
-        for row in cursor.fetchall():
+        for row_id, score in ranked:
+            row = rows[row_id]
             top_hypotheses.append({
                 'id': row['id'],
                 'topic': row['topic'],
@@ -558,48 +1883,87 @@ def get_top_hypotheses():
                 'strategy': row['strategy'],
                 'hypothesis_id': row['hypothesis_id'],
                 'content_preview': row['hypothesis_content'][:200] + '...' if row['hypothesis_content'] else '',
-                'overall_score': row['overall_winner_score']
+                'overall_score': row['overall_winner_score'],
+                'score': score
             })
         
-        conn.close()
         return jsonify(top_hypotheses)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/hypothesis/<int:hypothesis_id>')
-def get_hypothesis(hypothesis_id):
-    """获取单个假设的详细信息"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT 
-                h.id,
-                h.topic,
-                h.sub_topic,
-                h.strategy,
-                h.hypothesis_id,
-                h.hypothesis_content,
-                h.feedback_results,
-                h.novelty_score,
-                h.significance_score,
-                h.soundness_score,
-                h.feasibility_score,
-                h.overall_winner_score,
-                h.created_at
-            FROM hypothesis h
-            WHERE h.id = ? OR h.hypothesis_id = ?
-        ''', (hypothesis_id, hypothesis_id))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row is None:
-            return jsonify({'error': '假设不存在'}), 404
-        
-        hypothesis = {
+# 假设详情：单个与批量接口共用；批量接口一次最多解析的编号数
+HYPOTHESIS_BATCH_MAX_IDS = 500
+HYPOTHESIS_DETAIL_QUERY = '''
+    SELECT
+        h.id,
+        h.topic,
+        h.sub_topic,
+        h.strategy,
+        h.hypothesis_id,
+        h.hypothesis_content,
+        h.feedback_results,
+        h.novelty_score,
+        h.significance_score,
+        h.soundness_score,
+        h.feasibility_score,
+        h.overall_winner_score,
+        h.created_at,
+        h.title,
+        h.problem_statement,
+        h.novelty_verdict,
+        h.cooccurrence_count,
+        h.min_pmi_score,
+        h.avg_pmi_score
+    FROM hypothesis h
+'''
+
+def find_hypothesis_rows(cursor, ids, by='auto'):
+    """
+    按编号查找假设行，返回 {编号: 行}：主键与 hypothesis_id 分别用各自索引上的 IN 查询，
+    by='auto' 时优先按主键查找，找不到的再按 hypothesis_id 查找（同一 hypothesis_id 取主键最小的一行）
+    """
+    found = {}
+    if by in ('auto', 'id') and ids:
+        placeholders = ', '.join('?' for _ in ids)
+        cursor.execute(f'{HYPOTHESIS_DETAIL_QUERY} WHERE h.id IN ({placeholders})', ids)
+        found.update((row['id'], row) for row in cursor.fetchall())
+    remaining = [hypothesis_id for hypothesis_id in ids if hypothesis_id not in found]
+    if by in ('auto', 'hypothesis_id') and remaining:
+        placeholders = ', '.join('?' for _ in remaining)
+        cursor.execute(f'{HYPOTHESIS_DETAIL_QUERY} WHERE h.hypothesis_id IN ({placeholders})', remaining)
+        for row in cursor.fetchall():
+            current = found.get(row['hypothesis_id'])
+            if current is None or row['id'] < current['id']:
+                found[row['hypothesis_id']] = row
+    return found
+
+def hypothesis_details(cursor, rows):
+    """假设行 -> 详情（附带导入时从 feedback_results 拆分的结构化评审结果），评审与关键词各一次 IN 查询"""
+    row_ids = sorted({row['id'] for row in rows})
+    critiques, keywords = {}, {}
+    if row_ids:
+        placeholders = ', '.join('?' for _ in row_ids)
+        cursor.execute(f'''
+            SELECT hypothesis_row_id, feedback_code, dimension, target_section, content
+            FROM hypothesis_critique
+            WHERE hypothesis_row_id IN ({placeholders})
+            ORDER BY hypothesis_row_id, position
+        ''', row_ids)
+        for critique in cursor.fetchall():
+            item = dict(critique)
+            critiques.setdefault(item.pop('hypothesis_row_id'), []).append(item)
+        cursor.execute(f'''
+            SELECT hypothesis_row_id, kind, value
+            FROM hypothesis_keyword
+            WHERE hypothesis_row_id IN ({placeholders})
+        ''', row_ids)
+        for keyword in cursor.fetchall():
+            keywords.setdefault(keyword['hypothesis_row_id'], {}).setdefault(keyword['kind'], []).append(keyword['value'])
+    
+    details = []
+    for row in rows:
+        details.append({
             'id': row['id'],
             'topic': row['topic'],
             'sub_topic': row['sub_topic'],
@@ -612,44 +1976,318 @@ def get_hypothesis(hypothesis_id):
             'soundness_score': row['soundness_score'],
             'feasibility_score': row['feasibility_score'],
             'overall_winner_score': row['overall_winner_score'],
-            'created_at': row['created_at']
+            'created_at': row['created_at'],
+            'title': row['title'],
+            'problem_statement': row['problem_statement'],
+            'review': {
+                'novelty_verdict': row['novelty_verdict'],
+                'cooccurrence_count': row['cooccurrence_count'],
+                'min_pmi_score': row['min_pmi_score'],
+                'avg_pmi_score': row['avg_pmi_score'],
+                'critiques': critiques.get(row['id'], []),
+                'keywords': keywords.get(row['id'], {})
+            }
+        })
+    return details
+
+@app.route('/api/hypothesis/<int:hypothesis_id>')
+def get_hypothesis(hypothesis_id):
+    """获取单个假设的详细信息（优先按主键查找，找不到时再按 hypothesis_id 查找）"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        row = find_hypothesis_rows(cursor, [hypothesis_id]).get(hypothesis_id)
+        if row is None:
+            return jsonify({'error': '假设不存在'}), 404
+        
+        return jsonify(hypothesis_details(cursor, [row])[0])
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hypotheses/batch', methods=['GET', 'POST'])
+def get_hypotheses_batch():
+    """
+    批量获取假设详情，代替逐个请求 /api/hypothesis/<id>：
+    GET ids=1,2,3（可重复）或 POST {"ids": [...]}（编号较多、URL 过长时），
+    by=auto|id|hypothesis_id 指定编号含义（auto 与单个接口一致）。
+    hypotheses 与去重后的 ids 按请求顺序一一对应，找不到的为 null 并列入 missing
+    """
+    try:
+        if request.method == 'POST':
+            payload = request.get_json(silent=True) or {}
+            raw_ids = payload.get('ids') or []
+            by = payload.get('by', 'auto')
+        else:
+            raw_ids = [value for values in request.args.getlist('ids') for value in values.split(',') if value.strip()]
+            by = request.args.get('by', 'auto')
+        if by not in ('auto', 'id', 'hypothesis_id'):
+            return jsonify({'error': f'不支持的编号类型: {by}'}), 400
+        if not isinstance(raw_ids, list):
+            return jsonify({'error': 'ids 必须是编号列表'}), 400
+        try:
+            ids = list(dict.fromkeys(int(value) for value in raw_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'ids 只能包含整数编号'}), 400
+        if not ids:
+            return jsonify({'error': '缺少 ids 参数'}), 400
+        if len(ids) > HYPOTHESIS_BATCH_MAX_IDS:
+            return jsonify({'error': f'一次最多请求 {HYPOTHESIS_BATCH_MAX_IDS} 个假设'}), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        found = find_hypothesis_rows(cursor, ids, by)
+        rows = [found[hypothesis_id] for hypothesis_id in ids if hypothesis_id in found]
+        details = iter(hypothesis_details(cursor, rows))
+        
+        return jsonify({
+            'ids': ids,
+            'hypotheses': [next(details) if hypothesis_id in found else None for hypothesis_id in ids],
+            'missing': [hypothesis_id for hypothesis_id in ids if hypothesis_id not in found]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def get_similarity_index():
+    """内存映射加载导入时构建的相似度索引（重新构建后自动重新加载）；未构建时返回 None"""
+    return similarity.load_index(similarity.index_directory(current_snapshot()))
+
+@app.route('/api/hypothesis/<int:hypothesis_id>/similar')
+def get_similar_hypotheses(hypothesis_id):
+    """与指定假设（按主键）标题和问题陈述最相似的假设，limit 最多为索引保存的邻居数"""
+    try:
+        index = get_similarity_index()
+        if index is None:
+            return jsonify({'error': '相似度索引尚未构建，请先运行 python3 ingest_data.py'}), 503
+        limit = max(request.args.get('limit', 10, type=int), 0)
+        min_score = request.args.get('min_score', 0.0, type=float)
+        
+        neighbors = index.similar(hypothesis_id, limit, min_score)
+        if neighbors is None:
+            return jsonify({'error': '假设不存在'}), 404
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        rows = fetch_hypotheses_by_id(cursor, SIMILAR_HYPOTHESIS_COLUMNS, [row_id for row_id, _ in neighbors])
+        similar = []
+        for row_id, score in neighbors:
+            if row_id in rows:
+                item = dict(rows[row_id])
+                item['similarity'] = round(score, 4)
+                similar.append(item)
+        
+        return jsonify({
+            'id': hypothesis_id,
+            'duplicate_cluster': index.cluster_of(hypothesis_id),
+            'similar': similar
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hypotheses/duplicates')
+def get_duplicate_clusters():
+    """
+    近似重复的假设簇（按簇大小降序分页）
+    threshold 为余弦相似度阈值，默认使用构建索引时的阈值；min_size 为簇的最少成员数
+    """
+    try:
+        index = get_similarity_index()
+        if index is None:
+            return jsonify({'error': '相似度索引尚未构建，请先运行 python3 ingest_data.py'}), 503
+        threshold = request.args.get('threshold', index.threshold, type=float)
+        if not 0 < threshold <= 1:
+            return jsonify({'error': 'threshold 必须在 (0, 1] 之间'}), 400
+        min_size = max(request.args.get('min_size', 2, type=int), 2)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), DUPLICATE_MAX_CLUSTERS)
+        
+        clusters = [members for members in index.duplicate_clusters(threshold) if len(members) >= min_size]
+        page_clusters = clusters[(page - 1) * per_page:page * per_page]
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        rows = fetch_hypotheses_by_id(
+            cursor, SIMILAR_HYPOTHESIS_COLUMNS, [row_id for members in page_clusters for row_id in members])
+        
+        return jsonify({
+            'threshold': threshold,
+            'total': len(clusters),
+            'page': page,
+            'per_page': per_page,
+            'clusters': [
+                {
+                    'size': len(members),
+                    'hypotheses': [dict(rows[row_id]) for row_id in members if row_id in rows]
+                }
+                for members in page_clusters
+            ]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def tournament_entry(row):
+    """瑞士轮中一个参赛版本：各维度 Elo、综合名次与评审指标"""
+    return {
+        'scores': {name: row[column] for name, column in HYPOTHESIS_SCORE_COLUMNS.items()},
+        'overall_rank': row['overall_rank'],
+        'review': {
+            'novelty_verdict': row['novelty_verdict'],
+            'cooccurrence_count': row['cooccurrence_count'],
+            'min_pmi_score': row['min_pmi_score'],
+            'avg_pmi_score': row['avg_pmi_score']
         }
+    }
+
+def elo_expected_score(rating, opponent):
+    """Elo 期望得分（胜率）：1 / (1 + 10^((对手 - 自身) / 400))"""
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+@app.route('/api/hypothesis/<int:hypothesis_id>/tournament')
+def get_hypothesis_tournament(hypothesis_id):
+    """
+    假设（按主键）在所属主题瑞士轮中的评分轨迹：改进前 -> 改进后两个版本的各维度 Elo、名次与评审指标，
+    以及改进带来的变化；entrants 为该主题瑞士轮的参赛版本数
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT h.id, h.topic, h.sub_topic, h.strategy, h.hypothesis_id, h.title
+            FROM hypothesis h
+            WHERE h.id = ?
+        ''', (hypothesis_id,))
+        hypothesis = cursor.fetchone()
+        if hypothesis is None:
+            return jsonify({'error': '假设不存在'}), 404
+        
+        cursor.execute(f'''
+            SELECT t.stage, {TOURNAMENT_COLUMNS}
+            FROM tournament_result t
+            WHERE t.topic = ? AND t.sub_topic = ? AND t.strategy = ? AND t.hypothesis_id = ?
+        ''', (hypothesis['topic'], hypothesis['sub_topic'], hypothesis['strategy'], hypothesis['hypothesis_id']))
+        entries = {row['stage']: row for row in cursor.fetchall()}
+        cursor.execute('SELECT COUNT(*) FROM tournament_result WHERE topic = ?', (hypothesis['topic'],))
+        entrants = cursor.fetchone()[0]
+        
+        stages = [dict(tournament_entry(entries[stage]), stage=stage)
+                  for stage in TOURNAMENT_STAGES if stage in entries]
+        change = None
+        if len(stages) == len(TOURNAMENT_STAGES):
+            before, after = stages[0]['scores'], stages[-1]['scores']
+            change = {
+                name: after[name] - before[name] if after[name] is not None and before[name] is not None else None
+                for name in HYPOTHESIS_SCORE_COLUMNS
+            }
+        
+        return jsonify(dict(hypothesis) | {
+            'entrants': entrants,
+            'stages': stages,
+            'change': change
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tournament/expected_outcome')
+def get_expected_outcome():
+    """
+    两个假设（a、b 为主键）对阵的预期结果：由最终 Elo 推算的差值与 a 的期望得分，不是实际对阵记录
+    （瑞士轮工作簿只保存最终 Elo，没有逐轮对阵与胜负）。
+    stage 选择比较的参赛版本（默认 after）；不同主题的 Elo 来自不同的瑞士轮，same_tournament 为 false 时仅供参考
+    """
+    try:
+        a = request.args.get('a', type=int)
+        b = request.args.get('b', type=int)
+        if a is None or b is None:
+            return jsonify({'error': '需要提供整数参数 a 与 b'}), 400
+        stage = request.args.get('stage', TOURNAMENT_STAGES[-1])
+        if stage not in TOURNAMENT_STAGES:
+            return jsonify({'error': f"不支持的 stage: {stage}（可选 {', '.join(TOURNAMENT_STAGES)}）"}), 400
         
-        return jsonify(hypothesis)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT h.id, h.topic, h.sub_topic, h.strategy, h.hypothesis_id, h.title, {TOURNAMENT_COLUMNS}
+            FROM hypothesis h
+            LEFT JOIN tournament_result t
+                ON t.topic = h.topic AND t.sub_topic = h.sub_topic AND t.strategy = h.strategy
+               AND t.hypothesis_id = h.hypothesis_id AND t.stage = ?
+            WHERE h.id IN (?, ?)
+        ''', (stage, a, b))
+        rows = {row['id']: row for row in cursor.fetchall()}
+        missing = [row_id for row_id in (a, b) if row_id not in rows]
+        if missing:
+            return jsonify({'error': f"假设不存在: {', '.join(map(str, missing))}"}), 404
+        
+        comparison = {}
+        for name, column in HYPOTHESIS_SCORE_COLUMNS.items():
+            rating_a, rating_b = rows[a][column], rows[b][column]
+            if rating_a is None or rating_b is None:
+                comparison[name] = None
+                continue
+            comparison[name] = {
+                'elo_difference': rating_a - rating_b,
+                'expected_score_a': round(elo_expected_score(rating_a, rating_b), 4),
+                'expected_winner': 'a' if rating_a > rating_b else 'b' if rating_b > rating_a else None
+            }
+        
+        def side(row):
+            keys = ('id', 'topic', 'sub_topic', 'strategy', 'hypothesis_id', 'title')
+            return {key: row[key] for key in keys} | tournament_entry(row)
+        
+        return jsonify({
+            'stage': stage,
+            'same_tournament': rows[a]['topic'] == rows[b]['topic'],
+            'a': side(rows[a]),
+            'b': side(rows[b]),
+            'expected': comparison
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analyzer_analysis/<int:topic_id>/<int:subtopic_index>')
 def get_analyzer_analysis(topic_id, subtopic_index):
-    """获取analyzer_agent表中的current_analysis数据"""
+    """
+    获取analyzer_agent表中的current_analysis数据
+    按 (主题, 子主题序号) 直接定位；可选 category 参数指定策略类别，默认取第一个类别
+    """
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        category = request.args.get('category')
         
-        # 首先获取该topic下的所有analyzer_agent记录
-        cursor.execute('''
-            SELECT current_analysis 
+        query = '''
+            SELECT literature_category, current_analysis
             FROM analyzer_agent 
-            WHERE topic = ?
-            ORDER BY id
-        ''', (topic_id,))
+            WHERE topic = ? AND subtopic_index = ?
+        '''
+        params = [topic_id, subtopic_index]
+        if category:
+            query += ' AND literature_category = ?'
+            params.append(category)
+        cursor.execute(query + ' ORDER BY literature_category LIMIT 1', params)
         
-        results = cursor.fetchall()
-        conn.close()
+        result = cursor.fetchone()
         
-        # 根据subtopic_index选择对应的记录
-        if results and subtopic_index < len(results):
-            result = results[subtopic_index]
+        if result:
             return jsonify({
                 'topic': topic_id,
                 'subtopic_index': subtopic_index,
-                'current_analysis': result[0]
+                'literature_category': result['literature_category'],
+                'current_analysis': result['current_analysis']
             })
         else:
             return jsonify({
                 'topic': topic_id,
                 'subtopic_index': subtopic_index,
+                'literature_category': category,
                 'current_analysis': None
             })
             
@@ -663,20 +2301,16 @@ def get_literature_agent(topic_id, subtopic_index):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # 首先获取该topic下的所有literature_agent记录
+        # 按 (主题, 子主题序号) 直接定位单行
         cursor.execute('''
             SELECT topic_title, topic_category, sub_topic, description, search_queries, model_source
             FROM literature_agent 
-            WHERE topic_id = ?
-            ORDER BY id
-        ''', (topic_id,))
+            WHERE topic_id = ? AND subtopic_index = ?
+        ''', (topic_id, subtopic_index))
         
-        results = cursor.fetchall()
-        conn.close()
+        result = cursor.fetchone()
         
-        # 根据subtopic_index选择对应的记录
-        if results and subtopic_index < len(results):
-            result = results[subtopic_index]
+        if result:
             return jsonify({
                 'topic_id': topic_id,
                 'subtopic_index': subtopic_index,
@@ -698,7 +2332,381 @@ def get_literature_agent(topic_id, subtopic_index):
                 'search_queries': None,
                 'model_source': None
             })
-            
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def get_concept_network(cursor, topic_id, subtopic_index):
+    """按 (主题, 子主题序号, strategy 参数) 定位概念网络；strategy 无效时抛出 ValueError"""
+    strategy = request.args.get('strategy', 'evolve')
+    if strategy not in ingest_data.STRATEGIES:
+        raise ValueError(f'不支持的策略: {strategy}')
+    cursor.execute('''
+        SELECT * FROM concept_network
+        WHERE topic = ? AND sub_topic = ? AND strategy = ?
+    ''', (topic_id, subtopic_index, strategy))
+    return cursor.fetchone()
+
+def find_concept_node(cursor, network_id, concept):
+    cursor.execute('''
+        SELECT id, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality
+        FROM concept_node
+        WHERE network_id = ? AND concept = ?
+    ''', (network_id, concept))
+    return cursor.fetchone()
+
+def concept_node_item(row):
+    return {
+        'concept': row['concept'],
+        'frequency': row['frequency'],
+        'avg_relevance': row['avg_relevance'],
+        'degree': row['degree'],
+        'degree_centrality': row['degree_centrality'],
+        'betweenness_centrality': row['betweenness_centrality']
+    }
+
+@app.route('/api/network/<int:topic_id>/<int:subtopic_index>')
+def get_network_summary(topic_id, subtopic_index):
+    """概念共现网络的统计信息与概念簇（不返回完整的节点和边）"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            network = get_concept_network(cursor, topic_id, subtopic_index)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if network is None:
+            return jsonify({'error': '概念网络不存在'}), 404
+
+        return jsonify({
+            'topic': topic_id,
+            'subtopic_index': subtopic_index,
+            'strategy': network['strategy'],
+            'stats': {
+                'total_nodes': network['total_nodes'],
+                'total_edges': network['total_edges'],
+                'density': network['density'],
+                'avg_clustering': network['avg_clustering'],
+                'avg_degree': network['avg_degree']
+            },
+            'concept_clusters': json.loads(network['concept_clusters'] or '[]')
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/network/<int:topic_id>/<int:subtopic_index>/central')
+def get_network_central(topic_id, subtopic_index):
+    """中心性最高的 k 个概念；metric 可选 degree / betweenness / frequency（导入时已预先计算）"""
+    try:
+        metric = request.args.get('metric', 'degree')
+        if metric not in NETWORK_CENTRALITY_COLUMNS:
+            return jsonify({'error': f'不支持的中心性指标: {metric}'}), 400
+        k = max(1, min(request.args.get('k', 10, type=int), NETWORK_MAX_NODES))
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            network = get_concept_network(cursor, topic_id, subtopic_index)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if network is None:
+            return jsonify({'error': '概念网络不存在'}), 404
+
+        column = NETWORK_CENTRALITY_COLUMNS[metric]
+        cursor.execute(f'''
+            SELECT id, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality
+            FROM concept_node
+            WHERE network_id = ?
+            ORDER BY {column} DESC, id DESC
+            LIMIT ?
+        ''', (network['id'], k))
+
+        return jsonify({
+            'strategy': network['strategy'],
+            'metric': metric,
+            'concepts': [concept_node_item(row) for row in cursor.fetchall()]
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/network/<int:topic_id>/<int:subtopic_index>/neighbors')
+def get_network_neighbors(topic_id, subtopic_index):
+    """
+    以某个概念为中心的 k 跳子图：逐跳沿邻接表（concept_edge 按起点聚簇）扩展
+    返回子图内的节点（附跳数）与节点之间的边
+    """
+    try:
+        concept = request.args.get('concept', '').strip()
+        if not concept:
+            return jsonify({'error': '缺少 concept 参数'}), 400
+        hops = max(1, min(request.args.get('hops', 1, type=int), NETWORK_MAX_HOPS))
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            network = get_concept_network(cursor, topic_id, subtopic_index)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if network is None:
+            return jsonify({'error': '概念网络不存在'}), 404
+        center = find_concept_node(cursor, network['id'], concept)
+        if center is None:
+            return jsonify({'error': '概念不存在'}), 404
+
+        distance = {center['id']: 0}
+        frontier = [center['id']]
+        truncated = False
+        for hop in range(1, hops + 1):
+            if not frontier:
+                break
+            placeholders = ','.join('?' for _ in frontier)
+            cursor.execute(f'SELECT target_id FROM concept_edge WHERE source_id IN ({placeholders})', frontier)
+            frontier = []
+            for (target_id,) in cursor.fetchall():
+                if target_id in distance:
+                    continue
+                if len(distance) >= NETWORK_MAX_NODES:
+                    truncated = True
+                    break
+                distance[target_id] = hop
+                frontier.append(target_id)
+
+        ids = list(distance)
+        placeholders = ','.join('?' for _ in ids)
+        cursor.execute(f'''
+            SELECT id, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality
+            FROM concept_node
+            WHERE id IN ({placeholders})
+        ''', ids)
+        nodes = {row['id']: row for row in cursor.fetchall()}
+
+        cursor.execute(f'''
+            SELECT source_id, target_id, weight, cooccurrence_count
+            FROM concept_edge
+            WHERE source_id IN ({placeholders}) AND target_id IN ({placeholders}) AND source_id < target_id
+        ''', ids + ids)
+        edges = [{
+            'source': nodes[row['source_id']]['concept'],
+            'target': nodes[row['target_id']]['concept'],
+            'weight': row['weight'],
+            'cooccurrence_count': row['cooccurrence_count']
+        } for row in cursor.fetchall()]
+
+        return jsonify({
+            'strategy': network['strategy'],
+            'center': center['concept'],
+            'hops': hops,
+            'nodes': [
+                dict(concept_node_item(nodes[node_id]), distance=distance[node_id])
+                for node_id in sorted(ids, key=lambda node_id: (distance[node_id], nodes[node_id]['concept']))
+            ],
+            'edges': edges,
+            'truncated': truncated
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/network/<int:topic_id>/<int:subtopic_index>/concept')
+def get_network_concept(topic_id, subtopic_index):
+    """概念 → 论文 → 假设：概念出现的论文，以及同一子主题/策略下内容提及该概念的假设"""
+    try:
+        concept = request.args.get('concept', '').strip()
+        if not concept:
+            return jsonify({'error': '缺少 concept 参数'}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            network = get_concept_network(cursor, topic_id, subtopic_index)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if network is None:
+            return jsonify({'error': '概念网络不存在'}), 404
+        node = find_concept_node(cursor, network['id'], concept)
+        if node is None:
+            return jsonify({'error': '概念不存在'}), 404
+
+        # 论文：经文献集合序号关联到文献库，附带引用数
+        scope = (topic_id, subtopic_index, network['strategy'])
+        cursor.execute('''
+            SELECT cp.paper_key, cp.paper_id, cp.doi, cp.title, cp.year, p.citation_count
+            FROM concept_paper cp
+            LEFT JOIN paper_source s
+                ON s.topic = ? AND s.sub_topic = ? AND s.strategy = ? AND s.paper_key = cp.paper_key
+            LEFT JOIN paper p ON p.id = s.paper_ref
+            WHERE cp.node_id = ?
+        ''', (*scope, node['id']))
+        papers = [dict(row) for row in cursor.fetchall()]
+
+        # 假设：该网络所属的 (主题, 子主题, 策略) 中，内容包含该概念短语的假设，按相关度排序
+        fts_query = build_fts_query(concept, phrase=True)
+        hypotheses = []
+        if fts_query and has_fts_index(cursor):
+            cursor.execute(f'''
+                SELECT h.id, h.hypothesis_id, h.title,
+                       h.overall_winner_score, -f.fts_rank AS relevance
+                FROM hypothesis h
+                {fts_join_clause()}
+                WHERE h.topic = ? AND h.sub_topic = ? AND h.strategy = ?
+                ORDER BY f.fts_rank
+                LIMIT ?
+            ''', (fts_query, *scope, limit))
+            hypotheses = [dict(row) for row in cursor.fetchall()]
+
+        return jsonify({
+            'strategy': network['strategy'],
+            'concept': concept_node_item(node),
+            'papers': papers,
+            'hypotheses': hypotheses
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 文献库：导入时从 *_papers.json 去重写入 paper 表，接口不再读取原始文件
+PAPER_COLUMNS = 'p.id, p.doi, p.paper_id, p.title, p.year, p.citation_count, p.field_citation_ratio'
+
+def paper_item(row):
+    return {
+        'id': row['id'],
+        'doi': row['doi'],
+        'paper_id': row['paper_id'],
+        'title': row['title'],
+        'year': row['year'],
+        'citation_count': row['citation_count'],
+        'field_citation_ratio': row['field_citation_ratio']
+    }
+
+@app.route('/api/papers')
+def get_papers():
+    """全部文献按引用数降序；可选 year（单一年份）与 min_citations 筛选，limit / offset 分页"""
+    try:
+        year = request.args.get('year', type=int)
+        min_citations = request.args.get('min_citations', 0, type=int)
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # 按年份筛选时走 (year, citation_count) 索引，否则走引用数索引，均无需排序
+        year_sql = 'p.year = ? AND ' if year is not None else ''
+        params = [year] if year is not None else []
+        cursor.execute(f'''
+            SELECT {PAPER_COLUMNS}
+            FROM paper p
+            WHERE {year_sql}p.citation_count >= ?
+            ORDER BY p.citation_count DESC
+            LIMIT ? OFFSET ?
+        ''', (*params, min_citations, limit, offset))
+        
+        return jsonify({
+            'year': year,
+            'min_citations': min_citations,
+            'offset': offset,
+            'papers': [paper_item(row) for row in cursor.fetchall()]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/papers/<int:topic_id>/<int:subtopic_index>')
+def get_subtopic_papers(topic_id, subtopic_index):
+    """
+    子主题文献集合中引用数最高的论文：同一论文出现在多个策略的集合中时只返回一次，并列出所在策略
+    可选 strategy 限定某一策略的集合
+    """
+    try:
+        strategy = request.args.get('strategy')
+        if strategy is not None and strategy not in ingest_data.STRATEGIES:
+            return jsonify({'error': f'不支持的策略: {strategy}'}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        strategy_sql = ' AND s.strategy = ?' if strategy else ''
+        cursor.execute(f'''
+            SELECT s.strategy, {PAPER_COLUMNS}
+            FROM paper_source s
+            JOIN paper p ON p.id = s.paper_ref
+            WHERE s.topic = ? AND s.sub_topic = ?{strategy_sql}
+        ''', (topic_id, subtopic_index, *([strategy] if strategy else [])))
+        
+        # 每个子主题的集合只有几十篇，去重与排序在内存中完成
+        papers = {}
+        for row in cursor.fetchall():
+            paper = papers.setdefault(row['id'], dict(paper_item(row), strategies=[]))
+            paper['strategies'].append(row['strategy'])
+        ranked = sorted(papers.values(), key=lambda paper: (-(paper['citation_count'] or 0), paper['id']))
+        
+        return jsonify({
+            'topic': topic_id,
+            'sub_topic': subtopic_index,
+            'total': len(ranked),
+            'papers': ranked[:limit]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hypothesis/<int:hypothesis_id>/papers')
+def get_hypothesis_papers(hypothesis_id):
+    """
+    假设（按主键）背后的文献：所属 (主题, 子主题, 策略) 的文献集合，按文件中的顺序返回，
+    附带摘要以及概念网络中引用该论文的概念
+    """
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT h.id, h.topic, h.sub_topic, h.strategy, h.title
+            FROM hypothesis h
+            WHERE h.id = ?
+        ''', (hypothesis_id,))
+        hypothesis = cursor.fetchone()
+        if hypothesis is None:
+            return jsonify({'error': '假设不存在'}), 404
+        scope = (hypothesis['topic'], hypothesis['sub_topic'], hypothesis['strategy'])
+        
+        cursor.execute(f'''
+            SELECT s.paper_key, {PAPER_COLUMNS}, p.abstract
+            FROM paper_source s
+            JOIN paper p ON p.id = s.paper_ref
+            WHERE s.topic = ? AND s.sub_topic = ? AND s.strategy = ?
+            ORDER BY s.paper_key
+        ''', scope)
+        papers = cursor.fetchall()
+        
+        # 概念网络节点的 paper_ids 与文献集合使用同一套序号
+        concepts = {}
+        cursor.execute('''
+            SELECT cp.paper_key, n.concept
+            FROM concept_network w
+            JOIN concept_node n ON n.network_id = w.id
+            JOIN concept_paper cp ON cp.node_id = n.id
+            WHERE w.topic = ? AND w.sub_topic = ? AND w.strategy = ?
+        ''', scope)
+        for row in cursor.fetchall():
+            concepts.setdefault(row['paper_key'], []).append(row['concept'])
+        
+        return jsonify(dict(hypothesis) | {
+            'papers': [
+                dict(paper_item(row), paper_key=row['paper_key'], abstract=row['abstract'],
+                     concepts=sorted(concepts.get(row['paper_key'], [])))
+                for row in papers
+            ]
+        })
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
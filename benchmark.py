@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 基准测试与压测工具
+generate: 以现有数据库为模板生成指定规模的合成数据库（正文、评审JSON等保持真实大小，评分加入扰动）
+run:      通过 Flask 测试客户端（进程内）或本地 gunicorn（HTTP）并发请求全部 /api/* 接口，
+          统计各接口 p50/p95/p99 延迟与吞吐量，结果保存为 JSON
+compare:  对比两次运行结果
+"""
+
+import argparse
+import contextlib
+import functools
+import http.client
+import importlib.util
+import io
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+import ingest_data
+import similarity
+
+RESULTS_DIR = 'benchmark_results'
+PERCENTILES = (50, 95, 99)
+# 超过该规模时默认不构建相似度索引（构建耗时随规模近似平方增长），相似/重复接口将返回 503
+SIMILARITY_MAX_HYPOTHESES = 100000
+# 合成数据的评分扰动（Elo 分数的标准差）
+SCORE_JITTER = 40.0
+GENERATE_BATCH_SIZE = 5000
+# 未构建相似度索引时这些接口按设计返回 503，压测中不计为错误
+SIMILARITY_ROUTES = ('/api/hypothesis/<int:hypothesis_id>/similar', '/api/hypotheses/duplicates')
+
+HYPOTHESIS_COLUMNS = (
+    'topic', 'sub_topic', 'strategy', 'hypothesis_id', 'hypothesis_content', 'feedback_results',
+    'novelty_score', 'significance_score', 'soundness_score', 'feasibility_score',
+    'overall_winner_score', 'created_at',
+)
+SCORE_POSITIONS = tuple(range(6, 11))
+
+
+# ---------------------------------------------------------------------------
+# 合成数据库
+# ---------------------------------------------------------------------------
+
+def _copy_topic(conn, template_topic, topic, copy):
+    """复制模板主题的文献、分析、瑞士轮结果、文献集合与概念网络数据，主题编号改为 topic；副本标题加上序号"""
+    suffix = f' ({copy})' if copy else ''
+    conn.execute('''
+        INSERT INTO literature_agent
+            (topic_id, subtopic_index, topic_title, topic_category, sub_topic, description,
+             search_queries, model_source)
+        SELECT ?, subtopic_index, topic_title || ?, topic_category, sub_topic, description,
+               search_queries, model_source
+        FROM tpl.literature_agent WHERE topic_id = ? ORDER BY id
+    ''', (topic, suffix, template_topic))
+    conn.execute('''
+        INSERT INTO analyzer_agent (topic, sub_topic, subtopic_index, literature_category, current_analysis)
+        SELECT ?, sub_topic, subtopic_index, literature_category, current_analysis
+        FROM tpl.analyzer_agent WHERE topic = ? ORDER BY id
+    ''', (topic, template_topic))
+    conn.execute('''
+        INSERT INTO tournament_result
+        SELECT ?, sub_topic, strategy, hypothesis_id, stage,
+               novelty_score, significance_score, soundness_score, feasibility_score, overall_winner_score,
+               overall_rank, cooccurrence_count, min_pmi_score, avg_pmi_score, novelty_verdict
+        FROM tpl.tournament_result WHERE topic = ?
+    ''', (topic, template_topic))
+    # 论文在文献库中跨主题共用（已整体复制），副本主题只复制文献集合
+    conn.execute('''
+        INSERT INTO paper_source (topic, sub_topic, strategy, paper_key, paper_ref)
+        SELECT ?, sub_topic, strategy, paper_key, paper_ref
+        FROM tpl.paper_source WHERE topic = ?
+    ''', (topic, template_topic))
+
+    networks = conn.execute(
+        'SELECT id FROM tpl.concept_network WHERE topic = ? ORDER BY id', (template_topic,)
+    ).fetchall()
+    for (template_network,) in networks:
+        network = conn.execute('''
+            INSERT INTO concept_network
+                (topic, sub_topic, strategy, total_nodes, total_edges, density, avg_clustering, avg_degree,
+                 concept_clusters)
+            SELECT ?, sub_topic, strategy, total_nodes, total_edges, density, avg_clustering, avg_degree,
+                   concept_clusters
+            FROM tpl.concept_network WHERE id = ?
+        ''', (topic, template_network)).lastrowid
+        conn.execute('''
+            INSERT INTO concept_node
+                (network_id, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality)
+            SELECT ?, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality
+            FROM tpl.concept_node WHERE network_id = ? ORDER BY id
+        ''', (network, template_network))
+        # 节点按 (网络, 概念) 唯一，边与论文关联经概念名映射到新节点
+        conn.execute('''
+            INSERT INTO concept_edge (source_id, target_id, weight, cooccurrence_count)
+            SELECT ns.id, nt.id, e.weight, e.cooccurrence_count
+            FROM tpl.concept_edge e
+            JOIN tpl.concept_node s ON s.id = e.source_id
+            JOIN tpl.concept_node t ON t.id = e.target_id
+            JOIN concept_node ns ON ns.network_id = ? AND ns.concept = s.concept
+            JOIN concept_node nt ON nt.network_id = ? AND nt.concept = t.concept
+            WHERE s.network_id = ?
+        ''', (network, network, template_network))
+        conn.execute('''
+            INSERT INTO concept_paper (node_id, paper_key, paper_id, doi, title, year)
+            SELECT n.id, p.paper_key, p.paper_id, p.doi, p.title, p.year
+            FROM tpl.concept_paper p
+            JOIN tpl.concept_node s ON s.id = p.node_id
+            JOIN concept_node n ON n.network_id = ? AND n.concept = s.concept
+            WHERE s.network_id = ?
+        ''', (network, template_network))
+
+
+def _synthetic_rows(template_rows, copy, count, stride, rng):
+    """第 copy 份副本的前 count 行：主题编号平移 copy * stride，各项评分加入高斯扰动"""
+    for row in template_rows[:count]:
+        row = list(row)
+        row[0] += copy * stride
+        if copy:
+            for position in SCORE_POSITIONS:
+                if row[position] is not None:
+                    row[position] = round(row[position] + rng.gauss(0.0, SCORE_JITTER), 6)
+        yield row
+
+
+def generate_database(template, output, hypotheses, seed=0, build_similarity=None, log=print):
+    """
+    以模板数据库为样本生成含 hypotheses 个假设的合成数据库：模板按主题整体复制多份，
+    正文与评审JSON原样复用（保持真实的行大小与JSON结构），评分加入可复现的随机扰动
+    返回生成摘要
+    """
+    if not os.path.exists(template):
+        raise FileNotFoundError(f'模板数据库 {template} 不存在，请先运行 python3 ingest_data.py')
+    started = time.perf_counter()
+    try:
+        with migrated_template(template, output, log) as source:
+            copies, build_similarity = _generate(source, output, hypotheses, seed, build_similarity, log)
+    except BaseException:
+        # 失败时不留下不完整的输出数据库，避免随后被 run 当作合成库压测
+        try:
+            remove_database(output)
+        except OSError as e:
+            log(f'⚠️ 无法删除不完整的输出数据库 {output}: {e}')
+        raise
+
+    return {
+        'database': output,
+        'template': template,
+        'hypotheses': hypotheses,
+        'copies': copies,
+        'seed': seed,
+        'similarity_index': bool(build_similarity),
+        'size_bytes': os.path.getsize(output),
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+@contextlib.contextmanager
+def migrated_template(template, output, log=print):
+    """
+    返回可直接作为模板读取的数据库路径：版本落后于当前迁移时，在输出目录的临时副本上补齐迁移
+    （模板本身保持只读），用完后删除副本
+    """
+    latest = len(ingest_data.MIGRATIONS)
+    source = sqlite3.connect(f'file:{os.path.abspath(template)}?mode=ro', uri=True)
+    try:
+        version = source.execute('PRAGMA user_version').fetchone()[0]
+        if version > latest:
+            raise ValueError(f'模板数据库版本为 {version}，高于当前代码支持的版本 {latest}')
+        if version < latest:
+            copy = f'{output}.template'
+            log(f'🔧 模板数据库版本为 {version}，在临时副本上迁移到 {latest}')
+            target = sqlite3.connect(copy)
+            try:
+                source.backup(target)
+                ingest_data.create_schema(target)
+                ingest_data.migrate(target)
+            except BaseException:
+                target.close()
+                remove_database(copy)
+                raise
+            target.close()
+    finally:
+        source.close()
+
+    if version == latest:
+        yield template
+        return
+    try:
+        yield copy
+    finally:
+        remove_database(copy)
+
+
+def _generate(template, output, hypotheses, seed, build_similarity, log):
+    """生成合成数据库的主体（模板已是当前版本），返回 (模板复制的份数, 是否构建了相似度索引)"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(output)
+    try:
+        # 生成期间不需要崩溃保护，完成后再切换为与导入脚本一致的 WAL 模式
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        ingest_data.create_schema(conn)
+        ingest_data.migrate(conn)
+        conn.execute('ATTACH DATABASE ? AS tpl', (template,))
+
+        template_rows = conn.execute(f'''
+            SELECT {', '.join(HYPOTHESIS_COLUMNS)} FROM tpl.hypothesis
+            ORDER BY topic, sub_topic, strategy, id
+        ''').fetchall()
+        if not template_rows:
+            raise ValueError(f'模板数据库 {template} 中没有假设数据')
+        stride = max(row[0] for row in template_rows)
+        with conn:
+            conn.execute('INSERT INTO paper SELECT * FROM tpl.paper')
+
+        insert = f'''
+            INSERT INTO hypothesis ({', '.join(HYPOTHESIS_COLUMNS)})
+            VALUES ({', '.join('?' for _ in HYPOTHESIS_COLUMNS)})
+        '''
+        copies = -(-hypotheses // len(template_rows))
+        for copy in range(copies):
+            count = min(len(template_rows), hypotheses - copy * len(template_rows))
+            with conn:
+                for template_topic in sorted({row[0] for row in template_rows[:count]}):
+                    _copy_topic(conn, template_topic, copy * stride + template_topic, copy)
+                rows = _synthetic_rows(template_rows, copy, count, stride, rng)
+                while True:
+                    batch = [row for _, row in zip(range(GENERATE_BATCH_SIZE), rows)]
+                    if not batch:
+                        break
+                    conn.executemany(insert, batch)
+            log(f'🧪 已生成 {min(hypotheses, (copy + 1) * len(template_rows))}/{hypotheses} 个假设')
+        conn.execute('DETACH DATABASE tpl')
+
+        ingest_data.rebuild_summaries(conn)
+        if build_similarity is None:
+            build_similarity = hypotheses <= SIMILARITY_MAX_HYPOTHESES
+        similarity_dir = similarity.index_directory(output)
+        if build_similarity:
+            meta = similarity.build_index(conn, similarity_dir)
+            log(f"🔎 相似度索引已构建：{meta['cluster_count']} 个近似重复簇")
+        else:
+            log(f'⚠️ 规模超过 {SIMILARITY_MAX_HYPOTHESES}，未构建相似度索引（--similarity 可强制构建）')
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('PRAGMA journal_mode = WAL')
+    finally:
+        conn.close()
+    return copies, build_similarity
+
+
+def remove_database(path):
+    """删除数据库文件、WAL/SHM 文件与相似度索引目录"""
+    for name in (path, f'{path}-wal', f'{path}-shm'):
+        if os.path.exists(name):
+            os.remove(name)
+    shutil.rmtree(similarity.index_directory(path), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# 压测
+# ---------------------------------------------------------------------------
+
+def sample_requests(database, route_filter=None):
+    """
+    各接口的示例请求，与查询计划检查共用 check_query_plans.SAMPLE_REQUESTS，
+    保证新增接口登记一次即同时纳入计划检查与基准测试
+    """
+    import app_enhanced
+    import check_query_plans
+
+    rules = sorted(
+        rule.rule for rule in app_enhanced.app.url_map.iter_rules()
+        if rule.rule.startswith('/api/') and 'GET' in rule.methods
+    )
+    missing = [rule for rule in rules if rule not in check_query_plans.SAMPLE_REQUESTS]
+    if missing:
+        raise ValueError(f"以下接口未在 check_query_plans.SAMPLE_REQUESTS 中登记示例请求: {', '.join(missing)}")
+    return check_query_plans.resolve_samples(database, {
+        rule: check_query_plans.SAMPLE_REQUESTS[rule] for rule in rules
+        if not route_filter or any(pattern in rule for pattern in route_filter)
+    })
+
+
+class ClientFetcher:
+    """进程内请求：Flask 测试客户端（不经过网络与WSGI服务器，衡量应用本身的耗时）"""
+
+    def __init__(self):
+        import app_enhanced
+        self.app = app_enhanced.app
+        self.local = threading.local()
+
+    def __call__(self, url):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.get(url)
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+    def close(self):
+        pass
+
+
+class HTTPFetcher:
+    """HTTP请求：每个压测线程一个保持连接的 HTTPConnection（服务端关闭连接后自动重连）"""
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            with self.lock:
+                self.connections.append(conn)
+        try:
+            conn.request('GET', self.prefix + url)
+            response = conn.getresponse()
+            size = len(response.read())
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+        return response.status, size
+
+    def close(self):
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections = []
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def gunicorn_server(database, workers, threads, cache, timeout=60):
+    """在本地端口启动 gunicorn（gthread worker），就绪后返回基础URL，结束时停止"""
+    if importlib.util.find_spec('gunicorn') is None:
+        raise RuntimeError('未安装 gunicorn：pip install gunicorn，或使用 --url 指向已运行的服务')
+    port = _free_port()
+    env = dict(os.environ, HYPOTHESIS_DATABASE=os.path.abspath(database))
+    if not cache:
+        env['RESPONSE_CACHE_MAX_ENTRIES'] = '0'
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app_enhanced:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--worker-class', 'gthread',
+        '--log-level', 'warning',
+    ]
+    process = subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn 启动失败（退出码 {process.returncode}）')
+            try:
+                with contextlib.closing(http.client.HTTPConnection('127.0.0.1', port, timeout=5)) as conn:
+                    conn.request('GET', '/api/topics')
+                    if conn.getresponse().status == 200:
+                        break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'gunicorn 在 {timeout} 秒内未就绪')
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    if not len(values):
+        return {f'p{p}_ms': None for p in PERCENTILES} | {'mean_ms': None, 'max_ms': None}
+    result = {f'p{p}_ms': round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    result['mean_ms'] = round(float(values.mean()), 3)
+    result['max_ms'] = round(float(values.max()), 3)
+    return result
+
+
+def run_load(fetch, samples, repeat, concurrency, seed=0, warmup=1, expected=None, log=print):
+    """
+    先按顺序预热（每个示例请求 warmup 次，不计入结果），再把 repeat 轮请求打乱后由 concurrency 个线程执行
+    expected 为 {接口: 预期状态码集合}，其中的 5xx 状态码不计为错误
+    返回 (各接口统计, 总体统计)
+    """
+    expected = expected or {}
+    jobs = [(rule, url) for rule, urls in samples.items() for url in urls]
+    for _ in range(warmup):
+        for _, url in jobs:
+            fetch(url)
+
+    schedule = jobs * repeat
+    random.Random(seed).shuffle(schedule)
+    results = {rule: {'latencies': [], 'statuses': {}, 'bytes': 0, 'errors': 0} for rule in samples}
+    lock = threading.Lock()
+
+    def execute(job):
+        rule, url = job
+        started = time.perf_counter()
+        try:
+            status, size = fetch(url)
+        except Exception as e:
+            status, size = type(e).__name__, 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            result = results[rule]
+            result['latencies'].append(elapsed)
+            result['statuses'][str(status)] = result['statuses'].get(str(status), 0) + 1
+            result['bytes'] += size
+            if not isinstance(status, int) or (status >= 500 and status not in expected.get(rule, ())):
+                result['errors'] += 1
+
+    log(f'🚀 {len(schedule)} 个请求（{len(jobs)} 个示例 × {repeat} 轮），并发 {concurrency}')
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(execute, schedule))
+    wall = time.perf_counter() - started
+
+    routes = {}
+    for rule, result in results.items():
+        routes[rule] = {
+            'requests': len(result['latencies']),
+            'errors': result['errors'],
+            'statuses': result['statuses'],
+            'bytes': result['bytes'],
+            **percentiles(result['latencies']),
+        }
+    all_latencies = [latency for result in results.values() for latency in result['latencies']]
+    overall = {
+        'requests': len(schedule),
+        'errors': sum(result['errors'] for result in results.values()),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(schedule) / wall, 2) if wall else None,
+        **percentiles(all_latencies),
+    }
+    return routes, overall
+
+
+def database_info(database):
+    conn = sqlite3.connect(f'file:{os.path.abspath(database)}?mode=ro', uri=True)
+    try:
+        return {
+            'path': database,
+            'size_bytes': os.path.getsize(database),
+            'hypotheses': conn.execute('SELECT COUNT(*) FROM hypothesis').fetchone()[0],
+            'topics': conn.execute('SELECT COUNT(DISTINCT topic_id) FROM literature_agent').fetchone()[0],
+            'schema_version': conn.execute('PRAGMA user_version').fetchone()[0],
+            'similarity_index': similarity.index_exists(similarity.index_directory(database)),
+        }
+    finally:
+        conn.close()
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return f'{revision}-dirty' if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result):
+    print(f"\n📊 {result['mode']}（并发 {result['concurrency']}）："
+          f"{result['overall']['requests']} 个请求，吞吐 {result['overall']['throughput_rps']} req/s，"
+          f"p50 {result['overall']['p50_ms']}ms / p95 {result['overall']['p95_ms']}ms / "
+          f"p99 {result['overall']['p99_ms']}ms，错误 {result['overall']['errors']}")
+    print(f"{'接口':<60}{'请求':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'错误':>6}")
+    for rule, stats in result['routes'].items():
+        print(f"{rule:<60}{stats['requests']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['errors']:>6}")
+
+
+def run_benchmark(args):
+    """按 args.mode 运行（client / server / both），返回各模式的结果列表"""
+    if not args.cache:
+        # 关闭响应缓存，衡量的是每次请求实际的查询与序列化开销（需在导入应用之前设置）
+        os.environ['RESPONSE_CACHE_MAX_ENTRIES'] = '0'
+    os.environ['HYPOTHESIS_DATABASE'] = os.path.abspath(args.database)
+    if not args.verbose:
+        # 进程内模式下慢查询日志会混入报告输出，默认只保留错误
+        logging.getLogger('hypothesis.slow_query').setLevel(logging.ERROR)
+    samples = sample_requests(args.database, args.route)
+
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'database': database_info(args.database),
+        'cache': args.cache,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'seed': args.seed,
+    }
+    # 未构建相似度索引时相似/重复接口返回 503 属于预期结果
+    expected = {} if meta['database']['similarity_index'] else {rule: {503} for rule in SIMILARITY_ROUTES}
+    modes = ('client', 'server') if args.mode == 'both' else (args.mode,)
+    log = functools.partial(print, file=sys.stdout)
+    results = []
+    for mode in modes:
+        result = dict(meta, mode=mode, concurrency=args.concurrency)
+        if mode == 'client':
+            fetcher = ClientFetcher()
+            # 应用在处理请求时的 print 输出不混入报告；redirect_stdout 作用于整个进程，
+            # 只能在所有压测线程之外统一重定向（逐请求重定向时各线程的还原顺序交错，stdout 会丢失）
+            server = contextlib.redirect_stdout(io.StringIO())
+        elif args.url:
+            fetcher = None
+            server = contextlib.nullcontext(args.url)
+            result['server'] = {'url': args.url}
+        else:
+            server = gunicorn_server(args.database, args.workers, args.threads, args.cache)
+            result['server'] = {'workers': args.workers, 'threads': args.threads, 'worker_class': 'gthread'}
+        with server as base_url:
+            if mode == 'server':
+                fetcher = HTTPFetcher(base_url)
+            try:
+                result['routes'], result['overall'] = run_load(
+                    fetcher, samples, args.repeat, args.concurrency, args.seed, args.warmup, expected, log)
+            finally:
+                fetcher.close()
+        results.append(result)
+    return results
+
+
+def save_result(result, output=None):
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{result['mode']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def compare_results(base, current, metric='p95_ms'):
+    """返回 [(接口, 基准值, 当前值, 变化比例)]，只包含两次运行都有的接口"""
+    rows = []
+    for rule, stats in current['routes'].items():
+        before = base['routes'].get(rule, {}).get(metric)
+        after = stats.get(metric)
+        if before is None or after is None:
+            continue
+        rows.append((rule, before, after, (after - before) / before if before else None))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# 命令行
+# ---------------------------------------------------------------------------
+
+def cmd_generate(args):
+    if os.path.exists(args.output):
+        if not args.force:
+            print(f'❌ {args.output} 已存在（--force 覆盖）')
+            return 1
+        remove_database(args.output)
+    build_similarity = True if args.similarity else None
+    summary = generate_database(args.template, args.output, args.hypotheses, args.seed, build_similarity)
+    print(f"✅ 合成数据库 {summary['database']}：{summary['hypotheses']} 个假设，"
+          f"{summary['size_bytes'] / 1024 / 1024:.1f} MB，用时 {summary['seconds']}s")
+    return 0
+
+
+def cmd_run(args):
+    if not os.path.exists(args.database):
+        print(f'❌ 数据库文件 {args.database} 不存在（可先运行 python3 benchmark.py generate）')
+        return 1
+    try:
+        results = run_benchmark(args)
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ {e}')
+        return 1
+    for result in results:
+        print_report(result)
+        output = args.output if args.output and len(results) == 1 else None
+        print(f'💾 结果已保存到 {save_result(result, output)}')
+    return 1 if any(result['overall']['errors'] for result in results) else 0
+
+
+def cmd_compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    if base.get('mode') != current.get('mode'):
+        print(f"⚠️ 两次运行的模式不同：{base.get('mode')} / {current.get('mode')}")
+    print(f"{'接口':<60}{'基准':>10}{'当前':>10}{'变化':>9}   ({args.metric})")
+    regressions = 0
+    for rule, before, after, change in compare_results(base, current, args.metric):
+        flag = ''
+        if change is not None and change > args.threshold:
+            flag = ' ❌'
+            regressions += 1
+        elif change is not None and change < -args.threshold:
+            flag = ' ✅'
+        text = f'{change:+.1%}' if change is not None else '-'
+        print(f'{rule:<60}{before:>10}{after:>10}{text:>9}{flag}')
+    for key in ('throughput_rps', args.metric):
+        print(f"总体 {key}: {base['overall'].get(key)} -> {current['overall'].get(key)}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API 基准测试与压测')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='生成合成数据库')
+    generate.add_argument('--template', default=ingest_data.DATABASE, help='模板数据库（真实数据）')
+    generate.add_argument('--output', default='benchmark_data.db', help='输出数据库路径')
+    generate.add_argument('--hypotheses', type=int, default=10000, help='假设数量（如 10000 ~ 1000000）')
+    generate.add_argument('--seed', type=int, default=0, help='随机种子（相同种子生成相同数据）')
+    generate.add_argument('--similarity', action='store_true',
+                          help=f'超过 {SIMILARITY_MAX_HYPOTHESES} 个假设时仍构建相似度索引')
+    generate.add_argument('--force', action='store_true', help='覆盖已存在的输出数据库')
+    generate.set_defaults(handler=cmd_generate)
+
+    run = commands.add_parser('run', help='运行基准测试')
+    run.add_argument('--database', default='benchmark_data.db', help='被测数据库')
+    run.add_argument('--mode', choices=('client', 'server', 'both'), default='client',
+                     help='client: Flask测试客户端；server: 本地 gunicorn；both: 依次运行两者')
+    run.add_argument('--url', help='server 模式下压测已运行的服务（如 http://127.0.0.1:8080），不启动 gunicorn')
+    run.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    run.add_argument('--repeat', type=int, default=5, help='每个示例请求的执行轮数')
+    run.add_argument('--warmup', type=int, default=1, help='预热轮数（不计入结果）')
+    run.add_argument('--workers', type=int, default=2, help='gunicorn worker 数')
+    run.add_argument('--threads', type=int, default=4, help='每个 gunicorn worker 的线程数')
+    run.add_argument('--cache', action='store_true', help='开启响应缓存（默认关闭，衡量未命中缓存的开销）')
+    run.add_argument('--route', action='append', help='只测试路由规则中包含该字符串的接口（可重复）')
+    run.add_argument('--seed', type=int, default=0, help='请求顺序的随机种子')
+    run.add_argument('-v', '--verbose', action='store_true', help='client 模式下输出慢查询日志')
+    run.add_argument('--output', help='结果JSON路径（默认 benchmark_results/<时间>-<模式>.json）')
+    run.set_defaults(handler=cmd_run)
+
+    compare = commands.add_parser('compare', help='对比两次运行结果')
+    compare.add_argument('base', help='基准结果JSON')
+    compare.add_argument('current', help='当前结果JSON')
+    compare.add_argument('--metric', default='p95_ms', choices=[f'p{p}_ms' for p in PERCENTILES] + ['mean_ms'])
+    compare.add_argument('--threshold', type=float, default=0.1, help='变化超过该比例时标记（默认 10%%）')
+    compare.add_argument('--fail-on-regression', action='store_true', help='存在变慢的接口时返回非0')
+    compare.set_defaults(handler=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
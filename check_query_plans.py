@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询计划回归检查
+通过 Flask 测试客户端请求所有 /api/* 接口，记录实际执行的每条SQL，
+再用 EXPLAIN QUERY PLAN 检查：出现全表扫描或临时B树排序即视为失败
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sqlite3
+import sys
+
+import app_enhanced
+from ingest_data import PRIMARY_MODEL
+
+SORT_COLUMNS = (
+    'overall_winner_score',
+    'novelty_score',
+    'significance_score',
+    'soundness_score',
+    'feasibility_score',
+    'created_at',
+)
+ALL_STRATEGIES = 'strategy=evolve&strategy=high_impact&strategy=similar'
+
+
+def _hypotheses_samples():
+    """/api/hypotheses 的各种筛选 × 排序组合（对应 app_enhanced.js 与 sorting.js 的请求）"""
+    filters = [
+        '',
+        ALL_STRATEGIES,
+        'topic=1',
+        'topic=1&subtopic=0',
+        f'topic=1&subtopic=0&category=0&{ALL_STRATEGIES}',
+        'topic=1&strategy=evolve',
+        'min_score=1000&max_score=1300',
+        'topic=2&min_score=1000',
+    ]
+    samples = []
+    for query in filters:
+        for column in SORT_COLUMNS:
+            for order in ('desc', 'asc'):
+                samples.append(f'/api/hypotheses?{query}&sort_by={column}&sort_order={order}&per_page=20')
+    cursor = app_enhanced.encode_cursor('overall_winner_score', 'desc', 1200.0, 500)
+    samples += [
+        '/api/hypotheses?page=5&per_page=20',
+        '/api/hypotheses?per_page=0',
+        '/api/hypotheses?page=-3&per_page=-5',
+        f'/api/hypotheses?cursor={cursor}&per_page=20',
+        f'/api/hypotheses?topic=1&{ALL_STRATEGIES}&cursor={cursor}',
+        '/api/hypotheses?search=knowledge%20graph',
+        '/api/hypotheses?search=bias&topic=1&sort_by=novelty_score',
+        '/api/hypotheses?preview=true&per_page=100',
+        '/api/hypotheses?topic=1&fields=id,title,scores&sort_by=feasibility_score',
+        '/api/hypotheses?model={primary_model}&topic=1&sort_by=novelty_score',
+        '/api/hypotheses?novelty_verdict=NOV-HYBRID',
+        '/api/hypotheses?critique=SOU-MECHANISM&critique=SOU-ASSUMPTION&topic=1',
+        '/api/hypotheses?dimension=feasibility&sort_by=novelty_score&sort_order=asc',
+        '/api/hypotheses?keyword=emotion&concept=social%20media',
+        '/api/hypotheses?sort_by=avg_pmi_score&fields=id,title,novelty_verdict,critique_count,avg_pmi_score',
+        '/api/hypotheses?weights=novelty:1,soundness:1&normalize=topic&preview=true',
+        f'/api/hypotheses?weights=overall_winner:2,feasibility:1&topic=1&{ALL_STRATEGIES}&page=2',
+        '/api/hypotheses?weights=significance&search=graph&sort_order=asc',
+        '/api/hypotheses?facets=all',
+        f'/api/hypotheses?facets=strategy&preview=true&{ALL_STRATEGIES}',
+        '/api/hypotheses?facets=topic,subtopic,score&topic=1&subtopic=0&min_score=1000&search=graph',
+        '/api/hypotheses?facets=all&critique=SOU-MECHANISM&novelty_verdict=NOV-COMPETITIVE&strategy=similar',
+    ]
+    return samples
+
+
+# 每个接口的示例请求；新增接口必须在此登记，否则检查失败
+SAMPLE_REQUESTS = {
+    '/api/statistics': [
+        '/api/statistics',
+        '/api/statistics?breakdown=true',
+        '/api/statistics?topic=1&breakdown=true',
+        '/api/statistics?topic=1&subtopic=0',
+        '/api/statistics?model={primary_model}',
+    ],
+    '/api/models': ['/api/models'],
+    '/api/analytics/model_comparison': [
+        '/api/analytics/model_comparison',
+        '/api/analytics/model_comparison?topic=1&subtopic=0&models={primary_model}',
+    ],
+    '/api/topics': ['/api/topics'],
+    '/api/subtopics/<int:topic_id>': ['/api/subtopics/1'],
+    '/api/categories/<int:topic_id>/<int:subtopic_index>': ['/api/categories/1/0', '/api/categories/1/3'],
+    '/api/tree': [
+        '/api/tree',
+        '/api/tree?topic=1',
+        '/api/tree?fields=index,title,description,search_queries,model_source',
+    ],
+    '/api/hypotheses': _hypotheses_samples(),
+    '/api/export/hypotheses': [
+        '/api/export/hypotheses',
+        f'/api/export/hypotheses?format=ndjson&topic=1&subtopic=0&{ALL_STRATEGIES}',
+        '/api/export/hypotheses?search=graph&fields=id,title,scores',
+        '/api/export/hypotheses?critique=FEA-EXPERIMENT&fields=id,title,novelty_verdict,avg_pmi_score',
+    ],
+    '/api/advanced_search': [
+        '/api/advanced_search?q=graph&type=all',
+        '/api/advanced_search?q=graph&type=content',
+        '/api/advanced_search?q=bias&type=feedback',
+        '/api/advanced_search?q=1200&type=scores',
+    ],
+    '/api/analytics/score_distribution': [
+        '/api/analytics/score_distribution',
+        '/api/analytics/score_distribution?topic=1&subtopic=0',
+    ],
+    '/api/analytics/top_hypotheses': [
+        f'/api/analytics/top_hypotheses?score_type={column}' for column in SORT_COLUMNS if column != 'created_at'
+    ] + [
+        '/api/analytics/top_hypotheses?weights=novelty:0.4,feasibility:0.6&normalize=strategy&limit=10',
+    ],
+    '/api/hypothesis/<int:hypothesis_id>': ['/api/hypothesis/{first_id}'],
+    '/api/hypothesis/<int:hypothesis_id>/similar': [
+        '/api/hypothesis/{first_id}/similar',
+        '/api/hypothesis/{last_id}/similar?limit=5&min_score=0.1',
+    ],
+    '/api/hypotheses/batch': [
+        '/api/hypotheses/batch?ids={first_id},{last_id}',
+        '/api/hypotheses/batch?ids={last_id}&ids=1,2,{first_id}&by=hypothesis_id',
+    ],
+    '/api/hypotheses/duplicates': [
+        '/api/hypotheses/duplicates',
+        '/api/hypotheses/duplicates?threshold=0.2&per_page=5',
+    ],
+    '/api/hypothesis/<int:hypothesis_id>/tournament': [
+        '/api/hypothesis/{first_id}/tournament',
+        '/api/hypothesis/{last_id}/tournament',
+    ],
+    '/api/tournament/expected_outcome': [
+        '/api/tournament/expected_outcome?a={first_id}&b={last_id}',
+        '/api/tournament/expected_outcome?a={last_id}&b={first_id}&stage=before',
+    ],
+    '/api/network/<int:topic_id>/<int:subtopic_index>': [
+        '/api/network/1/0',
+        '/api/network/1/2?strategy=similar',
+    ],
+    '/api/network/<int:topic_id>/<int:subtopic_index>/central': [
+        f'/api/network/1/0/central?metric={metric}&k=5' for metric in ('degree', 'betweenness', 'frequency')
+    ],
+    '/api/network/<int:topic_id>/<int:subtopic_index>/neighbors': [
+        '/api/network/1/0/neighbors?concept=personality%20traits&hops=2',
+    ],
+    '/api/network/<int:topic_id>/<int:subtopic_index>/concept': [
+        '/api/network/1/0/concept?concept=language%20model',
+    ],
+    '/api/analyzer_analysis/<int:topic_id>/<int:subtopic_index>': [
+        '/api/analyzer_analysis/1/0',
+        '/api/analyzer_analysis/1/2?category=similar',
+    ],
+    '/api/literature_agent/<int:topic_id>/<int:subtopic_index>': ['/api/literature_agent/1/0'],
+    '/api/papers': [
+        '/api/papers',
+        '/api/papers?year=2023&limit=10',
+        '/api/papers?min_citations=100&offset=20',
+    ],
+    '/api/papers/<int:topic_id>/<int:subtopic_index>': [
+        '/api/papers/1/0',
+        '/api/papers/1/2?strategy=high_impact&limit=5',
+    ],
+    '/api/hypothesis/<int:hypothesis_id>/papers': [
+        '/api/hypothesis/{first_id}/papers',
+        '/api/hypothesis/{last_id}/papers',
+    ],
+}
+
+
+def resolve_samples(database, samples=None):
+    """
+    填入示例请求中的占位符：{first_id} / {last_id} 为当前数据库的最小/最大假设主键
+    （不同数据库、合成库的主键范围不同）；{primary_model} 为主模型名
+    """
+    conn = sqlite3.connect(database)
+    try:
+        first_id, last_id = conn.execute('SELECT MIN(id), MAX(id) FROM hypothesis').fetchone()
+    finally:
+        conn.close()
+    values = {'{first_id}': str(first_id), '{last_id}': str(last_id), '{primary_model}': PRIMARY_MODEL}
+
+    def fill(url):
+        for placeholder, value in values.items():
+            url = url.replace(placeholder, value)
+        return url
+
+    return {
+        rule: [fill(url) for url in urls]
+        for rule, urls in (SAMPLE_REQUESTS if samples is None else samples).items()
+    }
+
+
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+SUBQUERY_RE = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+
+
+def capture_statements(client, urls):
+    """请求接口并记录执行的SQL（绑定参数已展开）"""
+    statements = []
+    # 在连接池出口挂钩：请求连接与跨分片查询使用的连接都会被记录
+    original = app_enhanced.acquire_db_connection
+
+    def traced_connection(database=None):
+        conn = original(database)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    app_enhanced.acquire_db_connection = traced_connection
+    try:
+        for url in urls:
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.get(url)
+                body = response.get_data(as_text=True)
+                response.close()
+            if response.status_code >= 500:
+                raise RuntimeError(f'{url} 返回 {response.status_code}: {body}')
+    finally:
+        app_enhanced.acquire_db_connection = original
+    return statements
+
+
+def plan_problems(conn, sql):
+    """返回该SQL查询计划中的问题列表"""
+    plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    subqueries = set()
+    problems = []
+    for _, _, _, detail in plan:
+        match = SUBQUERY_RE.match(detail)
+        if match:
+            subqueries.add(match.group(1))
+            continue
+        match = FULL_SCAN_RE.match(detail)
+        if match and match.group(1) not in subqueries and not match.group(1).startswith('sqlite_'):
+            problems.append(detail)
+        elif detail.startswith('USE TEMP B-TREE') and 'MATCH' not in sql:
+            # 全文检索的结果集按相关度/评分排序必然需要临时排序，范围受匹配集合限制
+            problems.append(detail)
+    return problems
+
+
+def is_query(sql):
+    return sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+# 分页参数越界时应被限制在有效范围内，而不是返回 500 或不带上限地读取
+PAGINATION_BOUND_REQUESTS = (
+    '/api/hypotheses?per_page=0',
+    '/api/hypotheses?page=-3&per_page=-5',
+    '/api/hypotheses?page=0&per_page=100000',
+    '/api/hypotheses?per_page=0&weights=novelty:1',
+)
+
+
+def pagination_problems(client):
+    """返回越界分页参数请求的问题列表 [(url, 问题)]"""
+    problems = []
+    for url in PAGINATION_BOUND_REQUESTS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.get(url)
+            data = response.get_json()
+            response.close()
+        if response.status_code != 200:
+            problems.append((url, f'返回 {response.status_code}: {data}'))
+            continue
+        pagination = data['pagination']
+        if not 1 <= pagination['per_page'] <= app_enhanced.HYPOTHESIS_MAX_PER_PAGE:
+            problems.append((url, f"per_page 未被限制: {pagination['per_page']}"))
+        if pagination.get('page', 1) < 1 or pagination['pages'] < 0:
+            problems.append((url, f"page/pages 越界: {pagination.get('page')}/{pagination['pages']}"))
+        if len(data['hypotheses']) > pagination['per_page']:
+            problems.append((url, f"返回 {len(data['hypotheses'])} 条，超过 per_page"))
+    return problems
+
+
+def run_check(database, verbose=False):
+    app_enhanced.DATABASE = database
+    client = app_enhanced.app.test_client()
+    samples = resolve_samples(database)
+    failures = []
+
+    api_rules = sorted(
+        rule.rule for rule in app_enhanced.app.url_map.iter_rules()
+        if rule.rule.startswith('/api/') and 'GET' in rule.methods
+    )
+    for rule in api_rules:
+        if rule not in samples:
+            failures.append((rule, '-', '未在 check_query_plans.SAMPLE_REQUESTS 中登记示例请求'))
+
+    conn = sqlite3.connect(database)
+    try:
+        checked = set()
+        for rule in api_rules:
+            for sql in capture_statements(client, samples.get(rule, [])):
+                normalized = ' '.join(sql.split())
+                if not is_query(normalized) or normalized in checked:
+                    continue
+                checked.add(normalized)
+                problems = plan_problems(conn, sql)
+                for problem in problems:
+                    failures.append((rule, normalized, problem))
+                if verbose:
+                    print(f"{'❌' if problems else '✅'} {rule}: {normalized[:160]}")
+    finally:
+        conn.close()
+
+    # 放在计划检查之后：这些请求会写入总数缓存，先执行会让示例请求跳过 COUNT 查询
+    for url, problem in pagination_problems(client):
+        failures.append(('/api/hypotheses', url, problem))
+
+    return failures, len(checked)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='检查所有API查询的执行计划')
+    parser.add_argument('--database', default=app_enhanced.DATABASE, help='SQLite数据库路径')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出每条SQL的检查结果')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.database):
+        print(f'❌ 数据库文件 {args.database} 不存在，请先运行 python3 ingest_data.py')
+        return 1
+
+    failures, checked = run_check(args.database, args.verbose)
+    for rule, sql, problem in failures:
+        print(f'❌ {rule}\n   计划: {problem}\n   SQL: {sql[:300]}')
+    if failures:
+        print(f'❌ 查询计划检查失败：{len(failures)} 个问题')
+        return 1
+    print(f'✅ 查询计划检查通过：共检查 {checked} 条SQL')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
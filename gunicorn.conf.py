@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 部署配置（gunicorn 启动时自动读取当前目录下的 gunicorn.conf.py）
+使用 gthread worker：每个 worker 进程内由线程池处理请求，一个慢查询或大响应只占用一个线程，
+同一浏览器标签页并行发出的多个请求不会互相排队。SQLite 执行查询期间释放 GIL，
+同一进程内的多个线程可以同时读库；JSON 序列化等纯 Python 工作仍受 GIL 限制，由多个 worker 进程分摊到各核心。
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# worker 进程数：默认等于CPU核心数（每个进程各自的连接池、响应缓存与评分矩阵会占用内存）
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+# 每个 worker 的请求线程数；连接池 DB_POOL_SIZE 不应小于该值，否则高峰期会反复新建连接
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# 线程 worker 在处理请求时同样向主进程发送心跳，timeout 只在整个进程卡住时触发
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+# 仪表盘会在短时间内连续请求多个接口，保持连接以减少重复建连
+keepalive = 5
@@ -0,0 +1,1343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+科研假设数据导入工具
+从 data/<model>/topic*/ 目录流式构建 hypothesis_data.db，按主题增量导入
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import similarity
+import snapshots
+
+# 数据库与数据目录配置
+DATABASE = 'hypothesis_data.db'
+DATA_DIR = 'data'
+STATISTICS_JSON = os.path.join('static', 'data', 'statistics.json')
+
+# 每个生成模型（data/<model>/）的数据单独存放在一个分片中：主模型使用 DATABASE 本身，
+# 其他模型为 <DATABASE 去掉扩展名>_<model>.db，例如 hypothesis_data_claude.db
+PRIMARY_MODEL = os.environ.get('PRIMARY_MODEL', 'gpt')
+MODEL_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9.-]*$')
+
+# 策略名与目录名一致：evolve_papers / high_impact_papers / similar_papers
+STRATEGIES = ('evolve', 'high_impact', 'similar')
+
+SCORE_COLUMNS = {
+    'elo_Novelty': 'novelty_score',
+    'elo_Significance': 'significance_score',
+    'elo_Soundness': 'soundness_score',
+    'elo_Feasibility': 'feasibility_score',
+    'elo_Overall_Winner': 'overall_winner_score',
+}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS literature_agent (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic_id INTEGER NOT NULL,
+    topic_title TEXT,
+    topic_category TEXT,
+    sub_topic TEXT,
+    description TEXT,
+    search_queries TEXT,
+    model_source TEXT
+);
+
+CREATE TABLE IF NOT EXISTS analyzer_agent (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic INTEGER NOT NULL,
+    sub_topic TEXT,
+    literature_category TEXT,
+    current_analysis TEXT
+);
+
+CREATE TABLE IF NOT EXISTS hypothesis (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic INTEGER NOT NULL,
+    sub_topic INTEGER,
+    strategy TEXT,
+    hypothesis_id INTEGER,
+    hypothesis_content TEXT,
+    feedback_results TEXT,
+    novelty_score REAL,
+    significance_score REAL,
+    soundness_score REAL,
+    feasibility_score REAL,
+    overall_winner_score REAL,
+    created_at TEXT
+);
+
+-- 假设的自然键：重新导入时按它原地更新，主键保持不变
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hypothesis_natural_key
+    ON hypothesis (topic, sub_topic, strategy, hypothesis_id);
+
+-- 全文索引：外部内容表，由触发器与 hypothesis 表保持同步
+CREATE VIRTUAL TABLE IF NOT EXISTS hypothesis_fts USING fts5(
+    hypothesis_content,
+    feedback_results,
+    content='hypothesis',
+    content_rowid='id',
+    tokenize='unicode61',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS hypothesis_fts_ai AFTER INSERT ON hypothesis BEGIN
+    INSERT INTO hypothesis_fts (rowid, hypothesis_content, feedback_results)
+    VALUES (new.id, new.hypothesis_content, new.feedback_results);
+END;
+
+CREATE TRIGGER IF NOT EXISTS hypothesis_fts_ad AFTER DELETE ON hypothesis BEGIN
+    INSERT INTO hypothesis_fts (hypothesis_fts, rowid, hypothesis_content, feedback_results)
+    VALUES ('delete', old.id, old.hypothesis_content, old.feedback_results);
+END;
+
+CREATE TRIGGER IF NOT EXISTS hypothesis_fts_au AFTER UPDATE ON hypothesis BEGIN
+    INSERT INTO hypothesis_fts (hypothesis_fts, rowid, hypothesis_content, feedback_results)
+    VALUES ('delete', old.id, old.hypothesis_content, old.feedback_results);
+    INSERT INTO hypothesis_fts (rowid, hypothesis_content, feedback_results)
+    VALUES (new.id, new.hypothesis_content, new.feedback_results);
+END;
+
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    topic_dir TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (topic_dir, path)
+);
+'''
+
+# 假设列表支持的排序列，每列按接口的筛选形态各建一个组合索引
+HYPOTHESIS_SORT_COLUMNS = (
+    'overall_winner_score',
+    'novelty_score',
+    'significance_score',
+    'soundness_score',
+    'feasibility_score',
+    'created_at',
+)
+
+
+def _hypothesis_sort_indexes():
+    """/api/hypotheses 的筛选形态：无筛选 / topic / topic + sub_topic，均按评分列排序"""
+    statements = []
+    for column in HYPOTHESIS_SORT_COLUMNS:
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS idx_hypothesis_{column} ON hypothesis ({column});')
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS idx_hypothesis_topic_{column} ON hypothesis (topic, {column});')
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS idx_hypothesis_topic_subtopic_{column} '
+            f'ON hypothesis (topic, sub_topic, {column});')
+    return '\n'.join(statements)
+
+
+# 评审意见代码前缀 → 评审维度
+CRITIQUE_DIMENSIONS = {
+    'NOV': 'novelty',
+    'IMP': 'significance',
+    'SIG': 'significance',
+    'SOU': 'soundness',
+    'FEA': 'feasibility',
+    'SUG': 'suggestion',
+}
+
+# feedback_results 中拆分到 hypothesis_keyword 的关键词列表：(kind, JSON路径)
+KEYWORD_LISTS = (
+    ('query', '$.keywords_query'),
+    ('concept', '$.future_suggestions_concepts'),
+    ('category', '$.future_suggestions_categories'),
+)
+
+
+def _normalize_review_sql(row, source=''):
+    """
+    从 feedback_results 拆分评审意见与关键词到侧表的 INSERT 语句
+    row 为假设行的别名（触发器中为 new），source 为回填时的 FROM 前缀；
+    意见代码去掉方括号，不符合 XXX-YYY 形式的代码置为 NULL（内容保留）；非法 JSON 不产生侧表行
+    """
+    feedback = f'CASE WHEN json_valid({row}.feedback_results) THEN {row}.feedback_results END'
+    dimension = ' '.join(
+        f"WHEN '{prefix}' THEN '{name}'" for prefix, name in CRITIQUE_DIMENSIONS.items())
+    keyword_paths = ' UNION ALL '.join(
+        f"SELECT '{kind}' AS kind, '{path}' AS path" for kind, path in KEYWORD_LISTS)
+    return f'''
+    INSERT INTO hypothesis_critique (
+        hypothesis_row_id, position, feedback_code, dimension, target_section, content
+    )
+    SELECT hypothesis_row_id, position,
+           CASE WHEN code GLOB '[A-Z][A-Z][A-Z]-[A-Z]*' AND length(code) <= 40 THEN code END,
+           CASE WHEN code GLOB '[A-Z][A-Z][A-Z]-[A-Z]*' THEN CASE substr(code, 1, 3) {dimension} END END,
+           target_section, content
+    FROM (
+        SELECT {row}.id AS hypothesis_row_id, CAST(j.key AS INTEGER) AS position,
+               trim(json_extract(j.value, '$.feedback_code'), '[] ') AS code,
+               json_extract(j.value, '$.target_section') AS target_section,
+               json_extract(j.value, '$.feedback_content') AS content
+        FROM {source} json_each({feedback}, '$.internal_review.critiques') j
+        WHERE j.type = 'object'
+    );
+    INSERT OR IGNORE INTO hypothesis_keyword (hypothesis_row_id, kind, value)
+    SELECT {row}.id, k.kind, trim(j.value)
+    FROM {source} ({keyword_paths}) k, json_each({feedback}, k.path) j
+    WHERE j.type = 'text' AND trim(j.value) != '';
+    '''
+
+
+def _review_columns_migration():
+    """
+    结构化评审字段：JSON 中的标题、问题陈述、新颖性结论与 PMI 指标作为虚拟生成列（可建索引），
+    评审意见与关键词拆分为侧表，由触发器随 hypothesis 的增删改同步（与全文索引触发器同一方式）
+    """
+    generated = (
+        ('title', 'TEXT', 'hypothesis_content', "json_extract(hypothesis_content, '$.title')"),
+        ('problem_statement', 'TEXT', 'hypothesis_content',
+         "json_extract(hypothesis_content, '$.Problem_Statement')"),
+        ('novelty_verdict', 'TEXT', 'feedback_results', "json_extract(feedback_results, '$.novelty')"),
+        ('cooccurrence_count', 'INTEGER', 'feedback_results',
+         "json_extract(feedback_results, '$.direct_cooccurrence_count')"),
+        ('min_pmi_score', 'REAL', 'feedback_results', "json_extract(feedback_results, '$.min_pmi_score_value')"),
+        ('avg_pmi_score', 'REAL', 'feedback_results', "json_extract(feedback_results, '$.avg_pmi_score_value')"),
+        ('critique_count', 'INTEGER', 'feedback_results',
+         "json_array_length(feedback_results, '$.internal_review.critiques')"),
+    )
+    columns = '\n'.join(
+        f'ALTER TABLE hypothesis ADD COLUMN {name} {type_} GENERATED ALWAYS AS '
+        f'(CASE WHEN json_valid({source}) THEN {expr} END) VIRTUAL;'
+        for name, type_, source, expr in generated
+    )
+    return columns + f'''
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_novelty_verdict
+        ON hypothesis (novelty_verdict, overall_winner_score);
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_avg_pmi_score ON hypothesis (avg_pmi_score);
+    CREATE TABLE IF NOT EXISTS hypothesis_critique (
+        hypothesis_row_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        feedback_code TEXT,
+        dimension TEXT,
+        target_section TEXT,
+        content TEXT,
+        PRIMARY KEY (hypothesis_row_id, position)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_critique_code
+        ON hypothesis_critique (feedback_code, hypothesis_row_id);
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_critique_dimension
+        ON hypothesis_critique (dimension, hypothesis_row_id);
+    CREATE TABLE IF NOT EXISTS hypothesis_keyword (
+        hypothesis_row_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        value TEXT NOT NULL COLLATE NOCASE,
+        PRIMARY KEY (hypothesis_row_id, kind, value)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_keyword_value
+        ON hypothesis_keyword (kind, value, hypothesis_row_id);
+
+    CREATE TRIGGER IF NOT EXISTS hypothesis_review_ai AFTER INSERT ON hypothesis BEGIN
+        {_normalize_review_sql('new')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS hypothesis_review_ad AFTER DELETE ON hypothesis BEGIN
+        DELETE FROM hypothesis_critique WHERE hypothesis_row_id = old.id;
+        DELETE FROM hypothesis_keyword WHERE hypothesis_row_id = old.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS hypothesis_review_au AFTER UPDATE OF feedback_results ON hypothesis BEGIN
+        DELETE FROM hypothesis_critique WHERE hypothesis_row_id = old.id;
+        DELETE FROM hypothesis_keyword WHERE hypothesis_row_id = old.id;
+        {_normalize_review_sql('new')}
+    END;
+
+    -- 回填已有数据
+    {_normalize_review_sql('h', 'hypothesis h,')}
+    '''
+
+
+# 数据库迁移：按 PRAGMA user_version 依次执行，第 N 项对应版本 N
+MIGRATIONS = [
+    # 1: 各接口查询形态对应的索引
+    _hypothesis_sort_indexes() + '''
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_strategy_scores ON hypothesis (
+        strategy, overall_winner_score, novelty_score, significance_score,
+        soundness_score, feasibility_score
+    );
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_subtopic ON hypothesis (sub_topic);
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_hypothesis_id ON hypothesis (hypothesis_id);
+    CREATE INDEX IF NOT EXISTS idx_literature_topic ON literature_agent (topic_id);
+    CREATE INDEX IF NOT EXISTS idx_literature_topic_subtopic ON literature_agent (topic_id, sub_topic);
+    CREATE INDEX IF NOT EXISTS idx_literature_topic_meta
+        ON literature_agent (topic_id, topic_title, topic_category);
+    CREATE INDEX IF NOT EXISTS idx_analyzer_topic ON analyzer_agent (topic);
+    CREATE INDEX IF NOT EXISTS idx_analyzer_topic_subtopic_category
+        ON analyzer_agent (topic, sub_topic, literature_category);
+    ''',
+    # 2: 统计汇总表，供 /api/statistics 与评分分布接口直接读取
+    '''
+    CREATE TABLE IF NOT EXISTS hypothesis_summary (
+        scope TEXT NOT NULL,
+        topic INTEGER,
+        sub_topic INTEGER,
+        strategy TEXT,
+        hypothesis_count INTEGER NOT NULL,
+        topic_count INTEGER NOT NULL,
+        subtopic_count INTEGER NOT NULL,
+        scored_count INTEGER NOT NULL,
+        avg_novelty REAL,
+        avg_significance REAL,
+        avg_soundness REAL,
+        avg_feasibility REAL,
+        avg_overall REAL,
+        bucket_excellent INTEGER NOT NULL,
+        bucket_good INTEGER NOT NULL,
+        bucket_fair INTEGER NOT NULL,
+        bucket_poor INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_summary_scope
+        ON hypothesis_summary (scope, topic, sub_topic, strategy);
+    ''',
+    # 3: 子主题序号列（从0开始，与 hypothesis.sub_topic 一致），接口按 (主题, 序号) 直接定位单行
+    '''
+    ALTER TABLE literature_agent ADD COLUMN subtopic_index INTEGER;
+    ALTER TABLE analyzer_agent ADD COLUMN subtopic_index INTEGER;
+    UPDATE literature_agent SET subtopic_index = (
+        SELECT COUNT(*) FROM literature_agent p
+        WHERE p.topic_id = literature_agent.topic_id AND p.id < literature_agent.id
+    );
+    UPDATE analyzer_agent SET subtopic_index = CAST(substr(sub_topic, 11) AS INTEGER)
+    WHERE sub_topic LIKE 'sub_topic_%';
+    CREATE INDEX IF NOT EXISTS idx_literature_topic_subtopic_index
+        ON literature_agent (topic_id, subtopic_index);
+    CREATE INDEX IF NOT EXISTS idx_analyzer_topic_subtopic_index_category
+        ON analyzer_agent (topic, subtopic_index, literature_category);
+    DROP INDEX IF EXISTS idx_analyzer_topic_subtopic_category;
+    DROP INDEX IF EXISTS idx_literature_topic;
+    ''',
+    # 4: 概念共现网络：每个 (主题, 子主题, 策略) 一个网络；边双向存储，按起点聚簇即邻接表
+    '''
+    CREATE TABLE IF NOT EXISTS concept_network (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic INTEGER NOT NULL,
+        sub_topic INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        total_nodes INTEGER NOT NULL,
+        total_edges INTEGER NOT NULL,
+        density REAL,
+        avg_clustering REAL,
+        avg_degree REAL,
+        concept_clusters TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_concept_network_scope
+        ON concept_network (topic, sub_topic, strategy);
+    CREATE TABLE IF NOT EXISTS concept_node (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        network_id INTEGER NOT NULL,
+        concept TEXT NOT NULL,
+        frequency INTEGER,
+        avg_relevance REAL,
+        degree INTEGER NOT NULL,
+        degree_centrality REAL NOT NULL,
+        betweenness_centrality REAL NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_concept_node_concept ON concept_node (network_id, concept);
+    CREATE INDEX IF NOT EXISTS idx_concept_node_degree ON concept_node (network_id, degree_centrality);
+    CREATE INDEX IF NOT EXISTS idx_concept_node_betweenness ON concept_node (network_id, betweenness_centrality);
+    CREATE INDEX IF NOT EXISTS idx_concept_node_frequency ON concept_node (network_id, frequency);
+    CREATE TABLE IF NOT EXISTS concept_edge (
+        source_id INTEGER NOT NULL,
+        target_id INTEGER NOT NULL,
+        weight REAL,
+        cooccurrence_count INTEGER,
+        PRIMARY KEY (source_id, target_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS concept_paper (
+        node_id INTEGER NOT NULL,
+        paper_key TEXT NOT NULL,
+        paper_id TEXT,
+        doi TEXT,
+        title TEXT,
+        year INTEGER,
+        PRIMARY KEY (node_id, paper_key)
+    ) WITHOUT ROWID;
+    -- 新表需要从数据文件填充：清空文件清单，下次导入时重新导入全部主题
+    DELETE FROM ingest_manifest;
+    ''',
+    # 5: 结构化评审字段（生成列 + 评审意见/关键词侧表）
+    _review_columns_migration(),
+    # 6: 综合排名的评分矩阵从覆盖索引读取，避免逐行读取存放JSON的表行
+    '''
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_score_matrix ON hypothesis (
+        topic, strategy, novelty_score, significance_score,
+        soundness_score, feasibility_score, overall_winner_score
+    );
+    ''',
+    # 7: 评分矩阵同时用于分面计数，覆盖索引加入子主题列
+    '''
+    CREATE INDEX IF NOT EXISTS idx_hypothesis_facets ON hypothesis (
+        topic, sub_topic, strategy, novelty_score, significance_score,
+        soundness_score, feasibility_score, overall_winner_score
+    );
+    DROP INDEX IF EXISTS idx_hypothesis_score_matrix;
+    ''',
+    # 8: 瑞士轮结果：每个想法改进前/后两个版本的各维度 Elo、总排名与评审指标（导入时从 xlsx 转换）
+    '''
+    CREATE TABLE IF NOT EXISTS tournament_result (
+        topic INTEGER NOT NULL,
+        sub_topic INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        hypothesis_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        novelty_score REAL,
+        significance_score REAL,
+        soundness_score REAL,
+        feasibility_score REAL,
+        overall_winner_score REAL,
+        overall_rank INTEGER,
+        cooccurrence_count INTEGER,
+        min_pmi_score REAL,
+        avg_pmi_score REAL,
+        novelty_verdict TEXT,
+        PRIMARY KEY (topic, sub_topic, strategy, hypothesis_id, stage)
+    ) WITHOUT ROWID;
+    -- 新表需要从数据文件填充：清空文件清单，下次导入时重新导入全部主题
+    DELETE FROM ingest_manifest;
+    ''',
+    # 9: 文献库：*_papers.json 中的论文按 DOI 跨主题去重，paper_source 记录各子主题/策略的文献集合
+    '''
+    CREATE TABLE IF NOT EXISTS paper (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        doi TEXT,
+        paper_id TEXT,
+        title TEXT,
+        year INTEGER,
+        citation_count INTEGER,
+        field_citation_ratio REAL,
+        abstract TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_paper_doi ON paper (doi);
+    CREATE INDEX IF NOT EXISTS idx_paper_paper_id ON paper (paper_id);
+    CREATE INDEX IF NOT EXISTS idx_paper_citations ON paper (citation_count);
+    CREATE INDEX IF NOT EXISTS idx_paper_year ON paper (year, citation_count);
+    -- paper_key 为文件中的序号（paper_01 ...），与 concept_paper.paper_key 对应
+    CREATE TABLE IF NOT EXISTS paper_source (
+        topic INTEGER NOT NULL,
+        sub_topic INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        paper_key TEXT NOT NULL,
+        paper_ref INTEGER NOT NULL,
+        PRIMARY KEY (topic, sub_topic, strategy, paper_key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_paper_source_paper ON paper_source (paper_ref);
+    DELETE FROM ingest_manifest;
+    ''',
+]
+
+# 汇总层级：(scope, topic表达式, sub_topic表达式, 分组列)
+SUMMARY_SCOPES = (
+    ('all', 'NULL', 'NULL', ()),
+    ('topic', 'topic', 'NULL', ('topic',)),
+    ('subtopic', 'topic', 'sub_topic', ('topic', 'sub_topic')),
+)
+
+# 评分均值只统计有综合评分的假设（与原接口口径一致）
+SUMMARY_AGGREGATES = '''
+    COUNT(*),
+    COUNT(DISTINCT topic),
+    COUNT(DISTINCT topic || '-' || sub_topic),
+    COUNT(overall_winner_score),
+    AVG(CASE WHEN overall_winner_score IS NOT NULL THEN novelty_score END),
+    AVG(CASE WHEN overall_winner_score IS NOT NULL THEN significance_score END),
+    AVG(CASE WHEN overall_winner_score IS NOT NULL THEN soundness_score END),
+    AVG(CASE WHEN overall_winner_score IS NOT NULL THEN feasibility_score END),
+    AVG(overall_winner_score),
+    SUM(CASE WHEN overall_winner_score >= 8 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN overall_winner_score >= 6 AND overall_winner_score < 8 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN overall_winner_score >= 4 AND overall_winner_score < 6 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN overall_winner_score < 4 THEN 1 ELSE 0 END)
+'''
+
+RESULT_FILE_RE = re.compile(r'^(\d+)_(\d+)_successful_final_results\.json$')
+IDEA_ID_RE = re.compile(rf"^({'|'.join(STRATEGIES)})_(\d+)_(\d+)_(before|after)$")
+SUBTOPIC_FILE_RE = re.compile(r'^(\d+)_')
+TOPIC_DIR_RE = re.compile(r'^topic(\d+)$')
+
+
+def create_schema(conn):
+    """创建数据表（已存在则跳过）"""
+    had_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hypothesis_fts'"
+    ).fetchone() is not None
+    conn.executescript(SCHEMA)
+    if not had_fts:
+        # 旧数据库首次创建全文索引时，需要为已有数据补建索引
+        with conn:
+            conn.execute("INSERT INTO hypothesis_fts (hypothesis_fts) VALUES ('rebuild')")
+
+
+def migrate(conn):
+    """执行尚未应用的迁移，每个版本在单独事务中完成"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, script in enumerate(MIGRATIONS, start=1):
+        if version < target:
+            conn.executescript(f'BEGIN;\n{script}\nPRAGMA user_version = {target};\nCOMMIT;')
+            version = target
+    return version
+
+
+def rebuild_summaries(conn):
+    """重建统计汇总表：全局 / 主题 / 子主题，各层级再按策略细分（strategy 为 NULL 表示全部策略）"""
+    with conn:
+        conn.execute('DELETE FROM hypothesis_summary')
+        for scope, topic_expr, sub_expr, group in SUMMARY_SCOPES:
+            for by_strategy in (False, True):
+                columns = list(group) + (['strategy'] if by_strategy else [])
+                group_by = f"GROUP BY {', '.join(columns)}" if columns else ''
+                conn.execute(f'''
+                    INSERT INTO hypothesis_summary
+                    SELECT '{scope}', {topic_expr}, {sub_expr}, {'strategy' if by_strategy else 'NULL'},
+                           {SUMMARY_AGGREGATES}
+                    FROM hypothesis
+                    {group_by}
+                ''')
+
+
+def export_statistics_json(databases, path):
+    """将各模型分片的全局汇总合并写入 static/data/statistics.json，保持静态副本与数据库一致"""
+    statistics = {'total_topics': 0, 'total_subtopics': 0, 'total_hypotheses': 0, 'strategy_distribution': {}}
+    for database in databases:
+        conn = sqlite3.connect(database)
+        try:
+            rows = conn.execute('''
+                SELECT strategy, hypothesis_count, topic_count, subtopic_count
+                FROM hypothesis_summary
+                WHERE scope = 'all'
+                ORDER BY strategy
+            ''').fetchall()
+        finally:
+            conn.close()
+        for strategy, hypothesis_count, topic_count, subtopic_count in rows:
+            if strategy is None:
+                statistics['total_topics'] += topic_count
+                statistics['total_subtopics'] += subtopic_count
+                statistics['total_hypotheses'] += hypothesis_count
+            else:
+                distribution = statistics['strategy_distribution']
+                distribution[strategy] = distribution.get(strategy, 0) + hypothesis_count
+    if not statistics['total_hypotheses']:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(statistics, f, ensure_ascii=False, indent=2)
+
+
+def shard_path(database, model):
+    """模型对应的分片路径"""
+    if model == PRIMARY_MODEL:
+        return database
+    return f'{os.path.splitext(database)[0]}_{model}.db'
+
+
+def model_shards(database):
+    """已存在的模型分片 {模型: 路径}：主模型在前，其余按名称排序"""
+    shards = {}
+    if os.path.exists(database):
+        shards[PRIMARY_MODEL] = database
+    directory = os.path.dirname(database)
+    prefix = f'{os.path.basename(os.path.splitext(database)[0])}_'
+    for name in sorted(os.listdir(directory or '.')):
+        model = name[len(prefix):-len('.db')]
+        if name.startswith(prefix) and name.endswith('.db') and MODEL_NAME_RE.match(model) \
+                and model != PRIMARY_MODEL:
+            shards[model] = os.path.join(directory, name)
+    return shards
+
+
+def iter_topic_dirs(data_dir):
+    """遍历 data/<model>/topic<N> 目录，返回 (model, topic_no, path)"""
+    for model_dir in sorted(Path(data_dir).iterdir()):
+        if not model_dir.is_dir():
+            continue
+        topics = []
+        for topic_dir in model_dir.iterdir():
+            match = TOPIC_DIR_RE.match(topic_dir.name)
+            if match and topic_dir.is_dir():
+                topics.append((int(match.group(1)), topic_dir))
+        for topic_no, topic_dir in sorted(topics):
+            yield model_dir.name, topic_no, topic_dir
+
+
+# 不导入、也不计入文件清单的文件：merged_all_ideas.json 是结果文件的汇总副本，
+# 其中每条都与对应 *_successful_final_results.json 的 before_idea / after_idea 完全相同，且只覆盖部分想法
+DERIVED_FILES = frozenset({'merged_all_ideas.json'})
+
+
+def is_source_file(path):
+    """过滤 Excel 锁文件（~$xxx.xlsx）等非数据文件与汇总副本"""
+    return path.is_file() and not path.name.startswith(('~$', '.')) and path.name not in DERIVED_FILES
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """分块计算文件哈希，避免一次性读入大文件"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_topic_files(topic_path, previous):
+    """
+    扫描主题目录，生成 {相对路径: (mtime_ns, size, sha256, created_at)}
+    mtime 与大小未变化时复用清单中的哈希，不再读取文件；created_at 始终沿用清单中的值
+    """
+    manifest = {}
+    for path in sorted(p for p in topic_path.rglob('*') if is_source_file(p)):
+        rel = path.relative_to(topic_path).as_posix()
+        stat = path.stat()
+        old = previous.get(rel)
+        if old and old[0] == stat.st_mtime_ns and old[1] == stat.st_size:
+            manifest[rel] = old
+        else:
+            manifest[rel] = (stat.st_mtime_ns, stat.st_size, file_sha256(path), old[3] if old else None)
+    return manifest
+
+
+def load_manifest(conn, topic_key):
+    """读取某主题上一次导入时的文件清单"""
+    rows = conn.execute(
+        'SELECT path, mtime_ns, size, sha256, created_at FROM ingest_manifest WHERE topic_dir = ?',
+        (topic_key,)
+    ).fetchall()
+    return {row[0]: (row[1], row[2], row[3], row[4]) for row in rows}
+
+
+def _content_hashes(manifest):
+    return {rel: entry[2] for rel, entry in manifest.items()}
+
+
+def _write_manifest(conn, topic_key, manifest):
+    conn.execute('DELETE FROM ingest_manifest WHERE topic_dir = ?', (topic_key,))
+    conn.executemany(
+        'INSERT INTO ingest_manifest (topic_dir, path, mtime_ns, size, sha256, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        ((topic_key, rel, *entry) for rel, entry in manifest.items())
+    )
+
+
+def save_manifest(conn, topic_key, manifest):
+    """单独更新文件清单（内容未变化时使用）"""
+    with conn:
+        _write_manifest(conn, topic_key, manifest)
+
+
+def subtopic_ordinals(topic_path):
+    """
+    文件名中的子主题编号并不总是从0开始（如topic9为1..5），
+    统一映射为界面使用的0起始序号
+    """
+    raw = set()
+    for strategy in STRATEGIES:
+        strategy_dir = topic_path / f'{strategy}_papers'
+        if strategy_dir.is_dir():
+            for path in strategy_dir.iterdir():
+                match = SUBTOPIC_FILE_RE.match(path.name)
+                if match:
+                    raw.add(int(match.group(1)))
+    return {value: ordinal for ordinal, value in enumerate(sorted(raw))}
+
+
+def iter_workbook_rows(path):
+    """以只读流模式逐行读取工作簿的活动工作表，返回 {表头: 值}"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError(f'读取 {path.name} 需要安装 openpyxl')
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        for row in rows:
+            yield dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def load_swiss_scores(topic_path):
+    """读取 final_swissresults.xlsx，返回 {idea_id: {score列: 值}}（含改进前 _before 与改进后 _after 两个版本）"""
+    path = topic_path / 'final_swissresults.xlsx'
+    if not path.exists():
+        return {}
+    scores = {}
+    for row in iter_workbook_rows(path):
+        idea_id = row.get('idea_id')
+        if not idea_id:
+            continue
+        scores[idea_id] = {column: _to_float(row.get(elo)) for elo, column in SCORE_COLUMNS.items()}
+    return scores
+
+
+def load_critic_metrics(topic_path):
+    """读取 all_research_directions_critic.xlsx：每行含同一想法改进前后的评审指标，返回 {idea_id: 指标}"""
+    path = topic_path / 'all_research_directions_critic.xlsx'
+    if not path.exists():
+        return {}
+    metrics = {}
+    for row in iter_workbook_rows(path):
+        for stage in ('before', 'after'):
+            idea_id = row.get(f'{stage}_idea_id')
+            if not idea_id:
+                continue
+            cooccurrence = _to_float(row.get(f'{stage}_idea_direct_cooccurrence_count'))
+            verdict = str(row.get(f'{stage}_idea_novelty') or '').strip()
+            metrics[idea_id] = {
+                'cooccurrence_count': int(cooccurrence) if cooccurrence is not None else None,
+                'min_pmi_score': _to_float(row.get(f'{stage}_idea_min_pmi_score_value')),
+                'avg_pmi_score': _to_float(row.get(f'{stage}_idea_avg_pmi_score_value')),
+                'novelty_verdict': verdict or None,
+            }
+    return metrics
+
+
+def iter_tournament_rows(topic_no, ordinals, scores, metrics):
+    """
+    tournament_result：瑞士轮中每个参赛版本一行
+    同一主题的改进前后版本在同一轮次中比赛，overall_rank 为全体参赛版本按综合 Elo 的名次（并列同名次）
+    """
+    overall = sorted((values['overall_winner_score'] for values in scores.values()
+                      if values['overall_winner_score'] is not None), reverse=True)
+    ranks = {}
+    for position, value in enumerate(overall, start=1):
+        ranks.setdefault(value, position)
+    for idea_id, values in scores.items():
+        match = IDEA_ID_RE.match(idea_id)
+        if not match:
+            continue
+        strategy, raw_sub, idea_no, stage = match.groups()
+        metric = metrics.get(idea_id, {})
+        yield (
+            topic_no,
+            ordinals.get(int(raw_sub), int(raw_sub)),
+            strategy,
+            int(idea_no),
+            stage,
+            values['novelty_score'],
+            values['significance_score'],
+            values['soundness_score'],
+            values['feasibility_score'],
+            values['overall_winner_score'],
+            ranks.get(values['overall_winner_score']),
+            metric.get('cooccurrence_count'),
+            metric.get('min_pmi_score'),
+            metric.get('avg_pmi_score'),
+            metric.get('novelty_verdict'),
+        )
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _file_timestamp(path):
+    return datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# 结果文件中可能记录生成时间的字段（顶层或 metadata 中）
+RESULT_TIMESTAMP_KEYS = ('created_at', 'generated_at', 'timestamp')
+
+
+def _result_timestamp(result):
+    """结果文件自带的生成时间（ISO 字符串或 Unix 时间戳），没有或无法解析时返回 None"""
+    for source in (result, result.get('metadata')):
+        if not isinstance(source, dict):
+            continue
+        for key in RESULT_TIMESTAMP_KEYS:
+            value = source.get(key)
+            try:
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    parsed = datetime.fromtimestamp(value)
+                elif isinstance(value, str):
+                    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+                else:
+                    continue
+            except (ValueError, OverflowError, OSError):
+                continue
+            return parsed.strftime('%Y-%m-%d %H:%M:%S')
+    return None
+
+
+def existing_hypothesis_timestamps(conn, topic_no):
+    """主题现有假设的 created_at：清单中没有记录时（清单被清空后重新导入）沿用，重新导入不改变排序"""
+    rows = conn.execute(
+        'SELECT sub_topic, strategy, hypothesis_id, created_at FROM hypothesis WHERE topic = ?', (topic_no,))
+    return {(row[0], row[1], row[2]): row[3] for row in rows}
+
+
+def iter_literature_rows(topic_no, model, topic_path):
+    """
+    literature_agent：每个子主题一行，按 query_keywords.json 中的顺序（即子主题序号）
+    数据文件中没有主题标题与分类，topic_title / topic_category 留空（界面显示为 Topic N）
+    """
+    path = topic_path / 'query_keywords.json'
+    if not path.exists():
+        return
+    with open(path, encoding='utf-8') as f:
+        keywords = json.load(f)
+    for ordinal, entry in enumerate(keywords):
+        yield (
+            topic_no,
+            ordinal,
+            None,
+            None,
+            entry.get('title'),
+            entry.get('description'),
+            entry.get('search_queries'),
+            model,
+        )
+
+
+def iter_analyzer_rows(topic_no, topic_path, ordinals):
+    """analyzer_agent：每个 (策略, 子主题) 一行，current_analysis 保存原始JSON文本"""
+    for strategy in STRATEGIES:
+        for raw, ordinal in sorted(ordinals.items(), key=lambda item: item[1]):
+            path = topic_path / f'{strategy}_papers' / f'{raw}_current_analysis.json'
+            if not path.exists():
+                continue
+            with open(path, encoding='utf-8') as f:
+                current_analysis = f.read()
+            yield (topic_no, f'sub_topic_{ordinal}', ordinal, strategy, current_analysis)
+
+
+def iter_hypothesis_rows(topic_no, topic_path, ordinals, scores, timestamps, existing=None):
+    """
+    hypothesis：每个 *_successful_final_results.json 一行
+    created_at 依次取：结果文件自带的生成时间、清单中记录的时间 timestamps（相对路径 -> 时间）、
+    库中已有的值 existing、文件 mtime（仅首次导入）；取得的值写回 timestamps，随清单保存
+    """
+    for strategy in STRATEGIES:
+        strategy_dir = topic_path / f'{strategy}_papers'
+        if not strategy_dir.is_dir():
+            continue
+        entries = []
+        for path in strategy_dir.iterdir():
+            match = RESULT_FILE_RE.match(path.name)
+            if match:
+                entries.append((int(match.group(1)), int(match.group(2)), path))
+
+        for raw_sub, idea_no, path in sorted(entries):
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+
+            ideas = (result.get('after_idea') or {}).get('ideas') or []
+            content = ideas[0] if ideas else result.get('before_idea')
+            score = scores.get(f'{strategy}_{raw_sub}_{idea_no}_after', {})
+            sub_topic = ordinals.get(raw_sub, raw_sub)
+            rel = path.relative_to(topic_path).as_posix()
+            created_at = (_result_timestamp(result) or timestamps.get(rel)
+                          or (existing or {}).get((sub_topic, strategy, idea_no)) or _file_timestamp(path))
+            timestamps[rel] = created_at
+
+            yield (
+                topic_no,
+                sub_topic,
+                strategy,
+                idea_no,
+                json.dumps(content, ensure_ascii=False) if content is not None else None,
+                json.dumps(result.get('feedback_results'), ensure_ascii=False),
+                score.get('novelty_score'),
+                score.get('significance_score'),
+                score.get('soundness_score'),
+                score.get('feasibility_score'),
+                score.get('overall_winner_score'),
+                created_at,
+            )
+
+
+def _centrality(adjacency):
+    """
+    度中心性与介数中心性（无权图，Brandes算法；归一化方式与 networkx 默认一致）
+    每个网络只有几十个概念，导入时计算一次并存库
+    """
+    nodes = list(adjacency)
+    n = len(nodes)
+    degree = {node: len(adjacency[node]) / (n - 1) if n > 1 else 0.0 for node in nodes}
+    betweenness = dict.fromkeys(nodes, 0.0)
+    for source in nodes:
+        stack = []
+        predecessors = {node: [] for node in nodes}
+        paths = dict.fromkeys(nodes, 0)
+        paths[source] = 1
+        distance = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            stack.append(node)
+            for neighbor in adjacency[node]:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    queue.append(neighbor)
+                if distance[neighbor] == distance[node] + 1:
+                    paths[neighbor] += paths[node]
+                    predecessors[neighbor].append(node)
+        dependency = dict.fromkeys(nodes, 0.0)
+        while stack:
+            node = stack.pop()
+            for predecessor in predecessors[node]:
+                dependency[predecessor] += paths[predecessor] / paths[node] * (1 + dependency[node])
+            if node != source:
+                betweenness[node] += dependency[node]
+    # 无向图中每条路径被计算两次，再按 (n-1)(n-2)/2 归一化
+    scale = 1 / ((n - 1) * (n - 2)) if n > 2 else 0.0
+    return degree, {node: value * scale for node, value in betweenness.items()}
+
+
+def _load_papers(path):
+    """
+    {raw}_papers.json（{"papers": [...]} 或直接为列表）：网络中的 paper_01 对应第 1 篇
+    文件中含非标准 JSON 的 NaN（fieldCitationRatio、reference_ids 等），解析为 None
+    """
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        papers = json.load(f, parse_constant=lambda constant: None)
+    if isinstance(papers, dict):
+        papers = papers.get('papers') or []
+    return {f'paper_{i:02d}': paper for i, paper in enumerate(papers, start=1) if isinstance(paper, dict)}
+
+
+def load_paper_sets(topic_path, ordinals):
+    """各 (子主题序号, 策略) 的文献集合 {paper_01: 论文}；每个文件只解析一次，供文献库与概念网络共用"""
+    paper_sets = {}
+    for strategy in STRATEGIES:
+        strategy_dir = topic_path / f'{strategy}_papers'
+        for raw, ordinal in ordinals.items():
+            papers = _load_papers(strategy_dir / f'{raw}_papers.json')
+            if papers:
+                paper_sets[(ordinal, strategy)] = papers
+    return paper_sets
+
+
+DOI_PREFIXES = ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:')
+
+
+def normalize_doi(doi):
+    """DOI 不区分大小写：去掉链接前缀并转为小写，作为跨主题去重的键"""
+    if not isinstance(doi, str):
+        return None
+    doi = doi.strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi or None
+
+
+def _to_int(value):
+    value = _to_float(value)
+    return int(value) if value is not None and math.isfinite(value) else None
+
+
+def upsert_paper(conn, paper):
+    """
+    写入一篇论文并返回其行 id：按 DOI（没有 DOI 时按 paperId）合并各主题中的重复论文，
+    引用数取各文件中的最大值，其余字段保留已有值、补全缺失值
+    """
+    doi = normalize_doi(paper.get('doi'))
+    values = {
+        'doi': doi,
+        'paper_id': paper.get('paperId'),
+        'title': paper.get('title'),
+        'year': _to_int(paper.get('year')),
+        'citation_count': _to_int(paper.get('citationCount')),
+        'field_citation_ratio': _to_float(paper.get('fieldCitationRatio')),
+        'abstract': paper.get('abstract') if isinstance(paper.get('abstract'), str) else None,
+    }
+    if doi:
+        row = conn.execute('SELECT id FROM paper WHERE doi = ?', (doi,)).fetchone()
+    elif values['paper_id']:
+        row = conn.execute('SELECT id FROM paper WHERE paper_id = ? AND doi IS NULL',
+                           (values['paper_id'],)).fetchone()
+    else:
+        row = None
+    if row is None:
+        return conn.execute('''
+            INSERT INTO paper (doi, paper_id, title, year, citation_count, field_citation_ratio, abstract)
+            VALUES (:doi, :paper_id, :title, :year, :citation_count, :field_citation_ratio, :abstract)
+        ''', values).lastrowid
+    conn.execute('''
+        UPDATE paper SET
+            paper_id = COALESCE(paper_id, :paper_id),
+            title = COALESCE(title, :title),
+            year = COALESCE(year, :year),
+            citation_count = CASE
+                WHEN citation_count IS NULL OR :citation_count > citation_count THEN :citation_count
+                ELSE citation_count
+            END,
+            field_citation_ratio = COALESCE(field_citation_ratio, :field_citation_ratio),
+            abstract = COALESCE(abstract, :abstract)
+        WHERE id = :id
+    ''', {**values, 'id': row[0]})
+    return row[0]
+
+
+def insert_paper_sets(conn, topic_no, paper_sets):
+    """写入主题的文献集合：论文去重后存入 paper，paper_source 记录集合中每个序号对应的论文"""
+    for (ordinal, strategy), papers in paper_sets.items():
+        conn.executemany('''
+            INSERT OR REPLACE INTO paper_source (topic, sub_topic, strategy, paper_key, paper_ref)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(topic_no, ordinal, strategy, key, upsert_paper(conn, paper)) for key, paper in papers.items()])
+
+
+def iter_concept_networks(topic_path, ordinals, paper_sets):
+    """每个 {raw}_local_cooccurrence_network.json 一个网络，附带 network_stats 中的统计、概念簇与文献集合"""
+    for strategy in STRATEGIES:
+        strategy_dir = topic_path / f'{strategy}_papers'
+        for raw, ordinal in sorted(ordinals.items(), key=lambda item: item[1]):
+            path = strategy_dir / f'{raw}_local_cooccurrence_network.json'
+            if not path.exists():
+                continue
+            with open(path, encoding='utf-8') as f:
+                network = json.load(f)
+            stats = {}
+            stats_path = strategy_dir / f'{raw}_network_stats.json'
+            if stats_path.exists():
+                with open(stats_path, encoding='utf-8') as f:
+                    stats = json.load(f)
+            yield ordinal, strategy, network, stats, paper_sets.get((ordinal, strategy), {})
+
+
+def insert_concept_network(conn, topic_no, ordinal, strategy, network, stats, papers):
+    """写入一个网络：概念节点（含预先计算的中心性）、双向边与概念-论文关联"""
+    nodes = {node['id']: node for node in network.get('nodes') or []}
+    adjacency = {concept: set() for concept in nodes}
+    edges = []
+    for edge in network.get('edges') or []:
+        source, target = edge['source'], edge['target']
+        if source in adjacency and target in adjacency and source != target:
+            adjacency[source].add(target)
+            adjacency[target].add(source)
+            edges.append(edge)
+    degree, betweenness = _centrality(adjacency)
+
+    summary = stats.get('network_stats') or {}
+    network_id = conn.execute('''
+        INSERT INTO concept_network
+            (topic, sub_topic, strategy, total_nodes, total_edges, density, avg_clustering, avg_degree,
+             concept_clusters)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        topic_no, ordinal, strategy, len(nodes), len(edges),
+        summary.get('density'), summary.get('avg_clustering'), summary.get('avg_degree'),
+        json.dumps(stats.get('concept_clusters') or [], ensure_ascii=False),
+    )).lastrowid
+
+    node_ids = {}
+    for concept, node in nodes.items():
+        node_ids[concept] = conn.execute('''
+            INSERT INTO concept_node
+                (network_id, concept, frequency, avg_relevance, degree, degree_centrality, betweenness_centrality)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            network_id, concept, node.get('frequency'), node.get('avg_relevance'),
+            len(adjacency[concept]), degree[concept], betweenness[concept],
+        )).lastrowid
+
+    conn.executemany('''
+        INSERT OR REPLACE INTO concept_edge (source_id, target_id, weight, cooccurrence_count)
+        VALUES (?, ?, ?, ?)
+    ''', [
+        (node_ids[a], node_ids[b], edge.get('weight'), edge.get('cooccurrence_count'))
+        for edge in edges
+        for a, b in ((edge['source'], edge['target']), (edge['target'], edge['source']))
+    ])
+
+    paper_rows = []
+    for concept, node in nodes.items():
+        for key in node.get('paper_ids') or []:
+            paper = papers.get(key, {})
+            paper_rows.append((node_ids[concept], key, paper.get('paperId'), paper.get('doi'),
+                               paper.get('title'), paper.get('year')))
+    conn.executemany('''
+        INSERT OR IGNORE INTO concept_paper (node_id, paper_key, paper_id, doi, title, year)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', paper_rows)
+
+
+def delete_topic_rows(conn, topic_no, hypotheses=True):
+    """删除某主题在各数据表中的全部行；hypotheses=False 时保留假设行（重新导入时按自然键原地更新）"""
+    conn.execute('DELETE FROM literature_agent WHERE topic_id = ?', (topic_no,))
+    conn.execute('DELETE FROM analyzer_agent WHERE topic = ?', (topic_no,))
+    if hypotheses:
+        conn.execute('DELETE FROM hypothesis WHERE topic = ?', (topic_no,))
+    conn.execute('DELETE FROM tournament_result WHERE topic = ?', (topic_no,))
+    node_ids = '''
+        SELECT n.id FROM concept_node n
+        JOIN concept_network w ON w.id = n.network_id
+        WHERE w.topic = ?
+    '''
+    conn.execute(f'DELETE FROM concept_edge WHERE source_id IN ({node_ids})', (topic_no,))
+    conn.execute(f'DELETE FROM concept_paper WHERE node_id IN ({node_ids})', (topic_no,))
+    conn.execute('DELETE FROM concept_node WHERE network_id IN (SELECT id FROM concept_network WHERE topic = ?)',
+                 (topic_no,))
+    conn.execute('DELETE FROM concept_network WHERE topic = ?', (topic_no,))
+    # 只属于该主题的论文随文献集合一起删除，其他主题仍引用的论文保留
+    conn.execute('DELETE FROM paper_source WHERE topic = ?', (topic_no,))
+    conn.execute('DELETE FROM paper WHERE id NOT IN (SELECT paper_ref FROM paper_source)')
+
+
+HYPOTHESIS_VALUE_COLUMNS = (
+    'hypothesis_content', 'feedback_results', 'novelty_score', 'significance_score', 'soundness_score',
+    'feasibility_score', 'overall_winner_score', 'created_at',
+)
+
+# 按自然键更新或插入；内容未变化的行不写入（不触发全文索引与评审侧表的更新触发器）
+HYPOTHESIS_UPSERT = f'''
+    INSERT INTO hypothesis (topic, sub_topic, strategy, hypothesis_id, {', '.join(HYPOTHESIS_VALUE_COLUMNS)})
+    VALUES (?, ?, ?, ?, {', '.join('?' for _ in HYPOTHESIS_VALUE_COLUMNS)})
+    ON CONFLICT (topic, sub_topic, strategy, hypothesis_id) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in HYPOTHESIS_VALUE_COLUMNS)}
+    WHERE {' OR '.join(f'{column} IS NOT excluded.{column}' for column in HYPOTHESIS_VALUE_COLUMNS)}
+'''
+
+
+def upsert_hypotheses(conn, topic_no, rows):
+    """
+    按自然键 (topic, sub_topic, strategy, hypothesis_id) 写入某主题的假设，已有的行保留主键
+    （/api/hypothesis/<id> 链接与相似度索引都引用主键）；数据文件中已不存在的假设删除
+    """
+    keys = set()
+
+    def tracked():
+        for row in rows:
+            keys.add(tuple(row[1:4]))
+            yield row
+
+    conn.executemany(HYPOTHESIS_UPSERT, tracked())
+    stale = [
+        (row[0],) for row in conn.execute(
+            'SELECT id, sub_topic, strategy, hypothesis_id FROM hypothesis WHERE topic = ?', (topic_no,))
+        if tuple(row[1:]) not in keys
+    ]
+    conn.executemany('DELETE FROM hypothesis WHERE id = ?', stale)
+
+
+def ingest_topic(conn, topic_key, topic_no, model, topic_path, manifest):
+    """在单个事务内替换某主题的数据（假设按自然键原地更新），并写入新的文件清单"""
+    ordinals = subtopic_ordinals(topic_path)
+    scores = load_swiss_scores(topic_path)
+    paper_sets = load_paper_sets(topic_path, ordinals)
+    timestamps = {rel: entry[3] for rel, entry in manifest.items() if entry[3]}
+
+    with conn:
+        existing = existing_hypothesis_timestamps(conn, topic_no)
+        delete_topic_rows(conn, topic_no, hypotheses=False)
+
+        conn.executemany('''
+            INSERT INTO literature_agent
+                (topic_id, subtopic_index, topic_title, topic_category, sub_topic, description,
+                 search_queries, model_source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', iter_literature_rows(topic_no, model, topic_path))
+
+        conn.executemany('''
+            INSERT INTO analyzer_agent (topic, sub_topic, subtopic_index, literature_category, current_analysis)
+            VALUES (?, ?, ?, ?, ?)
+        ''', iter_analyzer_rows(topic_no, topic_path, ordinals))
+
+        upsert_hypotheses(
+            conn, topic_no, iter_hypothesis_rows(topic_no, topic_path, ordinals, scores, timestamps, existing))
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO tournament_result
+                (topic, sub_topic, strategy, hypothesis_id, stage,
+                 novelty_score, significance_score, soundness_score, feasibility_score, overall_winner_score,
+                 overall_rank, cooccurrence_count, min_pmi_score, avg_pmi_score, novelty_verdict)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', iter_tournament_rows(topic_no, ordinals, scores, load_critic_metrics(topic_path)))
+
+        insert_paper_sets(conn, topic_no, paper_sets)
+
+        for ordinal, strategy, network, stats, papers in iter_concept_networks(topic_path, ordinals, paper_sets):
+            insert_concept_network(conn, topic_no, ordinal, strategy, network, stats, papers)
+
+        _write_manifest(conn, topic_key, {
+            rel: (*entry[:3], timestamps.get(rel)) for rel, entry in manifest.items()
+        })
+
+
+def remove_topic(conn, topic_key):
+    """数据目录中已删除的主题：清理对应数据与清单"""
+    topic_no = int(TOPIC_DIR_RE.match(topic_key.rsplit('/', 1)[-1]).group(1))
+    with conn:
+        delete_topic_rows(conn, topic_no)
+        conn.execute('DELETE FROM ingest_manifest WHERE topic_dir = ?', (topic_key,))
+
+
+def ingest_model(database, model, topic_dirs, force=False, log=print):
+    """
+    将一个模型的主题目录增量导入到它的分片：在复制出的下一代快照上仅重新导入文件内容发生变化的主题目录，
+    有变化时原子发布该快照（见 snapshots），应用在下一次请求时切换；没有变化时丢弃
+    返回 ({'ingested': [...], 'skipped': [...], 'removed': [...]}, 汇总表是否已重建)
+    """
+    outcome = {}
+
+    def apply(path):
+        summary, rebuilt, changed = ingest_snapshot(path, model, topic_dirs, force, log)
+        outcome.update(summary=summary, rebuilt=rebuilt)
+        return changed
+
+    published = snapshots.update(database, apply)
+    if published:
+        log(f'📦 {model} 快照已发布：{published}')
+    return outcome['summary'], outcome['rebuilt']
+
+
+def ingest_snapshot(path, model, topic_dirs, force=False, log=print):
+    """在未发布的快照上执行增量导入，返回 (导入摘要, 汇总表是否已重建, 快照内容是否有变化)"""
+    conn = sqlite3.connect(path)
+    try:
+        # 快照发布前不会被读取：不需要WAL，发布时统一落盘；发布后为单个自包含的只读文件
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.execute('PRAGMA synchronous = OFF')
+        create_schema(conn)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        migrated = migrate(conn) != version
+        summary = {'ingested': [], 'skipped': [], 'removed': []}
+        seen = set()
+
+        for topic_no, topic_path in topic_dirs:
+            topic_key = f'{model}/{topic_path.name}'
+            seen.add(topic_key)
+
+            previous = load_manifest(conn, topic_key)
+            manifest = scan_topic_files(topic_path, previous)
+            if not force and _content_hashes(manifest) == _content_hashes(previous):
+                # 内容未变（可能只是 mtime 变化）：刷新清单后跳过
+                if manifest != previous:
+                    save_manifest(conn, topic_key, manifest)
+                summary['skipped'].append(topic_key)
+                continue
+
+            log(f'🔄 导入 {topic_key} ({len(manifest)} 个文件)')
+            ingest_topic(conn, topic_key, topic_no, model, topic_path, manifest)
+            summary['ingested'].append(topic_key)
+
+        stale = {row[0] for row in conn.execute('SELECT DISTINCT topic_dir FROM ingest_manifest')}
+        for topic_key in sorted(stale - seen):
+            log(f'🗑️ 移除 {topic_key}')
+            remove_topic(conn, topic_key)
+            summary['removed'].append(topic_key)
+
+        summaries_empty = conn.execute('SELECT COUNT(*) FROM hypothesis_summary').fetchone()[0] == 0
+        rebuilt = bool(summary['ingested'] or summary['removed'] or summaries_empty)
+        if rebuilt:
+            rebuild_summaries(conn)
+
+        # 相似度索引与快照文件放在一起（创建快照时已复制上一代的索引），数据变化或索引缺失时重新构建
+        similarity_dir = similarity.index_directory(path)
+        indexed = bool(summary['ingested'] or summary['removed'] or not similarity.index_exists(similarity_dir))
+        if indexed:
+            meta = similarity.build_index(conn, similarity_dir)
+            log(f"🔎 {model} 相似度索引已构建：{meta['hypothesis_count']} 个假设，{meta['cluster_count']} 个近似重复簇")
+
+        if summary['ingested'] or summary['removed'] or migrated:
+            # 数据或索引变化后更新统计信息，供查询规划器选择索引
+            conn.execute('ANALYZE')
+            conn.commit()
+
+        return summary, rebuilt, bool(rebuilt or indexed or migrated)
+    finally:
+        conn.close()
+
+
+def ingest(database=DATABASE, data_dir=DATA_DIR, force=False, log=print, models=None):
+    """
+    增量导入入口：data/<model>/ 下每个模型导入到各自的分片（见 shard_path），
+    一个模型重新导入时只写入它自己的分片文件，不影响其他模型的读取；models 可限定只导入部分模型
+    返回 {'ingested': [...], 'skipped': [...], 'removed': [...]}
+    """
+    topic_dirs = {}
+    for model, topic_no, topic_path in iter_topic_dirs(data_dir):
+        topic_dirs.setdefault(model, []).append((topic_no, topic_path))
+
+    summary = {'ingested': [], 'skipped': [], 'removed': []}
+    rebuilt = False
+    for model in sorted(topic_dirs):
+        if models and model not in models:
+            continue
+        if not MODEL_NAME_RE.match(model):
+            log(f'⚠️ 跳过模型目录 {model}：名称只能包含字母、数字、点与连字符')
+            continue
+        model_summary, model_rebuilt = ingest_model(
+            shard_path(database, model), model, topic_dirs[model], force, log)
+        for key, topics in model_summary.items():
+            summary[key].extend(topics)
+        rebuilt = rebuilt or model_rebuilt
+
+    if not models:
+        for model, path in model_shards(database).items():
+            if model not in topic_dirs:
+                log(f'⚠️ 数据目录中没有模型 {model}，分片 {path} 保持不变（不再需要时可手动删除）')
+
+    if rebuilt and os.path.isdir(os.path.dirname(STATISTICS_JSON)):
+        export_statistics_json(list(model_shards(database).values()), STATISTICS_JSON)
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从 data/ 目录增量构建 hypothesis_data.db')
+    parser.add_argument('--database', default=DATABASE, help=f'主模型（{PRIMARY_MODEL}）的SQLite数据库路径，其他模型的分片放在同一目录')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='数据根目录')
+    parser.add_argument('--model', action='append', help='只导入指定模型（可重复），其他模型的分片不受影响')
+    parser.add_argument('--force', action='store_true', help='忽略文件清单，重新导入全部主题')
+    parser.add_argument('--migrate-only', action='store_true', help='只执行数据库迁移，不导入数据')
+    args = parser.parse_args(argv)
+
+    if args.migrate_only:
+        shards = model_shards(args.database) or {PRIMARY_MODEL: args.database}
+        for model, path in shards.items():
+            if args.model and model not in args.model:
+                continue
+            versions = {}
+
+            def apply(snapshot):
+                conn = sqlite3.connect(snapshot)
+                try:
+                    conn.execute('PRAGMA journal_mode = DELETE')
+                    create_schema(conn)
+                    versions['before'] = conn.execute('PRAGMA user_version').fetchone()[0]
+                    versions['after'] = migrate(conn)
+                    rebuild_summaries(conn)
+                finally:
+                    conn.close()
+                return versions['after'] != versions['before']
+
+            published = snapshots.update(path, apply)
+            status = f'已发布快照 {published}' if published else '无需迁移'
+            print(f"✅ {model} 分片 {path} 迁移完成（{status}），当前版本 {versions['after']}")
+        return 0
+
+    if not os.path.isdir(args.data_dir):
+        print(f'❌ 数据目录 {args.data_dir} 不存在')
+        return 1
+
+    summary = ingest(args.database, args.data_dir, force=args.force, models=args.model)
+    print(f"✅ 导入完成：更新 {len(summary['ingested'])} 个主题，"
+          f"跳过 {len(summary['skipped'])} 个，移除 {len(summary['removed'])} 个")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求级性能统计
+- 进程内的 Prometheus 指标（计数器 / 直方图 / 回调仪表），由 /metrics 以文本格式输出
+- SQLite 连接与游标的计时包装：记录每个请求的SQL耗时、语句数与读取行数，
+  超过阈值的语句连同 EXPLAIN QUERY PLAN 写入慢查询日志
+- JSON 序列化计时
+- 按请求头开启的采样分析：后台线程定时采集请求线程的调用栈，输出 folded stack 文件（可直接生成火焰图）
+"""
+
+import hmac
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+# 慢查询阈值（毫秒），单条语句从执行到读取完结果的总耗时
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+# 采样分析：设置 PROFILE_TOKEN 后，请求头 X-Profile 与之相同的请求会被采样
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_HEADER = 'X-Profile'
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+# 延迟类直方图的桶边界（秒）与响应大小的桶边界（字节）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+slow_query_log = logging.getLogger('hypothesis.slow_query')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+
+
+class CounterMetric(Metric):
+    type = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, values)} {_format_value(value)}'
+            for values, value in items
+        ]
+
+
+class HistogramMetric(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((values, (list(e[0]), e[1], e[2])) for values, e in self._values.items())
+        lines = self.header()
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, values, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, values, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labels, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class GaugeMetric(Metric):
+    """抓取时调用回调取值的仪表"""
+    type = 'gauge'
+
+    def __init__(self, name, help_text, callback):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def render(self):
+        return self.header() + [f'{self.name} {_format_value(self.callback())}']
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(CounterMetric(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(HistogramMetric(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, callback):
+        return self.register(GaugeMetric(name, help_text, callback))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+REQUESTS = registry.counter(
+    'hypothesis_http_requests_total', '按路由、方法与状态码统计的请求数', ('route', 'method', 'status'))
+REQUEST_SECONDS = registry.histogram(
+    'hypothesis_http_request_duration_seconds', '请求处理耗时（不含流式响应的生成）', ('route', 'method'))
+SQL_SECONDS = registry.histogram(
+    'hypothesis_sql_duration_seconds', '每个请求的SQL执行与读取结果耗时合计', ('route',))
+SERIALIZE_SECONDS = registry.histogram(
+    'hypothesis_json_serialize_duration_seconds', '每个请求的JSON序列化耗时合计', ('route',))
+RESPONSE_BYTES = registry.histogram(
+    'hypothesis_http_response_bytes', '响应体大小（流式响应不计）', ('route',), SIZE_BUCKETS)
+SQL_STATEMENTS = registry.counter('hypothesis_sql_statements_total', '执行的SQL语句数', ('route',))
+SQL_ROWS = registry.counter('hypothesis_sql_rows_total', 'SQL查询读取的结果行数', ('route',))
+SLOW_QUERIES = registry.counter('hypothesis_sql_slow_queries_total', '超过慢查询阈值的语句数', ('route',))
+
+
+class RequestStats:
+    """单个请求的统计，保存在 flask.g 上"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.slow_queries = 0
+        self.serialize_seconds = 0.0
+        self.cursors = []
+
+
+def current_stats():
+    if has_app_context():
+        return g.get('request_stats')
+    return None
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    记录语句耗时：SQLite 在读取结果时才逐步执行，
+    因此一条语句的耗时为 execute 与随后各次 fetch 的合计，在读完结果或执行下一条语句时结算
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = None
+        self._stats = current_stats()
+        if self._stats is not None:
+            self._stats.cursors.append(self)
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._pending is not None:
+                self._pending[2] += elapsed
+
+    def execute(self, sql, parameters=()):
+        self.finish_statement()
+        self._pending = [sql, parameters, 0.0]
+        if self._stats is not None:
+            self._stats.statements += 1
+        return self._timed(super().execute, sql, parameters)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._count(0 if row is None else 1)
+        if row is None:
+            self.finish_statement()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._count(len(rows))
+        if len(rows) < size:
+            self.finish_statement()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._count(len(rows))
+        self.finish_statement()
+        return rows
+
+    def _count(self, rows):
+        if self._stats is not None:
+            self._stats.rows += rows
+
+    def finish_statement(self):
+        """结算当前语句：计入请求的SQL耗时，超过阈值时记录慢查询"""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, parameters, elapsed = pending
+        if self._stats is not None:
+            self._stats.sql_seconds += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            if self._stats is not None:
+                self._stats.slow_queries += 1
+            log_slow_query(self.connection, sql, parameters, elapsed)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """cursor() 与 execute() 都返回计时游标（Connection.execute 内部同样调用 cursor()）"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+def log_slow_query(conn, sql, parameters, elapsed):
+    """慢查询日志：语句、参数、耗时与 EXPLAIN QUERY PLAN"""
+    statement = ' '.join(sql.split())
+    try:
+        # 使用普通游标，EXPLAIN 本身不计入统计
+        cursor = sqlite3.Cursor(conn)
+        plan = [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()]
+        cursor.close()
+    except sqlite3.Error as e:
+        plan = [f'(无法获取查询计划: {e})']
+    slow_query_log.warning('慢查询 %.1fms: %s 参数=%r\n  计划: %s',
+                           elapsed * 1000, statement, parameters, '\n  计划: '.join(plan))
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """jsonify 序列化计时"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.serialize_seconds += time.perf_counter() - started
+
+
+def finish_request(stats, route, method, status, response_bytes):
+    """请求结束时结算未读完的语句并写入各项指标"""
+    for cursor in stats.cursors:
+        cursor.finish_statement()
+    stats.cursors = []
+    REQUESTS.inc(route, method, str(status))
+    REQUEST_SECONDS.observe(time.perf_counter() - stats.started, route, method)
+    SQL_SECONDS.observe(stats.sql_seconds, route)
+    SERIALIZE_SECONDS.observe(stats.serialize_seconds, route)
+    if response_bytes is not None:
+        RESPONSE_BYTES.observe(response_bytes, route)
+    SQL_STATEMENTS.inc(route, amount=stats.statements)
+    SQL_ROWS.inc(route, amount=stats.rows)
+    SLOW_QUERIES.inc(route, amount=stats.slow_queries)
+
+
+def profiling_requested(headers):
+    """请求头 X-Profile 与 PROFILE_TOKEN 相同时开启采样（未设置 PROFILE_TOKEN 则始终关闭）"""
+    value = headers.get(PROFILE_HEADER, '')
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(value.encode(), PROFILE_TOKEN.encode())
+
+
+class StackSampler(threading.Thread):
+    """定时采集目标线程的调用栈，按 folded stack 格式（根;...;叶 次数）汇总"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL_MS / 1000):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+    def write(self, route):
+        """写入 PROFILE_DIR，返回文件路径"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', route).strip('_') or 'root'
+        path = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{name}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+加权综合排名与分面计数
+评分矩阵按数据库版本缓存在内存中；排名时用 NumPy 对整列做标准化与加权求和，
+再以 np.partition 选出 top-k 候选，不再为每个请求执行 SQL 排序；
+分面计数把筛选条件表示为按行位置的布尔掩码，组合后用 bincount / unique 一次计数
+"""
+
+import threading
+
+import numpy as np
+
+# 可参与排名的评分维度（白名单）：名称 -> 列名
+SCORE_COLUMNS = {
+    'novelty': 'novelty_score',
+    'significance': 'significance_score',
+    'soundness': 'soundness_score',
+    'feasibility': 'feasibility_score',
+    'overall_winner': 'overall_winner_score'
+}
+
+# 标准化方式：none 使用原始评分；global / strategy / topic 在全体或各分组内计算 z-score
+NORMALIZATIONS = ('none', 'global', 'strategy', 'topic')
+
+# 评分矩阵只读取覆盖索引 idx_hypothesis_facets 中的列，不访问存放JSON的表行
+MATRIX_QUERY = f'''
+    SELECT h.id, h.topic, h.sub_topic, h.strategy,
+           {', '.join(f'h.{column}' for column in SCORE_COLUMNS.values())}
+    FROM hypothesis h
+'''
+
+_matrix_cache = {}
+_matrix_lock = threading.Lock()
+
+
+class ScoreMatrix:
+    """
+    全部假设的评分矩阵（按 id 升序），缺失评分为 NaN；
+    同时保存主题、子主题与策略列，供分组标准化与分面计数使用
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.topics = np.array([row[1] for row in rows], dtype=np.int64)
+        self.sub_topics = np.array([-1 if row[2] is None else row[2] for row in rows], dtype=np.int64)
+        self.strategy_labels, strategy_codes = np.unique(
+            np.array([row[3] or '' for row in rows], dtype=object), return_inverse=True)
+        self.strategies = strategy_codes.astype(np.int64)
+        self.groups = {
+            'global': np.zeros(len(rows), dtype=np.int64),
+            'topic': self.topics,
+            'strategy': self.strategies,
+        }
+        self.scores = np.array(
+            [[np.nan if value is None else value for value in row[4:]] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(SCORE_COLUMNS))
+        self._normalized = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, ids):
+        """id 集合对应的布尔掩码（按矩阵行位置）；None 表示全部"""
+        if ids is None:
+            return np.ones(len(self.ids), dtype=bool)
+        return np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+
+    def score_column(self, column):
+        return self.scores[:, list(SCORE_COLUMNS.values()).index(column)]
+
+    def strategy_mask(self, strategies):
+        return np.isin(self.strategy_labels[self.strategies], list(strategies))
+
+    def range_mask(self, column, minimum=None, maximum=None):
+        """评分范围掩码，缺失评分不满足任何范围条件"""
+        score = self.score_column(column)
+        mask = ~np.isnan(score)
+        if minimum is not None:
+            mask &= score >= minimum
+        if maximum is not None:
+            mask &= score <= maximum
+        return mask
+
+    def count_by_strategy(self, mask):
+        counts = np.bincount(self.strategies[mask], minlength=len(self.strategy_labels))
+        return [{'value': label or None, 'count': int(count)}
+                for label, count in zip(self.strategy_labels, counts) if count]
+
+    def count_by_topic(self, mask):
+        values, counts = np.unique(self.topics[mask], return_counts=True)
+        return [{'value': int(value), 'count': int(count)} for value, count in zip(values, counts)]
+
+    def count_by_subtopic(self, mask):
+        pairs = np.stack([self.topics[mask], self.sub_topics[mask]], axis=1)
+        if not len(pairs):
+            return []
+        values, counts = np.unique(pairs, axis=0, return_counts=True)
+        return [{'topic': int(topic), 'sub_topic': int(sub_topic), 'count': int(count)}
+                for (topic, sub_topic), count in zip(values, counts)]
+
+    def histogram(self, column, mask, bucket_size):
+        """等宽分桶计数：桶下界为 bucket_size 的整数倍，返回 (桶列表, 缺失评分数)"""
+        score = self.score_column(column)[mask]
+        present = ~np.isnan(score)
+        lower = np.floor(score[present] / bucket_size) * bucket_size
+        values, counts = np.unique(lower, return_counts=True)
+        buckets = [{'min': float(value), 'max': float(value + bucket_size), 'count': int(count)}
+                   for value, count in zip(values, counts)]
+        return buckets, int((~present).sum())
+
+    def normalized(self, normalize):
+        """按分组计算 z-score（忽略缺失值；组内标准差为0时记为0），结果缓存在矩阵上"""
+        if normalize == 'none':
+            return self.scores
+        if normalize not in self._normalized:
+            _, group = np.unique(self.groups[normalize], return_inverse=True)
+            present = ~np.isnan(self.scores)
+            values = np.where(present, self.scores, 0.0)
+            count = np.zeros((group.max() + 1 if len(group) else 0, self.scores.shape[1]))
+            total = np.zeros_like(count)
+            squares = np.zeros_like(count)
+            np.add.at(count, group, present)
+            np.add.at(total, group, values)
+            np.add.at(squares, group, values * values)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+                std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+                z = (self.scores - mean[group]) / std[group]
+            z[present & ~np.isfinite(z)] = 0.0
+            self._normalized[normalize] = z
+        return self._normalized[normalize]
+
+    def composite(self, weights, normalize='none'):
+        """加权得分；任一参与维度缺失时为 NaN"""
+        scores = self.normalized(normalize)
+        vector = np.zeros(scores.shape[1])
+        for index, name in enumerate(SCORE_COLUMNS):
+            vector[index] = weights.get(name, 0.0)
+        used = vector != 0
+        return scores[:, used] @ vector[used]
+
+
+def parse_weights(text):
+    """
+    解析加权公式，如 "novelty:0.4,feasibility:0.6"，维度名也可写列名（novelty_score）；
+    空字符串返回 None，维度不在白名单内或权重不是有限数值时抛出 ValueError
+    """
+    text = (text or '').strip()
+    if not text:
+        return None
+    columns = {column: name for name, column in SCORE_COLUMNS.items()}
+    weights = {}
+    for term in text.split(','):
+        name, sep, value = term.strip().partition(':')
+        name = columns.get(name.strip(), name.strip())
+        if name not in SCORE_COLUMNS:
+            raise ValueError(f'不支持的评分维度: {name}')
+        try:
+            weight = float(value) if sep else 1.0
+        except ValueError:
+            raise ValueError(f'无效的权重: {term.strip()}')
+        if not np.isfinite(weight):
+            raise ValueError(f'无效的权重: {term.strip()}')
+        weights[name] = weights.get(name, 0.0) + weight
+    if not any(weights.values()):
+        raise ValueError('权重不能全部为0')
+    return weights
+
+
+def parse_normalize(text):
+    normalize = (text or 'none').strip().lower()
+    if normalize not in NORMALIZATIONS:
+        raise ValueError(f"不支持的标准化方式: {normalize}（可选 {', '.join(NORMALIZATIONS)}）")
+    return normalize
+
+
+def get_score_matrix(cursor, generation):
+    """按数据库版本缓存评分矩阵；版本变化（重新导入）后重新加载"""
+    with _matrix_lock:
+        matrix = _matrix_cache.get(generation)
+    if matrix is None:
+        cursor.execute(MATRIX_QUERY)
+        matrix = ScoreMatrix(cursor.fetchall())
+        with _matrix_lock:
+            _matrix_cache.clear()
+            _matrix_cache[generation] = matrix
+    return matrix
+
+
+def rank(matrix, weights, normalize='none', ids=None, descending=True,
+         offset=0, limit=None, include_missing=True):
+    """
+    返回 [(id, 得分)]，按得分排序，得分相同时按 id 同向排序（与列表接口的次级排序一致）
+    ids 为候选集合（筛选结果），None 表示全部；缺失得分排在最后，include_missing=False 时剔除
+    只需要前 offset+limit 名时先用 np.partition 选出候选，再对候选做稳定排序
+    """
+    score = matrix.composite(weights, normalize)
+    candidates = np.arange(len(matrix))
+    if ids is not None:
+        candidates = candidates[matrix.mask(ids)]
+    missing = np.isnan(score[candidates])
+    ranked, rest = candidates[~missing], candidates[missing]
+
+    # 统一转换为“越小越靠前”的键
+    sign = -1.0 if descending else 1.0
+    keys = sign * score[ranked]
+    needed = None if limit is None else offset + limit
+    if needed is not None and 0 < needed < len(ranked):
+        # 第 needed 名的得分为阈值，与阈值并列的全部保留，保证并列时的次序稳定
+        threshold = np.partition(keys, needed - 1)[needed - 1]
+        ranked = ranked[keys <= threshold]
+        keys = keys[keys <= threshold]
+    order = np.lexsort((sign * matrix.ids[ranked], keys))
+    ranked = ranked[order]
+    if include_missing:
+        rest = rest[np.argsort(sign * matrix.ids[rest], kind='stable')]
+        ranked = np.concatenate([ranked, rest])
+    end = None if limit is None else offset + limit
+    selected = ranked[offset:end]
+    return [(int(matrix.ids[i]), None if np.isnan(score[i]) else float(score[i])) for i in selected]
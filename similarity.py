@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+假设相似度索引
+导入后离线构建：对标题与问题陈述计算 TF-IDF 向量，经倒排表求出每个假设的 top-K 相似假设
+（余弦相似度），并按阈值把近似重复的假设合并为簇。结果以 .npy 数组写入磁盘，
+应用启动时以内存映射方式加载，查询时只做数组查找，不再两两比较
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+# 每个假设保存的相似假设数量
+TOP_K = int(os.environ.get('SIMILARITY_TOP_K', 20))
+# 余弦相似度不低于该值的两个假设视为近似重复
+DUPLICATE_THRESHOLD = float(os.environ.get('SIMILARITY_DUPLICATE_THRESHOLD', 0.6))
+# 文档频率超过该比例的词不进入倒排表（几乎每篇都出现，对区分没有帮助）
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+INDEX_FILES = ('ids', 'neighbors', 'scores', 'clusters')
+META_FILE = 'meta.json'
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+a an and are as at be by can for from has have how in into is it its of on or our that the their
+these this to via we what when which while with without
+'''.split())
+
+TEXT_QUERY = '''
+    SELECT h.id, h.title, h.problem_statement
+    FROM hypothesis h
+    ORDER BY h.id
+'''
+
+
+def index_directory(database):
+    """索引目录与数据库文件放在一起：hypothesis_data.db -> hypothesis_data_similarity/"""
+    return f'{os.path.splitext(database)[0]}_similarity'
+
+
+def tokenize(text):
+    """小写单词与相邻词对（二元组），去掉停用词与单字符词"""
+    words = [w for w in TOKEN_RE.findall((text or '').lower()) if len(w) > 1 and w not in STOPWORDS]
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def _tfidf(documents):
+    """
+    返回按词排序的稀疏 TF-IDF 项：(文档下标, 词下标, 权重)，每个文档向量已做 L2 归一化
+    词频取 1 + log(tf)，idf 取平滑形式 log((1 + n) / (1 + df)) + 1
+    """
+    counts = [Counter(tokenize(text)) for text in documents]
+    df = Counter(term for count in counts for term in count)
+    limit = max(2, int(MAX_DOCUMENT_FREQUENCY * len(documents)))
+    vocabulary = {term: index for index, term in enumerate(sorted(t for t, n in df.items() if n <= limit))}
+    n = len(documents)
+    rows, columns, weights = [], [], []
+    for doc, count in enumerate(counts):
+        entries = [(vocabulary[t], (1 + math.log(tf)) * (math.log((1 + n) / (1 + df[t])) + 1))
+                   for t, tf in count.items() if t in vocabulary]
+        norm = math.sqrt(sum(w * w for _, w in entries)) or 1.0
+        for column, weight in entries:
+            rows.append(doc)
+            columns.append(column)
+            weights.append(weight / norm)
+    rows = np.array(rows, dtype=np.int64)
+    columns = np.array(columns, dtype=np.int64)
+    weights = np.array(weights, dtype=np.float64)
+    order = np.argsort(columns, kind='stable')
+    return rows[order], columns[order], weights[order]
+
+
+def _top_neighbors(documents, top_k):
+    """经倒排表逐个文档累加点积，得到每个文档的 top-K 邻居下标与相似度（不足 K 个时补 -1 / 0）"""
+    n = len(documents)
+    rows, columns, weights = _tfidf(documents)
+    # 倒排表：第 t 个词的项位于 [starts[t], starts[t+1])
+    starts = np.searchsorted(columns, np.arange(columns.max() + 2 if len(columns) else 1))
+    # 正排：每个文档的 (词, 权重)
+    by_doc = np.argsort(rows, kind='stable')
+    doc_starts = np.searchsorted(rows[by_doc], np.arange(n + 1))
+
+    neighbors = np.full((n, top_k), -1, dtype=np.int64)
+    scores = np.zeros((n, top_k), dtype=np.float32)
+    for doc in range(n):
+        entries = by_doc[doc_starts[doc]:doc_starts[doc + 1]]
+        if not len(entries):
+            continue
+        postings = [np.arange(starts[columns[e]], starts[columns[e] + 1]) for e in entries]
+        factors = np.concatenate([np.full(len(p), weights[e]) for p, e in zip(postings, entries)])
+        postings = np.concatenate(postings)
+        similarity = np.bincount(rows[postings], weights=weights[postings] * factors, minlength=n)
+        similarity[doc] = 0.0
+        candidates = np.flatnonzero(similarity > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-similarity[candidates], top_k - 1)[:top_k]]
+        # 相似度降序，相同时按下标升序
+        candidates = candidates[np.lexsort((candidates, -similarity[candidates]))]
+        neighbors[doc, :len(candidates)] = candidates
+        scores[doc, :len(candidates)] = np.minimum(similarity[candidates], 1.0)
+    return neighbors, scores
+
+
+def _duplicate_clusters(neighbors, scores, threshold):
+    """相似度不低于阈值的邻居对做并查集合并；返回每个文档的簇编号（单独成簇的为 -1）"""
+    n = len(neighbors)
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for doc, neighbor in zip(*np.nonzero(scores >= threshold)):
+        a, b = find(doc), find(neighbors[doc, neighbor])
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    roots = np.array([find(x) for x in range(n)], dtype=np.int64)
+    labels, inverse, sizes = np.unique(roots, return_inverse=True, return_counts=True)
+    # 只为多于一个成员的根编号，按簇大小降序、最小下标升序
+    multi = np.flatnonzero(sizes > 1)
+    order = multi[np.lexsort((labels[multi], -sizes[multi]))]
+    cluster_of_root = np.full(len(labels), -1, dtype=np.int64)
+    cluster_of_root[order] = np.arange(len(order))
+    return cluster_of_root[inverse]
+
+
+def _write_array(directory, name, array):
+    path = os.path.join(directory, f'{name}.npy')
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def build_index(conn, directory, top_k=TOP_K, threshold=DUPLICATE_THRESHOLD):
+    """从数据库读取标题与问题陈述构建索引并写入 directory；meta.json 最后写入，作为索引完成的标志"""
+    rows = conn.execute(TEXT_QUERY).fetchall()
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    documents = [f'{row[1] or ""} {row[2] or ""}' for row in rows]
+    if len(ids):
+        positions, scores = _top_neighbors(documents, top_k)
+    else:
+        positions, scores = np.zeros((0, top_k), dtype=np.int64), np.zeros((0, top_k), dtype=np.float32)
+    clusters = _duplicate_clusters(positions, scores, threshold)
+
+    os.makedirs(directory, exist_ok=True)
+    for name, array in zip(INDEX_FILES, (ids, positions, scores, clusters)):
+        _write_array(directory, name, array)
+    meta = {
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'hypothesis_count': int(len(ids)),
+        'top_k': top_k,
+        'duplicate_threshold': threshold,
+        'cluster_count': int(clusters.max() + 1) if len(clusters) else 0
+    }
+    tmp = os.path.join(directory, f'{META_FILE}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directory, META_FILE))
+    return meta
+
+
+def index_exists(directory):
+    return os.path.exists(os.path.join(directory, META_FILE))
+
+
+def _cluster_members(labels):
+    """簇编号数组 -> 各簇成员下标列表（按簇编号顺序）"""
+    labels = np.asarray(labels)
+    clustered = np.flatnonzero(labels >= 0)
+    order = clustered[np.argsort(labels[clustered], kind='stable')]
+    count = int(labels.max()) + 1 if len(clustered) else 0
+    starts = np.searchsorted(labels[order], np.arange(count + 1))
+    return [order[starts[c]:starts[c + 1]] for c in range(count)]
+
+
+class SimilarityIndex:
+    """
+    内存映射加载的相似度索引；ids 升序，按二分查找定位行
+    neighbors 保存邻居的行下标（补位为 -1），scores 为对应的余弦相似度（降序）
+    """
+
+    # 非默认阈值的重复簇按阈值缓存的个数
+    CLUSTER_CACHE_SIZE = 8
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in INDEX_FILES}
+        self.ids = arrays['ids']
+        self.neighbors = arrays['neighbors']
+        self.scores = arrays['scores']
+        self.clusters = arrays['clusters']
+        if not (len(self.ids) == len(self.neighbors) == len(self.scores) == len(self.clusters)):
+            raise ValueError('相似度索引文件不一致')
+        self.threshold = self.meta['duplicate_threshold']
+        self._clusters = {self.threshold: _cluster_members(self.clusters)}
+        self._clusters_lock = threading.Lock()
+
+    def position(self, hypothesis_id):
+        index = int(np.searchsorted(self.ids, hypothesis_id))
+        if index < len(self.ids) and self.ids[index] == hypothesis_id:
+            return index
+        return None
+
+    def similar(self, hypothesis_id, limit=10, min_score=0.0):
+        """返回 [(id, 相似度)]；假设不在索引中时返回 None"""
+        index = self.position(hypothesis_id)
+        if index is None:
+            return None
+        result = []
+        for neighbor, score in zip(self.neighbors[index], self.scores[index]):
+            if neighbor < 0 or score < min_score or len(result) >= limit:
+                break
+            result.append((int(self.ids[neighbor]), float(score)))
+        return result
+
+    def duplicate_clusters(self, threshold=None):
+        """
+        近似重复簇（每簇为成员 id 列表，按簇大小降序）
+        默认阈值使用构建时的结果；其他阈值由已保存的 top-K 邻居重新合并，结果按阈值缓存
+        """
+        threshold = self.threshold if threshold is None else float(threshold)
+        with self._clusters_lock:
+            members = self._clusters.get(threshold)
+        if members is None:
+            labels = _duplicate_clusters(np.asarray(self.neighbors), np.asarray(self.scores), threshold)
+            members = _cluster_members(labels)
+            with self._clusters_lock:
+                if len(self._clusters) > self.CLUSTER_CACHE_SIZE:
+                    self._clusters = {self.threshold: self._clusters[self.threshold]}
+                self._clusters[threshold] = members
+        return [[int(self.ids[i]) for i in cluster] for cluster in members]
+
+    def cluster_of(self, hypothesis_id):
+        """构建时阈值下所在的重复簇编号；不属于任何簇时返回 None"""
+        index = self.position(hypothesis_id)
+        if index is None or self.clusters[index] < 0:
+            return None
+        return int(self.clusters[index])
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_index(directory):
+    """按 meta.json 的修改时间缓存已加载的索引，重新构建后自动重新加载；索引不存在时返回 None"""
+    try:
+        stamp = os.stat(os.path.join(directory, META_FILE)).st_mtime_ns
+    except OSError:
+        return None
+    with _loaded_lock:
+        cached = _loaded.get(directory)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    index = SimilarityIndex(directory)
+    with _loaded_lock:
+        _loaded[directory] = (stamp, index)
+    return index
+
+
+def unload_index(directory):
+    """释放已加载的索引（切换到新快照后，旧快照的索引不再使用）"""
+    with _loaded_lock:
+        _loaded.pop(directory, None)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求合并（single-flight）
+同一 worker 进程内，相同的未命中请求同时只由一个线程计算，其余线程等待它写入响应缓存后直接读取；
+配置共享目录时，各 worker 进程再通过文件锁选出一个计算者，结果写入共享目录供其他进程读取，
+大量相同请求同时到达时只执行一次查询
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 flock，只能使用进程内的请求合并
+    fcntl = None
+
+# 等待进程间锁时的轮询间隔（秒）
+LOCK_POLL_SECONDS = 0.01
+
+
+class Flight:
+    """一次进行中的计算：计算者完成后调用 finish()，等待者用 wait() 等待"""
+
+    def __init__(self, group, key):
+        self.group = group
+        self.key = key
+        self.lock = None
+        self._done = threading.Event()
+
+    def wait(self, timeout):
+        return self._done.wait(timeout)
+
+    def finish(self):
+        """计算结束（无论结果是否写入缓存）：释放进程间锁并唤醒等待者；可重复调用"""
+        if self.lock is not None:
+            self.lock.release()
+            self.lock = None
+        self.group._remove(self)
+        self._done.set()
+
+
+class SingleFlight:
+    """进程内的请求合并：按键登记进行中的计算"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        """返回 (flight, 是否为计算者)：计算者完成后调用 flight.finish()，其余调用方 flight.wait()"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight(self, key)
+            return flight, True
+
+    def _remove(self, flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def __len__(self):
+        return len(self._flights)
+
+
+class FileLock:
+    def __init__(self, fd):
+        self.fd = fd
+
+    def release(self):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+class SharedStore:
+    """
+    worker 进程之间共享的响应存储：<目录>/<命名空间>/<键摘要> 每个响应一个文件（元数据行 + 响应体），
+    写入临时文件后原子替换；<键摘要>.lock 上的 flock 用于在进程之间选出计算者。
+    命名空间对应一个数据库快照，切换快照后整个目录删除
+    """
+
+    def __init__(self, directory):
+        if fcntl is None:
+            raise RuntimeError('共享响应存储需要 fcntl.flock，当前平台不支持')
+        self.directory = directory
+
+    def _path(self, namespace, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, namespace, digest)
+
+    def get(self, namespace, key):
+        """读取 (响应体, mimetype, etag)；不存在或文件不完整时返回 None"""
+        try:
+            with open(self._path(namespace, key), 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return body, header['mimetype'], header['etag']
+
+    def put(self, namespace, key, body, mimetype, etag):
+        """写入响应；磁盘写入失败时放弃（只影响共享，不影响本进程缓存）"""
+        path = self._path(namespace, key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(json.dumps({'mimetype': mimetype, 'etag': etag}).encode('utf-8') + b'\n')
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def lock(self, namespace, key, timeout):
+        """获取该键的进程间锁，最多等待 timeout 秒；超时或无法创建锁文件时返回 None"""
+        path = f'{self._path(namespace, key)}.lock'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+        except OSError:
+            return None
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return FileLock(fd)
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    return None
+                time.sleep(LOCK_POLL_SECONDS)
+
+    def drop(self, namespace):
+        """删除一个命名空间（旧快照）的全部响应"""
+        shutil.rmtree(os.path.join(self.directory, namespace), ignore_errors=True)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库快照
+每次导入都写入一个新的只读快照 snapshots/<名称>.<代号>.db（相似度索引放在快照旁），
+完成后用 os.replace 原子替换指针：hypothesis_data.db 本身是指向当前快照的符号链接。
+读取方每次请求解析指针，发现新代号后切换到新快照；已发布的快照不再被改写，
+因此读取期间不会看到导入中的半成品，也不需要重启 worker
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+
+import similarity
+
+SNAPSHOT_DIR = 'snapshots'
+# 保留的快照代数（含当前快照）；更早的快照在发布新快照后删除
+SNAPSHOT_KEEP = int(os.environ.get('SNAPSHOT_KEEP', 2))
+
+
+def snapshot_directory(database):
+    """快照目录与数据库指针放在一起：hypothesis_data.db -> snapshots/"""
+    return os.path.join(os.path.dirname(database), SNAPSHOT_DIR)
+
+
+def _name(database):
+    return os.path.splitext(os.path.basename(database))[0]
+
+
+def _generation_re(database):
+    return re.compile(rf'^{re.escape(_name(database))}\.(\d+)\.db$')
+
+
+def resolve(database):
+    """指针指向的当前快照路径；数据库不是快照指针（旧版原地导入的文件）时返回其本身"""
+    try:
+        target = os.readlink(database)
+    except OSError:
+        return database
+    return os.path.join(os.path.dirname(database), target)
+
+
+def is_snapshot(path):
+    """是否为已发布的快照文件（只读，可用 immutable=1 打开）"""
+    return os.path.basename(os.path.dirname(path)) == SNAPSHOT_DIR
+
+
+def generations(database):
+    """已有的快照 [(代号, 路径)]，按代号升序"""
+    directory = snapshot_directory(database)
+    pattern = _generation_re(database)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def create(database):
+    """
+    新建下一代快照：用 SQLite 在线备份复制当前快照（旧版数据库的WAL内容一并复制），
+    并复制其相似度索引；数据库尚不存在时返回空文件路径
+    """
+    existing = generations(database)
+    generation = existing[-1][0] + 1 if existing else 1
+    directory = snapshot_directory(database)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{_name(database)}.{generation:06d}.db')
+
+    if os.path.exists(database):
+        source = resolve(database)
+        src = sqlite3.connect(f'file:{os.path.abspath(source)}?mode=ro', uri=True)
+        dst = sqlite3.connect(path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        index = similarity.index_directory(source)
+        if similarity.index_exists(index):
+            shutil.copytree(index, similarity.index_directory(path))
+    return path
+
+
+def discard(path):
+    """删除未发布（或已过期）的快照及其相似度索引"""
+    for name in (path, f'{path}-journal', f'{path}-wal', f'{path}-shm'):
+        if os.path.exists(name):
+            os.remove(name)
+    shutil.rmtree(similarity.index_directory(path), ignore_errors=True)
+
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def publish(database, path):
+    """
+    发布快照：先落盘，再原子替换指针；替换旧版数据库文件时一并清理它的WAL与相似度索引。
+    替换前已打开的连接仍读取旧快照，直到读取方切换
+    """
+    _fsync(path)
+    legacy = os.path.exists(database) and not os.path.islink(database)
+    pointer = f'{database}.{os.getpid()}.tmp'
+    if os.path.lexists(pointer):
+        os.remove(pointer)
+    os.symlink(os.path.relpath(path, os.path.dirname(database) or '.'), pointer)
+    os.replace(pointer, database)
+    _fsync(os.path.dirname(os.path.abspath(database)))
+
+    if legacy:
+        for name in (f'{database}-wal', f'{database}-shm'):
+            if os.path.exists(name):
+                os.remove(name)
+        shutil.rmtree(similarity.index_directory(database), ignore_errors=True)
+    prune(database)
+
+
+def prune(database, keep=SNAPSHOT_KEEP):
+    """删除当前快照之前超出保留代数的快照，以及比当前快照更早、从未发布的快照"""
+    current = resolve(database)
+    existing = generations(database)
+    current_generation = next((generation for generation, path in existing if path == current), None)
+    if current_generation is None:
+        return
+    older = [path for generation, path in existing if generation < current_generation]
+    for path in older[:max(len(older) - (keep - 1), 0)]:
+        discard(path)
+
+
+def update(database, apply):
+    """
+    在下一代快照上执行 apply(path)：返回 True 时发布该快照，返回 False（没有变化）或出错时丢弃。
+    返回发布的快照路径，未发布时返回 None
+    """
+    path = create(database)
+    try:
+        changed = apply(path)
+    except BaseException:
+        discard(path)
+        raise
+    if not changed:
+        discard(path)
+        return None
+    publish(database, path)
+    return path
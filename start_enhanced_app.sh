@@ -33,17 +33,11 @@ if ! pip show openpyxl > /dev/null 2>&1; then
     pip install openpyxl
 fi
 
-# 检查数据库文件
-if [ ! -f "hypothesis_data.db" ]; then
-    echo "❌ 数据库文件不存在！"
-    echo "请先运行数据库创建脚本："
-    echo "python3 recreate_hypothesis_table.py"
-    echo ""
-    echo "或者检查以下文件是否存在："
-    echo "- hypothesis_data.db"
-    echo "- literature_agent 表"
-    echo "- analyzer_agent 表"
-    echo "- hypothesis 表"
+# 增量构建数据库（仅重新导入发生变化的主题目录）
+echo "🔄 同步数据库..."
+if ! python3 ingest_data.py; then
+    echo "❌ 数据导入失败！"
+    echo "请检查 data/ 目录，或运行 python3 ingest_data.py --force 重新导入"
     exit 1
 fi
 
@@ -12,6 +12,14 @@ class HypothesisApp {
         this.perPage = 20;
         this.viewMode = 'grid';
         this.selectedStrategies = [];
+        // Recently used hypothesis details (LRU), cleared when the list filters change
+        this.detailCache = new Map();
+        this.detailCacheSize = 50;
+        this.detailCacheQuery = null;
+        // Cards hovered in quick succession are prefetched together in one batch request
+        this.prefetchQueue = new Set();
+        this.prefetchLimit = 8;
+        this.prefetchTimer = null;
         this.init();
     }
 
@@ -251,13 +259,19 @@ class HypothesisApp {
 
     async loadTopics() {
         try {
-            const response = await fetch('/api/topics');
+            // One request for the whole navigation tree (skeleton fields only)
+            const response = await fetch('/api/tree');
             const topics = await response.json();
             
             if (topics.error) {
                 throw new Error(topics.error);
             }
             
+            this.topicTree = {};
+            topics.forEach(topic => {
+                this.topicTree[topic.id] = topic.subtopics;
+            });
+            
             this.renderTopics(topics);
             
         } catch (error) {
@@ -265,67 +279,36 @@ class HypothesisApp {
         }
     }
 
-    async renderTopics(topics) {
+    renderTopics(topics) {
         const container = document.getElementById('topics-tree');
-        container.innerHTML = '';
+        let html = '';
         
         for (const topic of topics) {
-            try {
-                // Get subtopic titles for this topic
-                const subtopicResponse = await fetch(`/api/subtopics/${topic.id}`);
-                const subtopics = await subtopicResponse.json();
-                
-                let displayTitle = `Topic ${topic.id}`;
-                let originalTitle = topic.title || `Topic ${topic.id}`;
-                
-                if (subtopics && subtopics.length > 0) {
-                    displayTitle = subtopics[0].title || `Topic ${topic.id}`;
-                }
-                
-                const topicHtml = `
-                    <div class="topic-item mb-3">
-                        <div class="topic-header" onclick="app.toggleTopic(${topic.id})">
-                            <div class="topic-icon">
-                                <i class="bi bi-chevron-right" id="topic-icon-${topic.id}"></i>
-                    </div>
-                            <div class="topic-title-container">
-                                <div class="topic-main-title">${displayTitle}</div>
-                                <div class="topic-subtitle">${originalTitle}</div>
-                            </div>
+            const subtopics = topic.subtopics || [];
+            const originalTitle = topic.title || `Topic ${topic.id}`;
+            const displayTitle = (subtopics.length > 0 && subtopics[0].title) || `Topic ${topic.id}`;
+            
+            html += `
+                <div class="topic-item mb-3">
+                    <div class="topic-header" onclick="app.toggleTopic(${topic.id})">
+                        <div class="topic-icon">
+                            <i class="bi bi-chevron-right" id="topic-icon-${topic.id}"></i>
                         </div>
-                        <div class="topic-content" id="topic-content-${topic.id}" style="display: none;">
-                            <div class="subtopics-container" id="subtopics-${topic.id}">
-                                <!-- Subtopics will be loaded here -->
+                        <div class="topic-title-container">
+                            <div class="topic-main-title">${displayTitle}</div>
+                            <div class="topic-subtitle">${originalTitle}</div>
                         </div>
                     </div>
-                </div>
-            `;
-                
-                container.innerHTML += topicHtml;
-            } catch (error) {
-                console.error(`Failed to load subtopics for topic ${topic.id}:`, error);
-                // Fallback: render topic without subtopics
-                const topicHtml = `
-                    <div class="topic-item mb-3">
-                        <div class="topic-header" onclick="app.toggleTopic(${topic.id})">
-                            <div class="topic-icon">
-                                <i class="bi bi-chevron-right" id="topic-icon-${topic.id}"></i>
-                            </div>
-                            <div class="topic-title-container">
-                                <div class="topic-main-title">Topic ${topic.id}</div>
-                                <div class="topic-subtitle">${topic.title || `Topic ${topic.id}`}</div>
-                            </div>
-                        </div>
-                        <div class="topic-content" id="topic-content-${topic.id}" style="display: none;">
-                            <div class="subtopics-container" id="subtopics-${topic.id}">
-                                <!-- Subtopics will be loaded here -->
-                            </div>
+                    <div class="topic-content" id="topic-content-${topic.id}" style="display: none;">
+                        <div class="subtopics-container" id="subtopics-${topic.id}">
+                            <!-- Subtopics will be loaded here -->
                         </div>
                     </div>
-                `;
-                container.innerHTML += topicHtml;
-            }
+                </div>
+            `;
         }
+        
+        container.innerHTML = html;
     }
 
     async toggleTopic(topicId) {
@@ -344,11 +327,17 @@ class HypothesisApp {
 
     async loadSubtopics(topicId) {
         try {
-            const response = await fetch(`/api/subtopics/${topicId}`);
-            const subtopics = await response.json();
+            let subtopics = this.topicTree && this.topicTree[topicId];
             
-            if (subtopics.error) {
-                throw new Error(subtopics.error);
+            if (!subtopics) {
+                const response = await fetch(`/api/tree?topic=${topicId}`);
+                const topics = await response.json();
+                
+                if (topics.error) {
+                    throw new Error(topics.error);
+                }
+                
+                subtopics = topics.length > 0 ? topics[0].subtopics : [];
             }
             
             this.renderSubtopics(topicId, subtopics);
@@ -358,51 +347,28 @@ class HypothesisApp {
         }
     }
 
-        renderSubtopics(topicId, subtopics) {
+    renderSubtopics(topicId, subtopics) {
         const container = document.getElementById(`subtopics-${topicId}`);
         if (!container) return;
         
-        // 获取literature_agent数据来显示category
-        this.loadSubtopicCategories(topicId, subtopics, container);
-    }
-
-    async loadSubtopicCategories(topicId, subtopics, container) {
         let html = '';
         
-        for (let index = 0; index < subtopics.length; index++) {
-            try {
-                const response = await fetch(`/api/literature_agent/${topicId}/${index}`);
-                const literatureData = await response.json();
-                
-                html += `
-                    <div class="subtopic-item mb-2">
-                        <div class="subtopic-header" onclick="app.handleSubtopicClick(${topicId}, ${index})">
-                            <div class="subtopic-icon">
-                                <i class="bi bi-lightbulb text-warning"></i>
-                            </div>
-                            <div class="subtopic-content">
-                                <div class="subtopic-title">${subtopics[index].title || `Subtopic ${index}`}</div>
-                                ${literatureData.topic_category ? `<div class="subtopic-category">${literatureData.topic_category}</div>` : ''}
-                            </div>
+        subtopics.forEach(subtopic => {
+            const index = subtopic.index;
+            html += `
+                <div class="subtopic-item mb-2">
+                    <div class="subtopic-header" onclick="app.handleSubtopicClick(${topicId}, ${index})">
+                        <div class="subtopic-icon">
+                            <i class="bi bi-lightbulb text-warning"></i>
                         </div>
-                    </div>
-                `;
-            } catch (error) {
-                console.error(`Error loading category for subtopic ${index}:`, error);
-                html += `
-                    <div class="subtopic-item mb-2">
-                        <div class="subtopic-header" onclick="app.handleSubtopicClick(${topicId}, ${index})">
-                            <div class="subtopic-icon">
-                                <i class="bi bi-lightbulb text-warning"></i>
-                            </div>
-                            <div class="subtopic-content">
-                                <div class="subtopic-title">${subtopics[index].title || `Subtopic ${index}`}</div>
-                            </div>
+                        <div class="subtopic-content">
+                            <div class="subtopic-title">${subtopic.title || `Subtopic ${index}`}</div>
+                            ${subtopic.category ? `<div class="subtopic-category">${subtopic.category}</div>` : ''}
                         </div>
                     </div>
-                `;
-            }
-        }
+                </div>
+            `;
+        });
         
         container.innerHTML = html;
     }
@@ -493,8 +459,13 @@ class HypothesisApp {
         try {
             console.log(`🔍 Loading subtopic details for Topic ${topicId}, Subtopic ${subtopicIndex}`);
             
-            // Load description and search_queries from literature_agent table
-            const literatureResponse = await fetch(`/api/literature_agent/${topicId}/${subtopicIndex}`);
+            // Load description/search_queries (literature_agent) and current analysis
+            // (analyzer_agent) concurrently instead of one after the other
+            const [literatureResponse, analysisResponse] = await Promise.all([
+                fetch(`/api/literature_agent/${topicId}/${subtopicIndex}`),
+                fetch(`/api/analyzer_analysis/${topicId}/${subtopicIndex}`)
+            ]);
+            
             if (literatureResponse.ok) {
                 const literatureData = await literatureResponse.json();
                 this.renderSubtopicKeywords(topicId, subtopicIndex, literatureData);
@@ -502,8 +473,6 @@ class HypothesisApp {
                 console.warn('⚠️ Failed to load literature agent data');
             }
             
-            // Load current analysis from analyzer_agent table
-            const analysisResponse = await fetch(`/api/analyzer_analysis/${topicId}/${subtopicIndex}`);
             if (analysisResponse.ok) {
                 const analysisData = await analysisResponse.json();
                 this.renderCurrentAnalysis(topicId, subtopicIndex, analysisData);
@@ -695,6 +664,7 @@ class HypothesisApp {
             params.append('topic', this.currentTopic);
             params.append('subtopic', this.currentSubtopic);
             params.append('category', 0); // 添加category参数
+            params.append('preview', 'true'); // 列表只需要标题与评分，详情按需加载
             
             // Add strategy parameters
             selectedStrategies.forEach(strategy => {
@@ -702,6 +672,7 @@ class HypothesisApp {
             });
 
             console.log('🔍 Fetching from URL:', `/api/hypotheses?${params.toString()}`);
+            this.resetDetailCache(params);
             
             const response = await fetch(`/api/hypotheses?${params.toString()}`);
             
@@ -768,93 +739,43 @@ class HypothesisApp {
             let title = '';
             let scores = {};
             
+            // preview 模式下标题由服务端提取
+            if (hypothesis.title) {
+                title = hypothesis.title;
+            }
+            
             // 尝试从hypothesis_content中获取标题
-            if (hypothesis.hypothesis_content) {
+            if (!title && hypothesis.hypothesis_content) {
                 try {
                     const content = typeof hypothesis.hypothesis_content === 'string' 
                         ? JSON.parse(hypothesis.hypothesis_content) 
                         : hypothesis.hypothesis_content;
                     
-                    console.log('🔍 Parsed content:', content);
-                    console.log('🔍 Content scores:', content.scores);
-                    
-                    // 获取标题
                     title = content.title || content.hypothesis_title || content.hypothesis || `Hypothesis ${index + 1}`;
-                    
-                    // 获取分数
-                    if (content.scores) {
-                        scores = {
-                            novelty_score: content.scores.novelty_score || content.scores.novelty || 'N/A',
-                            significance_score: content.scores.significance_score || content.scores.significance || 'N/A',
-                            soundness_score: content.scores.soundness_score || content.scores.soundness || 'N/A',
-                            feasibility_score: content.scores.feasibility_score || content.scores.feasibility || 'N/A',
-                            overall_score: content.scores.overall_score || content.scores.overall || content.scores.overall_winner || 'N/A'
-                        };
-                        console.log('🔍 Extracted scores from content:', scores);
-                    } else {
-                        console.log('🔍 No scores found in content.scores');
-                    }
-                    
-                    // 如果从hypothesis_content中没有获取到分数，尝试从API返回的scores字段获取
-                    if (Object.keys(scores).length === 0 || Object.values(scores).every(score => score === 'N/A')) {
-                        console.log('🔍 Trying to get scores from API scores field');
-                        if (hypothesis.scores) {
-                            scores = {
-                                novelty_score: hypothesis.scores.novelty_score || hypothesis.scores.novelty || 'N/A',
-                                significance_score: hypothesis.scores.significance_score || hypothesis.scores.significance || 'N/A',
-                                soundness_score: hypothesis.scores.soundness_score || hypothesis.scores.soundness || 'N/A',
-                                feasibility_score: hypothesis.scores.feasibility_score || hypothesis.scores.feasibility || 'N/A',
-                                overall_score: hypothesis.scores.overall_score || hypothesis.scores.overall || hypothesis.scores.overall_winner || 'N/A'
-                            };
-                            console.log('🔍 Extracted scores from API scores field:', scores);
-                        }
-                    }
                 } catch (e) {
                     console.warn('Failed to parse hypothesis content:', e);
                     title = `Hypothesis ${index + 1}`;
                 }
-            } else {
-                console.log('🔍 No hypothesis_content found');
             }
             
-            // 如果从hypothesis_content中没有获取到分数，尝试从数据库字段获取
-            if (Object.keys(scores).length === 0 || Object.values(scores).every(score => score === 'N/A')) {
-                console.log('🔍 Falling back to database fields');
-                scores = {
-                    novelty_score: hypothesis.novelty_score || 'N/A',
-                    significance_score: hypothesis.significance_score || 'N/A',
-                    soundness_score: hypothesis.soundness_score || 'N/A',
-                    feasibility_score: hypothesis.feasibility_score || 'N/A',
-                    overall_score: hypothesis.overall_winner_score || 'N/A'
-                };
-                console.log('🔍 Database scores:', scores);
-            }
+            // 获取分数：列表接口返回 scores.{novelty, ...}（preview 模式下只有该字段），其次为数据库列
+            const apiScores = hypothesis.scores || {};
+            scores = {
+                novelty_score: apiScores.novelty || hypothesis.novelty_score || 'N/A',
+                significance_score: apiScores.significance || hypothesis.significance_score || 'N/A',
+                soundness_score: apiScores.soundness || hypothesis.soundness_score || 'N/A',
+                feasibility_score: apiScores.feasibility || hypothesis.feasibility_score || 'N/A',
+                overall_score: apiScores.overall_winner || hypothesis.overall_winner_score || 'N/A'
+            };
             
             // 如果还是没有标题，使用默认标题
             if (!title) {
                 title = `Hypothesis ${index + 1}`;
             }
 
-            // 详细调试信息
-            console.log('🔍 Hypothesis data:', {
-                id: hypothesis.id,
-                title: title,
-                hypothesis_content: hypothesis.hypothesis_content ? 'EXISTS' : 'NULL',
-                hypothesis_content_type: typeof hypothesis.hypothesis_content,
-                parsed_scores: scores,
-                db_scores: {
-                    novelty_score: hypothesis.novelty_score,
-                    significance_score: hypothesis.significance_score,
-                    soundness_score: hypothesis.soundness_score,
-                    feasibility_score: hypothesis.feasibility_score,
-                    overall_winner_score: hypothesis.overall_winner_score
-                },
-                raw_hypothesis: hypothesis
-            });
-
             html += `
                 <div class="col-lg-6 col-xl-4 mb-4">
-                    <div class="hypothesis-card">
+                    <div class="hypothesis-card" onmouseenter="app.queueHypothesisPrefetch(${hypothesis.id})">
                         <div class="hypothesis-header">
                             <h6 class="hypothesis-title">${title}</h6>
                             <div class="hypothesis-meta">
@@ -887,7 +808,7 @@ class HypothesisApp {
                         </div>
                         
                         <div class="hypothesis-actions">
-                            <button class="btn btn-primary btn-sm" onclick="app.showHypothesisModal(${JSON.stringify(hypothesis).replace(/"/g, '&quot;')})">
+                            <button class="btn btn-primary btn-sm" onclick="app.showHypothesisDetails(${hypothesis.id})">
                                 <i class="bi bi-eye"></i> View Details
                             </button>
                         </div>
@@ -905,29 +826,89 @@ class HypothesisApp {
         console.log('✅ Hypotheses rendered successfully');
     }
 
+    resetDetailCache(params) {
+        // Details are cached per list query (filters, sort, model); paging keeps them
+        const query = new URLSearchParams(params);
+        query.delete('page');
+        const key = query.toString();
+        if (key !== this.detailCacheQuery) {
+            this.detailCacheQuery = key;
+            this.detailCache.clear();
+            this.prefetchQueue.clear();
+        }
+    }
+
+    getCachedHypothesisDetail(id) {
+        const hypothesis = this.detailCache.get(id);
+        if (hypothesis) {
+            // Move to the most recently used position
+            this.detailCache.delete(id);
+            this.detailCache.set(id, hypothesis);
+        }
+        return hypothesis;
+    }
+
+    cacheHypothesisDetail(id, hypothesis) {
+        this.detailCache.delete(id);
+        this.detailCache.set(id, hypothesis);
+        while (this.detailCache.size > this.detailCacheSize) {
+            this.detailCache.delete(this.detailCache.keys().next().value);
+        }
+    }
+
+    async fetchHypothesisDetailsBatch(ids) {
+        // One request for several cards instead of one /api/hypothesis/<id> round trip each
+        const sorted = [...ids].sort((a, b) => a - b);
+        const response = await fetch(`/api/hypotheses/batch?ids=${sorted.join(',')}`);
+
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+
+        const data = await response.json();
+
+        if (data.error) {
+            throw new Error(data.error);
+        }
+
+        data.ids.forEach((id, index) => {
+            if (data.hypotheses[index]) {
+                this.cacheHypothesisDetail(id, data.hypotheses[index]);
+            }
+        });
+        return data;
+    }
+
+    queueHypothesisPrefetch(id) {
+        if (this.detailCache.has(id) || this.prefetchQueue.size >= this.prefetchLimit) {
+            return;
+        }
+        this.prefetchQueue.add(id);
+
+        clearTimeout(this.prefetchTimer);
+        this.prefetchTimer = setTimeout(() => {
+            const ids = [...this.prefetchQueue];
+            this.prefetchQueue.clear();
+            this.fetchHypothesisDetailsBatch(ids).catch(error => {
+                console.warn('⚠️ Failed to prefetch hypothesis details:', error);
+            });
+        }, 150);
+    }
+
     async showHypothesisDetails(hypothesisId) {
         try {
-            // Try different API endpoints
-            let response = await fetch(`/api/hypothesis/${hypothesisId}`);
-            
-            if (!response.ok) {
-                // Fallback to another endpoint
-                response = await fetch(`/api/hypotheses?hypothesis_id=${hypothesisId}`);
-            }
-            
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            let hypothesis = this.getCachedHypothesisDetail(hypothesisId);
+
+            if (!hypothesis) {
+                // Resolves both row ids and hypothesis_id values, like /api/hypothesis/<id>
+                await this.fetchHypothesisDetailsBatch([hypothesisId]);
+                hypothesis = this.getCachedHypothesisDetail(hypothesisId);
             }
-            
-            const data = await response.json();
-            
-            if (data.error) {
-                throw new Error(data.error);
+
+            if (!hypothesis) {
+                throw new Error('Hypothesis not found');
             }
             
-            // Handle different data formats
-            const hypothesis = Array.isArray(data) ? data[0] : data;
-            
             this.showHypothesisModal(hypothesis);
             
         } catch (error) {
@@ -1517,6 +1498,7 @@ class HypothesisApp {
             });
             
             console.log('🔍 Sending request:', params.toString());
+            this.resetDetailCache(params);
             
             const response = await fetch(`/api/hypotheses?${params.toString()}`);
             const data = await response.json();
@@ -17,6 +17,14 @@ class SortingApp {
         this.currentPage = 1;
         this.perPage = 20;
         this.viewMode = 'grid';
+        // 最近查看的假设详情（LRU），筛选或排序条件变化时清空
+        this.detailCache = new Map();
+        this.detailCacheSize = 50;
+        this.detailCacheQuery = null;
+        // 短时间内悬停过的卡片合并为一次批量请求预取
+        this.prefetchQueue = new Set();
+        this.prefetchLimit = 8;
+        this.prefetchTimer = null;
         this.init();
     }
 
@@ -51,7 +59,9 @@ class SortingApp {
             console.log('🚀 Loading all hypotheses...');
             
             // 获取所有假设数据
-            const response = await fetch('/api/hypotheses?per_page=100');
+            const params = new URLSearchParams({ per_page: 100, preview: 'true' });
+            this.resetDetailCache(params);
+            const response = await fetch(`/api/hypotheses?${params}`);
             const data = await response.json();
             
             if (data.error) {
@@ -185,10 +195,10 @@ class SortingApp {
         
         let html = '<div class="row">';
         hypotheses.forEach(hypothesis => {
-            // 获取假设的title，优先从hypothesis_content中解析
-            let hypothesisTitle = 'Hypothesis #' + hypothesis.hypothesis_id;
+            // 获取假设的title：preview 模式下由服务端提取，否则从hypothesis_content中解析
+            let hypothesisTitle = hypothesis.title || 'Hypothesis #' + hypothesis.hypothesis_id;
             try {
-                if (hypothesis.hypothesis_content) {
+                if (!hypothesis.title && hypothesis.hypothesis_content) {
                     const content = JSON.parse(hypothesis.hypothesis_content);
                     if (content.title) {
                         hypothesisTitle = content.title;
@@ -200,7 +210,7 @@ class SortingApp {
             
             html += `
                 <div class="col-lg-6 col-xl-4 mb-4">
-                    <div class="card hypothesis-card h-100">
+                    <div class="card hypothesis-card h-100" onmouseenter="sortingApp.queueHypothesisPrefetch(${hypothesis.id})">
                         <div class="card-header d-flex justify-content-between align-items-start">
                             <h6 class="card-title mb-0">${hypothesisTitle}</h6>
                             <span class="badge bg-success fs-6">${this.formatScore(hypothesis.scores?.overall_winner || hypothesis.scores?.overall || hypothesis.overall_winner_score || hypothesis.overall_score)}</span>
@@ -247,13 +257,81 @@ class SortingApp {
         container.innerHTML = html;
     }
 
+    resetDetailCache(params) {
+        // 详情缓存对应一组列表查询条件（筛选、排序、模型），翻页时保留
+        const query = new URLSearchParams(params);
+        query.delete('page');
+        const key = query.toString();
+        if (key !== this.detailCacheQuery) {
+            this.detailCacheQuery = key;
+            this.detailCache.clear();
+            this.prefetchQueue.clear();
+        }
+    }
+
+    getCachedHypothesisDetail(id) {
+        const hypothesis = this.detailCache.get(id);
+        if (hypothesis) {
+            // 移到最近使用的位置
+            this.detailCache.delete(id);
+            this.detailCache.set(id, hypothesis);
+        }
+        return hypothesis;
+    }
+
+    cacheHypothesisDetail(id, hypothesis) {
+        this.detailCache.delete(id);
+        this.detailCache.set(id, hypothesis);
+        while (this.detailCache.size > this.detailCacheSize) {
+            this.detailCache.delete(this.detailCache.keys().next().value);
+        }
+    }
+
+    async fetchHypothesisDetailsBatch(ids) {
+        // 一次请求获取多张卡片的详情，代替逐个请求 /api/hypothesis/<id>
+        const sorted = [...ids].sort((a, b) => a - b);
+        const response = await fetch(`/api/hypotheses/batch?ids=${sorted.join(',')}`);
+        const data = await response.json();
+        
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        
+        data.ids.forEach((id, index) => {
+            if (data.hypotheses[index]) {
+                this.cacheHypothesisDetail(id, data.hypotheses[index]);
+            }
+        });
+        return data;
+    }
+
+    queueHypothesisPrefetch(id) {
+        if (this.detailCache.has(id) || this.prefetchQueue.size >= this.prefetchLimit) {
+            return;
+        }
+        this.prefetchQueue.add(id);
+        
+        clearTimeout(this.prefetchTimer);
+        this.prefetchTimer = setTimeout(() => {
+            const ids = [...this.prefetchQueue];
+            this.prefetchQueue.clear();
+            this.fetchHypothesisDetailsBatch(ids).catch(error => {
+                console.warn('⚠️ Failed to prefetch hypothesis details:', error);
+            });
+        }, 150);
+    }
+
     async showHypothesisDetails(hypothesisId) {
         try {
-            const response = await fetch(`/api/hypothesis/${hypothesisId}`);
-            const hypothesis = await response.json();
+            let hypothesis = this.getCachedHypothesisDetail(hypothesisId);
             
-            if (hypothesis.error) {
-                throw new Error(hypothesis.error);
+            if (!hypothesis) {
+                await this.fetchHypothesisDetailsBatch([hypothesisId]);
+                hypothesis = this.getCachedHypothesisDetail(hypothesisId);
+            }
+            
+            if (!hypothesis) {
+                throw new Error('Hypothesis not found');
             }
             
             this.showHypothesisModal(hypothesis);
@@ -361,8 +439,12 @@ class SortingApp {
                 sort_order: this.currentFilters.sortOrder,
                 page: this.currentPage,
                 per_page: this.perPage,
-                ...this.currentFilters.strategies.map(s => ['strategy', s]).flat()
+                preview: 'true',
+                facets: 'strategy'
             });
+            // 多个策略参数需逐个追加
+            this.currentFilters.strategies.forEach(s => params.append('strategy', s));
+            this.resetDetailCache(params);
             
             const response = await fetch(`/api/hypotheses?${params}`);
             const data = await response.json();
@@ -371,6 +453,13 @@ class SortingApp {
                 throw new Error(data.error);
             }
             
+            // 策略分面计数（不受策略筛选本身影响），在策略筛选框中显示
+            this.strategyCounts = {};
+            ((data.facets && data.facets.strategy) || []).forEach(facet => {
+                this.strategyCounts[facet.value] = facet.count;
+            });
+            this.updateStrategyCounts();
+            
             this.renderHypotheses(data.hypotheses || data, 'Filtered Results');
             
         } catch (error) {
@@ -385,6 +474,13 @@ class SortingApp {
         this.loadHypotheses();
     }
 
+    updateStrategyCounts() {
+        document.querySelectorAll('[data-strategy-count]').forEach(element => {
+            const count = (this.strategyCounts || {})[element.dataset.strategyCount];
+            element.textContent = count === undefined ? '' : `(${count})`;
+        });
+    }
+
     showStrategyModal() {
         // 显示策略筛选模态框
         const modal = new bootstrap.Modal(document.getElementById('strategyModal'));